@@ -0,0 +1,83 @@
+"""Measure service import time and the first-use cost of each agent.
+
+Run from the repository root:
+
+    python scripts/benchmark_startup.py            # import + per-agent load times
+    python scripts/benchmark_startup.py --no-load  # import time only
+    python scripts/benchmark_startup.py --offline --agent sql  # build without network
+
+With --offline, outbound connections fail, and the script exits non-zero if any
+selected agent cannot be built.
+"""
+
+import argparse
+import socket
+import sys
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+
+failures: list[str] = []
+
+
+def timed(label: str, func):
+    start = time.perf_counter()
+    try:
+        result = func()
+        status = "ok"
+    except Exception as e:
+        result = None
+        status = f"error: {e}"
+        failures.append(label)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    print(f"{label:<32} {elapsed_ms:>10.1f} ms  {status}")
+    return result
+
+
+def disable_network() -> None:
+    def refuse(self, address):
+        raise OSError(f"network disabled by --offline (connect to {address})")
+
+    socket.socket.connect = refuse
+    socket.socket.connect_ex = refuse
+    socket.create_connection = lambda address, *args, **kwargs: refuse(None, address)
+
+
+def benchmark_startup(load_agents: bool = True, only: list[str] | None = None) -> None:
+    timed("import service", lambda: __import__("service"))
+
+    from agents import get_agent, get_all_agent_info
+
+    agent_keys = timed("get_all_agent_info", lambda: [a.key for a in get_all_agent_info()])
+    if not load_agents or not agent_keys:
+        return
+    if only:
+        agent_keys = [key for key in agent_keys if key in only]
+
+    for key in agent_keys:
+        timed(f"first get_agent({key})", lambda key=key: get_agent(key))
+    for key in agent_keys:
+        timed(f"cached get_agent({key})", lambda key=key: get_agent(key))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--no-load", action="store_true", help="Only time the service import.")
+    parser.add_argument(
+        "--offline", action="store_true", help="Fail any outbound connection while loading."
+    )
+    parser.add_argument(
+        "--agent", action="append", dest="agents", help="Only load this agent (repeatable)."
+    )
+    args = parser.parse_args()
+
+    if args.offline:
+        disable_network()
+    benchmark_startup(load_agents=not args.no_load, only=args.agents)
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,131 @@
+"""Build the local arXiv search index used by the Arxiv tool.
+
+Input is the arXiv metadata snapshot, one JSON object per line (the
+`arxiv-metadata-oai-snapshot.json` dump, optionally gzipped). Run from the
+repository root:
+
+    python scripts/build_arxiv_index.py arxiv-metadata-oai-snapshot.json data/arxiv.db
+    python scripts/build_arxiv_index.py dump.json.gz data/arxiv.db --categories cs. stat.ML
+
+then set ARXIV_MIRROR_PATH=data/arxiv.db. The output file is replaced.
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sqlite3
+import time
+from collections.abc import Iterator
+from email.utils import parsedate_to_datetime
+
+BATCH_SIZE = 10_000
+
+SCHEMA = """
+CREATE TABLE papers (
+    rowid INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    authors TEXT NOT NULL,
+    abstract TEXT NOT NULL,
+    categories TEXT NOT NULL,
+    published TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE papers_fts USING fts5(
+    title, authors, abstract,
+    content='papers', content_rowid='rowid', tokenize='porter unicode61'
+);
+"""
+INSERT = (
+    "INSERT OR REPLACE INTO papers (id, title, authors, abstract, categories, published) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+
+
+def published_date(paper: dict) -> str:
+    # The first version's timestamp is the submission date, e.g. "Mon, 2 Apr 2007 19:18:42 GMT".
+    try:
+        return parsedate_to_datetime(paper["versions"][0]["created"]).date().isoformat()
+    except (KeyError, IndexError, TypeError, ValueError):
+        return paper.get("update_date") or ""
+
+
+def read_papers(path: str, categories: list[str]) -> Iterator[tuple[str, ...]]:
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            paper = json.loads(line)
+            if categories and not any(
+                c.startswith(prefix) for c in paper["categories"].split() for prefix in categories
+            ):
+                continue
+            yield (
+                paper["id"],
+                " ".join(paper["title"].split()),
+                " ".join(paper["authors"].split()),
+                " ".join(paper["abstract"].split()),
+                paper["categories"],
+                published_date(paper),
+            )
+
+
+def build(dump: str, output: str, categories: list[str]) -> int:
+    tmp = output + ".tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    conn = sqlite3.connect(tmp)
+    conn.executescript("PRAGMA journal_mode = OFF; PRAGMA synchronous = OFF;" + SCHEMA)
+    count = 0
+    batch = []
+    for paper in read_papers(dump, categories):
+        batch.append(paper)
+        if len(batch) == BATCH_SIZE:
+            conn.executemany(INSERT, batch)
+            count += len(batch)
+            batch.clear()
+            print(f"\r{count} papers", end="", flush=True)
+    conn.executemany(INSERT, batch)
+    count += len(batch)
+    print(f"\r{count} papers, indexing...", flush=True)
+    # Building the index once after the bulk load is much faster than per-row triggers.
+    conn.execute("INSERT INTO papers_fts (papers_fts) VALUES ('rebuild')")
+    conn.execute("INSERT INTO papers_fts (papers_fts) VALUES ('optimize')")
+    conn.commit()
+    conn.execute("VACUUM")
+    conn.close()
+    os.replace(tmp, output)
+    return count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("dump", help="arXiv metadata snapshot (.json or .json.gz)")
+    parser.add_argument("output", help="SQLite file to write")
+    parser.add_argument(
+        "--categories",
+        nargs="*",
+        default=[],
+        help="Only keep papers with a category starting with one of these prefixes",
+    )
+    parser.add_argument("--query", default="attention is all you need", help="Smoke test query")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    count = build(args.dump, args.output, args.categories)
+    print(f"Indexed {count} papers in {time.perf_counter() - start:.1f}s -> {args.output}")
+
+    conn = sqlite3.connect(f"file:{args.output}?mode=ro", uri=True)
+    start = time.perf_counter()
+    rows = conn.execute(
+        "SELECT p.id, p.title FROM papers_fts JOIN papers p ON p.rowid = papers_fts.rowid "
+        "WHERE papers_fts MATCH ? ORDER BY rank LIMIT 3",
+        (" ".join(f'"{term}"' for term in args.query.split()),),
+    ).fetchall()
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    print(f"Search {args.query!r}: {len(rows)} results in {elapsed_ms:.1f} ms")
+    for paper_id, title in rows:
+        print(f"  {paper_id}  {title}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Build the local Wikipedia index used when WIKIPEDIA_BACKEND=local.
+
+Inputs are any mix of:
+
+- WikiExtractor output made with --json (files or directories of them), one
+  {"title": ..., "text": ...} object per line;
+- the abstracts dump, enwiki-latest-abstract.xml or .xml.gz.
+
+Pages are keyed by title and the first input wins, so list article dumps before
+the abstracts. Run from the repository root:
+
+    python scripts/build_wikipedia_index.py extracted/ enwiki-latest-abstract.xml.gz data/wikipedia
+
+then set WIKIPEDIA_BACKEND=local and WIKIPEDIA_INDEX_DIR=data/wikipedia. The
+index files in the output directory are replaced.
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sqlite3
+import time
+import xml.etree.ElementTree as ET
+from collections.abc import Iterator
+
+# Kept in sync with agents/wikipedia_index.py.
+INDEX_FILE = "index.db"
+STORE_FILE = "articles.bin"
+
+SCHEMA = """
+CREATE TABLE articles (
+    rowid INTEGER PRIMARY KEY,
+    title TEXT NOT NULL UNIQUE,
+    title_key TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL
+);
+CREATE VIRTUAL TABLE articles_fts USING fts5(
+    title, text, content='', tokenize='porter unicode61'
+);
+"""
+
+
+def _open(path: str):
+    return gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")
+
+
+def read_abstracts(path: str) -> Iterator[tuple[str, str]]:
+    with _open(path) as f:
+        for _, elem in ET.iterparse(f):
+            if elem.tag != "doc":
+                continue
+            title = (elem.findtext("title") or "").removeprefix("Wikipedia: ")
+            yield title, elem.findtext("abstract") or ""
+            elem.clear()
+
+
+def read_extracted(path: str) -> Iterator[tuple[str, str]]:
+    with _open(path) as f:
+        for line in f:
+            page = json.loads(line)
+            yield page["title"], page["text"]
+
+
+def read_pages(inputs: list[str]) -> Iterator[tuple[str, str]]:
+    for path in inputs:
+        if os.path.isdir(path):
+            for root, _, files in sorted(os.walk(path)):
+                for name in sorted(files):
+                    yield from read_extracted(os.path.join(root, name))
+        elif path.endswith((".xml", ".xml.gz")):
+            yield from read_abstracts(path)
+        else:
+            yield from read_extracted(path)
+
+
+def clip(text: str, max_chars: int) -> str:
+    """Cut `text` to at most `max_chars`, at a paragraph break when there is one."""
+    text = text.strip()
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind("\n", 0, max_chars)
+    return text[: cut if cut > max_chars // 2 else max_chars].rstrip()
+
+
+def build(inputs: list[str], output: str, max_chars: int) -> int:
+    os.makedirs(output, exist_ok=True)
+    index_tmp = os.path.join(output, INDEX_FILE + ".tmp")
+    store_tmp = os.path.join(output, STORE_FILE + ".tmp")
+    if os.path.exists(index_tmp):
+        os.remove(index_tmp)
+    conn = sqlite3.connect(index_tmp)
+    conn.executescript("PRAGMA journal_mode = OFF; PRAGMA synchronous = OFF;" + SCHEMA)
+    count = 0
+    with open(store_tmp, "wb") as store:
+        for title, text in read_pages(inputs):
+            text = clip(text, max_chars)
+            if not title or not text:
+                continue
+            data = text.encode("utf-8")
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO articles (title, title_key, offset, length) "
+                "VALUES (?, ?, ?, ?)",
+                (title, " ".join(title.lower().split()), store.tell(), len(data)),
+            )
+            if not cursor.rowcount:
+                continue
+            conn.execute(
+                "INSERT INTO articles_fts (rowid, title, text) VALUES (?, ?, ?)",
+                (cursor.lastrowid, title, text),
+            )
+            store.write(data)
+            count += 1
+            if count % 10_000 == 0:
+                print(f"\r{count} pages", end="", flush=True)
+    print(f"\r{count} pages, optimizing...", flush=True)
+    conn.execute("CREATE INDEX articles_title_key ON articles (title_key)")
+    conn.execute("INSERT INTO articles_fts (articles_fts) VALUES ('optimize')")
+    conn.commit()
+    conn.execute("VACUUM")
+    conn.close()
+    os.replace(store_tmp, os.path.join(output, STORE_FILE))
+    os.replace(index_tmp, os.path.join(output, INDEX_FILE))
+    return count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("inputs", nargs="+", help="WikiExtractor JSON files/directories, abstracts")
+    parser.add_argument("output", help="Directory to write index.db and articles.bin to")
+    parser.add_argument(
+        "--max-chars", type=int, default=4000, help="Text kept per page (default: 4000)"
+    )
+    parser.add_argument("--query", default="Alan Turing", help="Smoke test query")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    count = build(args.inputs, args.output, args.max_chars)
+    print(f"Indexed {count} pages in {time.perf_counter() - start:.1f}s -> {args.output}")
+
+    conn = sqlite3.connect(f"file:{os.path.join(args.output, INDEX_FILE)}?mode=ro", uri=True)
+    start = time.perf_counter()
+    rows = conn.execute(
+        "SELECT a.title FROM articles_fts JOIN articles a ON a.rowid = articles_fts.rowid "
+        "WHERE articles_fts MATCH ? ORDER BY rank LIMIT 3",
+        (" ".join(f'"{term}"' for term in args.query.split()),),
+    ).fetchall()
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    print(f"Search {args.query!r}: {len(rows)} results in {elapsed_ms:.1f} ms")
+    for (title,) in rows:
+        print(f"  {title}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,17 @@
-from agents.agents import DEFAULT_AGENT, AgentGraph, get_agent, get_all_agent_info
+from agents.agents import (
+    DEFAULT_AGENT,
+    AgentGraph,
+    configure_agents,
+    get_agent,
+    get_all_agent_info,
+    warm_up_agents,
+)
 
-__all__ = ["get_agent", "get_all_agent_info", "DEFAULT_AGENT", "AgentGraph"]
+__all__ = [
+    "get_agent",
+    "get_all_agent_info",
+    "configure_agents",
+    "warm_up_agents",
+    "DEFAULT_AGENT",
+    "AgentGraph",
+]
@@ -1,47 +1,110 @@
-from dataclasses import dataclass
+import asyncio
+import importlib
+import logging
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any
 
 from langgraph.graph.state import CompiledStateGraph
 from langgraph.pregel import Pregel
 
-from agents.chatbot import chatbot
-from agents.rag_assistant import rag_assistant
-from agents.research_assistant import research_assistant
-from agents.sql_agent import build as build_sql_agent
-from agents.wikipedia_agent import wiki_agent
-from agents.arxiv_agent import arxiv_scholar
 from schema import AgentInfo
 
+logger = logging.getLogger(__name__)
 
 DEFAULT_AGENT = "chatbot"
 
 AgentGraph = CompiledStateGraph | Pregel
 
 
+def _lazy(module: str, attr: str) -> Callable[[], AgentGraph]:
+    """Return a loader that imports the graph at `module.attr` on first use."""
+
+    def load() -> AgentGraph:
+        return getattr(importlib.import_module(module), attr)
+
+    return load
+
+
 @dataclass
 class Agent:
     description: str
-    graph: AgentGraph
+    load: Callable[[], AgentGraph]
+    graph: AgentGraph | None = field(default=None, repr=False)
+    # Held while loading, so loading one agent does not block requests for the others.
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
 
 
 agents: dict[str, Agent] = {
-    "chatbot": Agent(description="A simple chatbot.", graph=chatbot),
+    "chatbot": Agent(description="A simple chatbot.", load=_lazy("agents.chatbot", "chatbot")),
     "research-assistant": Agent(
-        description="A research assistant with web search and calculator.", graph=research_assistant
+        description="A research assistant with web search and calculator.",
+        load=_lazy("agents.research_assistant", "research_assistant"),
     ),
     "rag-assistant": Agent(
-        description="A RAG assistant with access to information in a database.", graph=rag_assistant
+        description="A RAG assistant with access to information in a database.",
+        load=_lazy("agents.rag_assistant", "rag_assistant"),
     ),
     "sql": Agent(
-        description="A SQL assistant agent querying the Chinook database.",
-        graph=build_sql_agent()
+        description="A SQL assistant agent querying SQLite databases (Chinook by default).",
+        load=_lazy("agents.sql_agent", "sql_agent"),
+    ),
+    "wiki": Agent(
+        description="A Wikipedia research assistant.",
+        load=_lazy("agents.wikipedia_agent", "wiki_agent"),
+    ),
+    "arxiv": Agent(
+        description="ArXiv Scholar: scientific paper search agent.",
+        load=_lazy("agents.arxiv_agent", "arxiv_scholar"),
+    ),
+    "multi-source": Agent(
+        description="Searches the web, Wikipedia and arXiv in parallel and combines the results.",
+        load=_lazy("agents.multi_source_agent", "multi_source_agent"),
     ),
-    "wiki": Agent(description="A Wikipedia research assistant.", graph=wiki_agent),
-    "arxiv": Agent(description="ArXiv Scholar: scientific paper search agent.", graph=arxiv_scholar),
 }
 
+_checkpointer: Any = None
+_store: Any = None
+
+
+def _attach(graph: AgentGraph) -> None:
+    if _checkpointer is not None:
+        graph.checkpointer = _checkpointer
+    if _store is not None:
+        graph.store = _store
+
 
 def get_agent(agent_id: str) -> AgentGraph:
-    return agents[agent_id].graph
+    agent = agents[agent_id]
+    if agent.graph is None:
+        with agent.lock:
+            if agent.graph is None:
+                graph = agent.load()
+                _attach(graph)
+                agent.graph = graph
+                logger.info(f"Loaded agent {agent_id}")
+    return agent.graph
+
+
+def configure_agents(checkpointer: Any, store: Any) -> None:
+    """Set the checkpointer and store for loaded agents and for agents loaded later."""
+    global _checkpointer, _store
+    _checkpointer, _store = checkpointer, store
+    for agent in agents.values():
+        # An agent being loaded is attached by its loader or, once it is done, here.
+        with agent.lock:
+            if agent.graph is not None:
+                _attach(agent.graph)
+
+
+async def warm_up_agents() -> None:
+    """Load every agent in a worker thread, logging (not raising) failures."""
+    for agent_id in agents:
+        try:
+            await asyncio.to_thread(get_agent, agent_id)
+        except Exception as e:
+            logger.warning(f"Warm-up failed for agent {agent_id}: {e}")
 
 
 def get_all_agent_info() -> list[AgentInfo]:
@@ -1,16 +1,17 @@
 from datetime import datetime
 from typing import Literal
 
-from langchain_community.tools import ArxivQueryRun
 from langchain_core.language_models.chat_models import BaseChatModel
-from langchain_core.messages import AIMessage, SystemMessage
-from langchain_core.runnables import RunnableConfig, RunnableLambda, RunnableSerializable
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableConfig, RunnableSerializable
 from langgraph.graph import END, MessagesState, StateGraph
 from langgraph.managed import RemainingSteps
-from langgraph.prebuilt import ToolNode
 
+from agents.arxiv_mirror import create_arxiv_tool
+from agents.context import ContextBudget
 from agents.llama_guard import LlamaGuard, LlamaGuardOutput, SafetyAssessment
-from core import get_model, settings
+from agents.tool_node import create_tool_node
+from core import get_model_for_config
 
 
 class AgentState(MessagesState, total=False):
@@ -18,7 +19,7 @@ class AgentState(MessagesState, total=False):
     remaining_steps: RemainingSteps
 
 
-arxiv_tool = ArxivQueryRun(name="Arxiv")
+arxiv_tool = create_arxiv_tool()
 tools = [arxiv_tool]
 
 
@@ -32,16 +33,14 @@ NOTE: THE USER CAN'T SEE THE TOOL RESPONSE.
 Provide answers with relevant paper titles, abstracts, and markdown-formatted arXiv links.
 """
 
+context = ContextBudget("arxiv")
+
 
 def wrap_model(model: BaseChatModel) -> RunnableSerializable[AgentState, AIMessage]:
     """Bind the tools and prepend system instructions to the messages."""
     bound_model = model.bind_tools(tools)
-    preprocessor = RunnableLambda(
-        lambda state: [SystemMessage(
-            content=instructions)] + state["messages"],
-        name="StateModifier",
-    )
-    return preprocessor | bound_model
+    preprocessor = context.preprocessor(instructions, model)
+    return preprocessor | context.with_usage(model, bound_model)
 
 
 def format_safety_message(safety: LlamaGuardOutput) -> AIMessage:
@@ -54,7 +53,7 @@ def format_safety_message(safety: LlamaGuardOutput) -> AIMessage:
 
 async def acall_model(state: AgentState, config: RunnableConfig) -> AgentState:
     """Call the model with the current state and run safety guard on the model output."""
-    m = get_model(config["configurable"].get("model", settings.DEFAULT_MODEL))
+    m = get_model_for_config(config)
     model_runnable = wrap_model(m)
     response = await model_runnable.ainvoke(state, config)
 
@@ -92,7 +91,7 @@ async def block_unsafe_content(state: AgentState, config: RunnableConfig) -> Age
 
 agent = StateGraph(AgentState)
 agent.add_node("model", acall_model)
-agent.add_node("tools", ToolNode(tools))
+agent.add_node("tools", create_tool_node(tools))
 agent.add_node("guard_input", llama_guard_input)
 agent.add_node("block_unsafe_content", block_unsafe_content)
 agent.set_entry_point("guard_input")
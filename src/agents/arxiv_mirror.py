@@ -0,0 +1,156 @@
+import logging
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter
+from functools import cache
+from typing import Any
+
+from langchain_core.tools import BaseTool, StructuredTool
+
+from agents.tool_cache import cached_tool
+from core import settings
+
+logger = logging.getLogger(__name__)
+
+# Same limits as langchain's ArxivAPIWrapper, so both backends answer alike.
+TOP_K_RESULTS = 3
+MAX_OUTPUT_CHARS = 4000
+NO_RESULTS = "No good Arxiv Result was found"
+# New-style (2301.01234v2) and old-style (hep-th/9901001) arXiv identifiers.
+# Citations write the prefix in any case, e.g. "arXiv:1706.03762".
+_ARXIV_ID = re.compile(
+    r"^(?:arxiv:)?(\d{4}\.\d{4,5}|[a-z\-]+(?:\.[A-Z]{2})?/\d{7})(?:v\d+)?$", re.IGNORECASE
+)
+# bm25 column weights for title, authors and abstract.
+_SEARCH_SQL = """
+    SELECT p.id, p.title, p.authors, p.abstract, p.published
+    FROM papers_fts JOIN papers p ON p.rowid = papers_fts.rowid
+    WHERE papers_fts MATCH ?
+    ORDER BY bm25(papers_fts, 10.0, 3.0, 1.0)
+    LIMIT ?
+"""
+
+_counters: Counter[str] = Counter()
+
+
+def _fts_query(query: str, operator: str) -> str:
+    # Quote every term so user input can never be read as FTS5 syntax.
+    terms = re.findall(r"\w+", query.lower())
+    return f" {operator} ".join(f'"{t}"' for t in terms)
+
+
+def format_papers(rows: list[tuple[Any, ...]]) -> str:
+    """Format papers the way ArxivAPIWrapper.run does."""
+    docs = [
+        f"Published: {published}\nTitle: {title}\nAuthors: {authors}\nSummary: {abstract}"
+        for _, title, authors, abstract, published in rows
+    ]
+    return "\n\n".join(docs)[:MAX_OUTPUT_CHARS] if docs else NO_RESULTS
+
+
+class ArxivMirror:
+    """Search over a local SQLite FTS5 index of arXiv metadata and abstracts.
+
+    The index is built from the arXiv metadata dump by
+    scripts/build_arxiv_index.py and opened read-only.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        self._conn.execute(f"PRAGMA mmap_size = {settings.SQL_MMAP_SIZE}")
+
+    def _fetch(self, sql: str, params: tuple[Any, ...]) -> list[tuple[Any, ...]]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def lookup(self, ids: list[str]) -> list[tuple[Any, ...]]:
+        placeholders = ", ".join("?" for _ in ids)
+        return self._fetch(
+            f"SELECT id, title, authors, abstract, published FROM papers "
+            f"WHERE id IN ({placeholders})",
+            tuple(ids),
+        )
+
+    def search(
+        self, query: str, k: int = TOP_K_RESULTS, match_all: bool = True
+    ) -> list[tuple[Any, ...]]:
+        """Best `k` papers for `query`; with `match_all`, every term must occur."""
+        ids = [m.group(1) for m in map(_ARXIV_ID.match, query.split()) if m]
+        if ids and len(ids) == len(query.split()):
+            return self.lookup(ids)[:k]
+        fts_query = _fts_query(query, "AND" if match_all else "OR")
+        if not fts_query:
+            return []
+        return self._fetch(_SEARCH_SQL, (fts_query, k))
+
+
+@cache
+def get_mirror() -> ArxivMirror | None:
+    """The mirror at `settings.ARXIV_MIRROR_PATH`, or None when none is configured."""
+    path = settings.ARXIV_MIRROR_PATH
+    if not path:
+        return None
+    if not os.path.exists(path):
+        logger.warning(f"arXiv mirror {path} does not exist; using the live API only")
+        return None
+    return ArxivMirror(path)
+
+
+def arxiv_stats() -> dict[str, int]:
+    """Local hits, live fallbacks and misses of the Arxiv tool, for /metrics."""
+    return {k: _counters[k] for k in ("local_hits", "live_fallbacks", "misses")}
+
+
+def create_arxiv_tool() -> BaseTool:
+    """Build the `Arxiv` tool: the local mirror first, then the live arXiv API.
+
+    Without a mirror this is the cached ArxivQueryRun tool. With a mirror, a
+    query is answered locally when every search term matches; otherwise it goes
+    to arxiv.org if `settings.ARXIV_LIVE_FALLBACK` is on, or is retried locally
+    with any term matching when it is off, e.g. in air-gapped deployments.
+    """
+    live: BaseTool | None = None
+    if settings.ARXIV_LIVE_FALLBACK or get_mirror() is None:
+        from langchain_community.tools import ArxivQueryRun
+
+        live = cached_tool(ArxivQueryRun(name="Arxiv"), ttl=6 * 60 * 60)
+    mirror = get_mirror()
+    if mirror is None:
+        return live
+
+    def local(query: str) -> str | None:
+        if rows := mirror.search(query):
+            _counters["local_hits"] += 1
+            return format_papers(rows)
+        if live is not None:
+            _counters["live_fallbacks"] += 1
+            return None
+        rows = mirror.search(query, match_all=False)
+        _counters["local_hits" if rows else "misses"] += 1
+        return format_papers(rows)
+
+    def run(query: str) -> str:
+        if (result := local(query)) is not None:
+            return result
+        return live.invoke({"query": query})
+
+    async def arun(query: str) -> str:
+        if (result := local(query)) is not None:
+            return result
+        return await live.ainvoke({"query": query})
+
+    return StructuredTool.from_function(
+        func=run,
+        coroutine=arun,
+        name="Arxiv",
+        description=(
+            "A wrapper around Arxiv.org. Useful for when you need to answer questions "
+            "about Physics, Mathematics, Computer Science, Quantitative Biology, "
+            "Quantitative Finance, Statistics, Electrical Engineering, and Economics "
+            "from scientific articles on arxiv.org. Input should be a search query."
+        ),
+    )
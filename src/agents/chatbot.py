@@ -2,23 +2,38 @@ from langchain_core.messages import BaseMessage
 from langchain_core.runnables import RunnableConfig
 from langgraph.func import entrypoint
 
-from core import get_model, settings
+from agents.context import annotate_usage, split_window, summarize_messages, summary_message
+from core import get_model_for_config, settings
 
 
 @entrypoint()
 async def chatbot(
     inputs: dict[str, list[BaseMessage]],
     *,
-    previous: dict[str, list[BaseMessage]],
+    previous: dict,
     config: RunnableConfig,
 ):
-    messages = inputs["messages"]
-    if previous:
-        messages = previous["messages"] + messages
+    """Chat over a token-budgeted window of the thread.
 
-    model = get_model(config["configurable"].get(
-        "model", settings.DEFAULT_MODEL))
-    response = await model.ainvoke(messages)
+    Only the newest messages that fit in `history_tokens` are sent to the model and
+    checkpointed. Older messages are dropped, or folded into a rolling summary when
+    `summarize_history` is enabled, so the cost of a turn does not grow with the thread.
+    """
+    configurable = config["configurable"]
+    previous = previous or {}
+    summary: str = previous.get("summary", "")
+    messages = previous.get("messages", []) + inputs["messages"]
+
+    model_name = configurable.get("model", settings.DEFAULT_MODEL)
+    model = get_model_for_config(config)
+    history_tokens = configurable.get("history_tokens", settings.CHATBOT_HISTORY_TOKENS)
+    older, window = split_window(messages, history_tokens, model_name)
+    if older and configurable.get("summarize_history", settings.CHATBOT_SUMMARIZE_HISTORY):
+        summary = await summarize_messages(model, older, summary)
+
+    prompt = summary_message(summary) + window
+    response = annotate_usage(await model.ainvoke(prompt), prompt, model_name)
     return entrypoint.final(
-        value={"messages": [response]}, save={"messages": messages + [response]}
+        value={"messages": [response]},
+        save={"messages": window + [response], "summary": summary},
     )
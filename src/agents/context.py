@@ -0,0 +1,213 @@
+import logging
+from collections import OrderedDict
+from collections.abc import Sequence
+from typing import Any
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    HumanMessage,
+    SystemMessage,
+    ToolMessage,
+)
+from langchain_core.runnables import (
+    RunnableLambda,
+    RunnableParallel,
+    RunnablePassthrough,
+    RunnableSerializable,
+)
+
+from agents.tool_compression import compress_text
+from core import settings
+from core.tokens import count_message_tokens, count_tokens, get_tokenizer
+
+logger = logging.getLogger(__name__)
+
+# A compressed tool result keeps at least this many tokens, even over budget.
+_MIN_TOOL_OUTPUT_TOKENS = 64
+
+summary_instructions = """
+Condense the conversation below into a short summary that preserves facts, names,
+numbers, decisions and open questions needed to continue it. Write plain prose.
+"""
+
+
+def _fit_tool_outputs(
+    turn: Sequence[BaseMessage], max_tokens: int, model_name: str | None
+) -> list[BaseMessage]:
+    """Shrink the tool results in `turn` so that it fits in `max_tokens` where possible.
+
+    Results share the tokens left after the other messages; results smaller than
+    their share are kept whole and the rest are compressed for relevance to the
+    question. The messages are copied, not changed.
+    """
+    turn = list(turn)
+    question = turn[0].text() if isinstance(turn[0], HumanMessage) else ""
+    tools = [
+        i for i, m in enumerate(turn) if isinstance(m, ToolMessage) and isinstance(m.content, str)
+    ]
+    count = get_tokenizer(model_name)
+    sizes = {i: count(turn[i].content) for i in tools}
+    remaining = max_tokens - count_tokens(turn, model_name) + sum(sizes.values())
+    for left, i in enumerate(sorted(tools, key=sizes.__getitem__)):
+        share = max(remaining // (len(tools) - left), _MIN_TOOL_OUTPUT_TOKENS)
+        if sizes[i] > share:
+            content = compress_text(turn[i].content, question, share, model_name)
+            turn[i] = turn[i].model_copy(update={"content": content})
+        remaining -= min(sizes[i], share)
+    return turn
+
+
+def split_window(
+    messages: Sequence[BaseMessage], max_tokens: int, model_name: str | None = None
+) -> tuple[list[BaseMessage], list[BaseMessage]]:
+    """Split `messages` into (older, window) where window is the newest suffix within budget.
+
+    The window always holds the latest HumanMessage and everything after it, so
+    the question is kept and tool calls are never separated from their results.
+    If that turn alone is over budget, its tool results are compressed instead.
+    Earlier turns are added whole while they fit.
+    """
+    if not messages:
+        return [], []
+
+    last_human = next(
+        (i for i in reversed(range(len(messages))) if isinstance(messages[i], HumanMessage)), 0
+    )
+    used = count_tokens(messages[last_human:], model_name)
+    if used > max_tokens:
+        window = _fit_tool_outputs(messages[last_human:], max_tokens, model_name)
+        return list(messages[:last_human]), window
+
+    start = last_human
+    while start > 0:
+        cost = count_message_tokens(messages[start - 1], model_name)
+        if used + cost > max_tokens:
+            break
+        used += cost
+        start -= 1
+
+    while start < last_human and not isinstance(messages[start], HumanMessage):
+        start += 1
+    return list(messages[:start]), list(messages[start:])
+
+
+async def summarize_messages(
+    model: BaseChatModel, messages: Sequence[BaseMessage], summary: str = ""
+) -> str:
+    """Fold `messages` into the rolling `summary` with one model call."""
+    if not messages:
+        return summary
+    transcript = "\n".join(f"{m.type}: {m.content}" for m in messages)
+    if summary:
+        transcript = f"Summary so far: {summary}\n\n{transcript}"
+    response = await model.with_config(tags=["skip_stream"]).ainvoke(
+        [SystemMessage(content=summary_instructions), HumanMessage(content=transcript)]
+    )
+    return str(response.content)
+
+
+def summary_message(summary: str) -> list[SystemMessage]:
+    if not summary:
+        return []
+    return [SystemMessage(content=f"Summary of the earlier conversation: {summary}")]
+
+
+def model_name_of(model: BaseChatModel) -> str | None:
+    return getattr(model, "model_name", None) or getattr(model, "model", None)
+
+
+def annotate_usage(
+    response: AIMessage, prompt: Sequence[BaseMessage], model_name: str | None
+) -> AIMessage:
+    """Record prompt/completion token counts in `response.response_metadata["token_counts"]`.
+
+    Provider-reported usage is preferred; otherwise the counts are estimated locally.
+    """
+    usage = getattr(response, "usage_metadata", None) or {}
+    response.response_metadata = {
+        **response.response_metadata,
+        "token_counts": {
+            "prompt_tokens": usage.get("input_tokens") or count_tokens(prompt, model_name),
+            "completion_tokens": usage.get("output_tokens")
+            or count_message_tokens(response, model_name),
+            "estimated": not usage,
+        },
+    }
+    return response
+
+
+class ContextBudget:
+    """Fit an agent's prompt into its token budget and report token usage.
+
+    The budget is `settings.CONTEXT_TOKEN_BUDGETS[agent]`, else
+    `settings.CONTEXT_TOKEN_BUDGET`. Messages that do not fit are dropped, or
+    summarized into one system message when `settings.CONTEXT_SUMMARIZE` is set.
+    """
+
+    def __init__(self, agent: str, max_summaries: int = 256) -> None:
+        self.agent = agent
+        self._summaries: OrderedDict[tuple[str, ...], str] = OrderedDict()
+        self._max_summaries = max_summaries
+
+    @property
+    def max_tokens(self) -> int:
+        return settings.CONTEXT_TOKEN_BUDGETS.get(self.agent, settings.CONTEXT_TOKEN_BUDGET)
+
+    def _split(
+        self, instructions: str, messages: Sequence[BaseMessage], model_name: str | None
+    ) -> tuple[SystemMessage, list[BaseMessage], list[BaseMessage]]:
+        system = SystemMessage(content=instructions)
+        budget = max(self.max_tokens - count_message_tokens(system, model_name), 0)
+        older, window = split_window(messages, budget, model_name)
+        if older:
+            logger.debug(f"{self.agent}: trimmed {len(older)} messages to fit the budget")
+        return system, older, window
+
+    def fit(
+        self, instructions: str, messages: Sequence[BaseMessage], model_name: str | None = None
+    ) -> list[BaseMessage]:
+        system, _, window = self._split(instructions, messages, model_name)
+        return [system] + window
+
+    async def afit(
+        self, instructions: str, messages: Sequence[BaseMessage], model: BaseChatModel
+    ) -> list[BaseMessage]:
+        model_name = model_name_of(model)
+        system, older, window = self._split(instructions, messages, model_name)
+        if not older or not settings.CONTEXT_SUMMARIZE:
+            return [system] + window
+
+        key = tuple(str(m.id) for m in older)
+        if (summary := self._summaries.get(key)) is None:
+            summary = await summarize_messages(model, older)
+            self._summaries[key] = summary
+            if len(self._summaries) > self._max_summaries:
+                self._summaries.popitem(last=False)
+        return [system] + summary_message(summary) + window
+
+    def preprocessor(
+        self, instructions: str, model: BaseChatModel
+    ) -> RunnableLambda[dict[str, Any], list[BaseMessage]]:
+        """The StateModifier step of an agent's `wrap_model`."""
+        model_name = model_name_of(model)
+
+        async def afunc(state: dict[str, Any]) -> list[BaseMessage]:
+            return await self.afit(instructions, state["messages"], model)
+
+        return RunnableLambda(
+            lambda state: self.fit(instructions, state["messages"], model_name),
+            afunc=afunc,
+            name="StateModifier",
+        )
+
+    def with_usage(
+        self, model: BaseChatModel, bound_model: RunnableSerializable
+    ) -> RunnableSerializable[list[BaseMessage], AIMessage]:
+        """Call `bound_model` on the fitted prompt and annotate the response with token counts."""
+        model_name = model_name_of(model)
+        annotate = RunnableLambda(
+            lambda out: annotate_usage(out["response"], out["prompt"], model_name)
+        )
+        return RunnableParallel(prompt=RunnablePassthrough(), response=bound_model) | annotate
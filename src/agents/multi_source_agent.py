@@ -0,0 +1,187 @@
+import uuid
+from collections.abc import Callable
+from datetime import datetime
+from typing import Annotated, Any
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AnyMessage, HumanMessage, ToolCall
+from langchain_core.messages import ChatMessage as LangchainChatMessage
+from langchain_core.runnables import RunnableConfig, RunnableSerializable
+from langchain_core.tools import BaseTool
+from langgraph.config import get_stream_writer
+from langgraph.graph import END, MessagesState, StateGraph
+
+from agents.arxiv_mirror import create_arxiv_tool
+from agents.context import ContextBudget
+from agents.llama_guard import LlamaGuard, LlamaGuardOutput, SafetyAssessment
+from agents.tool_compression import relevance
+from agents.tool_node import create_tool_node
+from agents.web_search import multi_web_search
+from agents.wikipedia_index import create_wikipedia_tool
+from core import get_model_for_config
+
+# Passages from all sources that go into the synthesis prompt.
+MAX_PASSAGES = 8
+# Search backends cut queries around this length; longer questions are trimmed.
+MAX_QUERY_CHARS = 300
+# Among equally relevant passages, prefer each source's own top results.
+_SOURCE_RANK_BONUS = 0.5
+
+
+def _reset_or_extend(current: list | None, update: list | None) -> list:
+    # None clears the list, so evidence from an earlier turn is not reused.
+    if update is None:
+        return []
+    return (current or []) + update
+
+
+class MultiSourceState(MessagesState, total=False):
+    safety: LlamaGuardOutput
+    evidence: Annotated[list[dict[str, Any]], _reset_or_extend]
+    source_runs: Annotated[list[dict[str, Any]], _reset_or_extend]
+
+
+# Source name -> (tool, arguments for a question).
+sources: dict[str, tuple[BaseTool, Callable[[str], dict[str, Any]]]] = {
+    "web": (multi_web_search, lambda q: {"queries": [q]}),
+    "wikipedia": (create_wikipedia_tool(), lambda q: {"query": q}),
+    "arxiv": (create_arxiv_tool(), lambda q: {"query": q}),
+}
+
+
+def _question(messages: list[AnyMessage]) -> str:
+    for message in reversed(messages):
+        if isinstance(message, HumanMessage):
+            return message.text()
+    return ""
+
+
+def search_node(source: str) -> Callable[[MultiSourceState, RunnableConfig], Any]:
+    """Create the node that searches `source` and adds its passages to the evidence.
+
+    The tool runs through the shared tool node, so it gets the same timeouts,
+    retries, circuit breaker and output compression as in the other agents.
+    """
+    tool, make_args = sources[source]
+    run_tools = create_tool_node([tool])
+
+    async def search(state: MultiSourceState, config: RunnableConfig) -> MultiSourceState:
+        question = _question(state["messages"])[:MAX_QUERY_CHARS]
+        call_id = f"{source}_{uuid.uuid4().hex}"
+        call = ToolCall(name=tool.name, args=make_args(question), id=call_id)
+        request = [HumanMessage(content=question), AIMessage(content="", tool_calls=[call])]
+        (result,) = (await run_tools({"messages": request}, config))["messages"]
+
+        passages = []
+        if result.status != "error":
+            passages = [p.strip() for p in str(result.content).split("\n\n") if p.strip()]
+        run = {
+            "type": "source_latency",
+            "source": source,
+            "status": "timeout" if result.response_metadata["timed_out"] else result.status,
+            "latency_ms": result.response_metadata["latency_ms"],
+            "passages": len(passages),
+        }
+        try:
+            get_stream_writer()(LangchainChatMessage(role="custom", content=[run]))
+        except RuntimeError:
+            pass  # Not streaming, e.g. invoked outside a graph run.
+        evidence = [
+            {"source": source, "rank": rank, "text": text} for rank, text in enumerate(passages)
+        ]
+        return {"evidence": evidence, "source_runs": [run]}
+
+    return search
+
+
+def rank_evidence(evidence: list[dict[str, Any]], question: str) -> list[dict[str, Any]]:
+    """Order passages from all sources by relevance to `question`, best first."""
+    scores = relevance([e["text"] for e in evidence], question)
+    ranked = sorted(
+        zip(scores, evidence),
+        key=lambda pair: -(pair[0] + _SOURCE_RANK_BONUS / (1 + pair[1]["rank"])),
+    )
+    return [e for _, e in ranked[:MAX_PASSAGES]]
+
+
+current_date = datetime.now().strftime("%B %d, %Y")
+instructions = """
+You are a research assistant. Answer the user's question from the evidence
+below, which was just gathered from web search, Wikipedia and arXiv and is
+ordered by relevance. Combine the sources, say which source each claim comes
+from and include markdown links to the sources where the evidence has them.
+If the evidence does not answer the question, say so.
+Today's date is {current_date}.
+
+Evidence:
+{evidence}
+"""
+
+context = ContextBudget("multi-source")
+
+
+def format_evidence(evidence: list[dict[str, Any]], runs: list[dict[str, Any]]) -> str:
+    lines = [f"[{i}] ({e['source']}) {e['text']}" for i, e in enumerate(evidence, start=1)]
+    failed = [f"{r['source']} ({r['status']})" for r in runs if r["status"] != "success"]
+    if failed:
+        lines.append(f"Sources that failed: {', '.join(failed)}")
+    return "\n\n".join(lines) or "No evidence was found."
+
+
+def wrap_model(model: BaseChatModel, evidence: str) -> RunnableSerializable[Any, AIMessage]:
+    system = instructions.format(current_date=current_date, evidence=evidence)
+    return context.preprocessor(system, model) | context.with_usage(model, model)
+
+
+def format_safety_message(safety: LlamaGuardOutput) -> AIMessage:
+    content = (
+        f"This conversation was flagged for unsafe content: {', '.join(safety.unsafe_categories)}"
+    )
+    return AIMessage(content=content)
+
+
+async def synthesize(state: MultiSourceState, config: RunnableConfig) -> MultiSourceState:
+    """Answer from the ranked evidence of all sources with one model call."""
+    evidence = rank_evidence(state.get("evidence", []), _question(state["messages"]))
+    runs = state.get("source_runs", [])
+    model_runnable = wrap_model(get_model_for_config(config), format_evidence(evidence, runs))
+    response = await model_runnable.ainvoke(state, config)
+    response.response_metadata["source_latency_ms"] = {r["source"]: r["latency_ms"] for r in runs}
+
+    safety_output = await LlamaGuard().ainvoke("Agent", state["messages"] + [response])
+    if safety_output.safety_assessment == SafetyAssessment.UNSAFE:
+        return {"messages": [format_safety_message(safety_output)], "safety": safety_output}
+    return {"messages": [response], "safety": safety_output}
+
+
+async def llama_guard_input(state: MultiSourceState, config: RunnableConfig) -> MultiSourceState:
+    safety_output = await LlamaGuard().ainvoke("User", state["messages"])
+    return {"safety": safety_output, "messages": [], "evidence": None, "source_runs": None}
+
+
+async def block_unsafe_content(state: MultiSourceState, config: RunnableConfig) -> MultiSourceState:
+    safety: LlamaGuardOutput = state["safety"]
+    return {"messages": [format_safety_message(safety)]}
+
+
+def fan_out(state: MultiSourceState) -> list[str] | str:
+    """Search every source in the same superstep, unless the input is unsafe."""
+    if state["safety"].safety_assessment == SafetyAssessment.UNSAFE:
+        return "block_unsafe_content"
+    return list(sources)
+
+
+agent = StateGraph(MultiSourceState)
+agent.add_node("guard_input", llama_guard_input)
+agent.add_node("block_unsafe_content", block_unsafe_content)
+for name in sources:
+    agent.add_node(name, search_node(name))
+agent.add_node("synthesize", synthesize)
+agent.set_entry_point("guard_input")
+agent.add_conditional_edges("guard_input", fan_out, ["block_unsafe_content", *sources])
+# synthesize waits for every source node.
+agent.add_edge(list(sources), "synthesize")
+agent.add_edge("synthesize", END)
+agent.add_edge("block_unsafe_content", END)
+
+multi_source_agent = agent.compile()
@@ -2,19 +2,19 @@ from datetime import datetime
 from typing import Literal
 
 from langchain_core.language_models.chat_models import BaseChatModel
-from langchain_core.messages import AIMessage, SystemMessage
+from langchain_core.messages import AIMessage
 from langchain_core.runnables import (
     RunnableConfig,
-    RunnableLambda,
     RunnableSerializable,
 )
 from langgraph.graph import END, MessagesState, StateGraph
 from langgraph.managed import RemainingSteps
-from langgraph.prebuilt import ToolNode
 
+from agents.context import ContextBudget
 from agents.llama_guard import LlamaGuard, LlamaGuardOutput, SafetyAssessment
+from agents.tool_node import create_tool_node
 from agents.tools import database_search
-from core import get_model, settings
+from core import get_model_for_config
 
 
 class AgentState(MessagesState, total=False):
@@ -36,15 +36,13 @@ instructions = f"""
     - Only use information from the database. Do not use information from outside sources.
     """
 
+context = ContextBudget("rag-assistant")
+
 
 def wrap_model(model: BaseChatModel) -> RunnableSerializable[AgentState, AIMessage]:
     bound_model = model.bind_tools(tools)
-    preprocessor = RunnableLambda(
-        lambda state: [SystemMessage(
-            content=instructions)] + state["messages"],
-        name="StateModifier",
-    )
-    return preprocessor | bound_model
+    preprocessor = context.preprocessor(instructions, model)
+    return preprocessor | context.with_usage(model, bound_model)
 
 
 def format_safety_message(safety: LlamaGuardOutput) -> AIMessage:
@@ -55,7 +53,7 @@ def format_safety_message(safety: LlamaGuardOutput) -> AIMessage:
 
 
 async def acall_model(state: AgentState, config: RunnableConfig) -> AgentState:
-    m = get_model(config["configurable"].get("model", settings.DEFAULT_MODEL))
+    m = get_model_for_config(config)
     model_runnable = wrap_model(m)
     response = await model_runnable.ainvoke(state, config)
 
@@ -92,7 +90,7 @@ async def block_unsafe_content(state: AgentState, config: RunnableConfig) -> Age
 
 agent = StateGraph(AgentState)
 agent.add_node("model", acall_model)
-agent.add_node("tools", ToolNode(tools))
+agent.add_node("tools", create_tool_node(tools))
 agent.add_node("guard_input", llama_guard_input)
 agent.add_node("block_unsafe_content", block_unsafe_content)
 agent.set_entry_point("guard_input")
@@ -3,14 +3,17 @@ from typing import Literal
 
 from langchain_community.tools import DuckDuckGoSearchResults
 from langchain_core.language_models.chat_models import BaseChatModel
-from langchain_core.messages import AIMessage, SystemMessage
-from langchain_core.runnables import RunnableConfig, RunnableLambda, RunnableSerializable
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableConfig, RunnableSerializable
 from langgraph.graph import END, MessagesState, StateGraph
 from langgraph.managed import RemainingSteps
-from langgraph.prebuilt import ToolNode
 
+from agents.context import ContextBudget
 from agents.llama_guard import LlamaGuard, LlamaGuardOutput, SafetyAssessment
-from core import get_model, settings
+from agents.tool_cache import cached_tool
+from agents.tool_node import create_tool_node
+from agents.web_search import multi_web_search
+from core import get_model_for_config
 
 
 class AgentState(MessagesState, total=False):
@@ -18,9 +21,9 @@ class AgentState(MessagesState, total=False):
     remaining_steps: RemainingSteps
 
 
-web_search = DuckDuckGoSearchResults(name="WebSearch")
+web_search = cached_tool(DuckDuckGoSearchResults(name="WebSearch"), ttl=15 * 60)
 
-tools = [web_search]
+tools = [web_search, multi_web_search]
 
 
 current_date = datetime.now().strftime("%B %d, %Y")
@@ -28,20 +31,21 @@ instructions = f"""
 You are a helpful research assistant with the ability to search the web using DuckDuckGo.
 Today's date is {current_date}.
 
+When a question needs several searches, run them together with MultiWebSearch
+instead of one WebSearch call at a time.
+
 NOTE: THE USER CAN'T SEE THE TOOL RESPONSE.
 
 Please provide concise, factual responses including markdown links to your sources.
 """
 
+context = ContextBudget("research-assistant")
+
 
 def wrap_model(model: BaseChatModel) -> RunnableSerializable[AgentState, AIMessage]:
     bound_model = model.bind_tools(tools)
-    preprocessor = RunnableLambda(
-        lambda state: [SystemMessage(
-            content=instructions)] + state["messages"],
-        name="StateModifier",
-    )
-    return preprocessor | bound_model
+    preprocessor = context.preprocessor(instructions, model)
+    return preprocessor | context.with_usage(model, bound_model)
 
 
 def format_safety_message(safety: LlamaGuardOutput) -> AIMessage:
@@ -52,7 +56,7 @@ def format_safety_message(safety: LlamaGuardOutput) -> AIMessage:
 
 
 async def acall_model(state: AgentState, config: RunnableConfig) -> AgentState:
-    m = get_model(config["configurable"].get("model", settings.DEFAULT_MODEL))
+    m = get_model_for_config(config)
     model_runnable = wrap_model(m)
     response = await model_runnable.ainvoke(state, config)
 
@@ -86,7 +90,7 @@ async def block_unsafe_content(state: AgentState, config: RunnableConfig) -> Age
 
 agent = StateGraph(AgentState)
 agent.add_node("model", acall_model)
-agent.add_node("tools", ToolNode(tools))
+agent.add_node("tools", create_tool_node(tools))
 agent.add_node("guard_input", llama_guard_input)
 agent.add_node("block_unsafe_content", block_unsafe_content)
 agent.set_entry_point("guard_input")
@@ -1,27 +1,271 @@
-import os
-from pathlib import Path
-from langchain.chat_models import init_chat_model
-from langchain_community.utilities.sql_database import SQLDatabase
-from langchain_community.agent_toolkits.sql.toolkit import SQLDatabaseToolkit
-from langgraph.prebuilt import create_react_agent
-from langchain import hub
+import logging
+import sqlite3
+from typing import Any, Literal
 
-CHINOOK_PATH = os.environ.get("CHINOOK_DB_PATH", "/app/data/Chinook.db")
-DB_URI = f"sqlite:///{CHINOOK_PATH}"
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AnyMessage, HumanMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig, RunnableSerializable
+from langchain_core.tools import tool
+from langgraph.graph import END, MessagesState, StateGraph
+from langgraph.managed import RemainingSteps
 
+from agents.context import ContextBudget, model_name_of
+from agents.sql_database import QueryError, QueryResult, database_path, get_database
+from agents.sql_plan_cache import get_plan_cache
+from agents.sql_results import result_store, stream_result
+from agents.sql_schema import aget_schema_digest
+from agents.tool_node import create_tool_node
+from core import get_model_for_config, settings
 
-def build():
-    llm = init_chat_model("openai:gpt-4o-mini", temperature=0)
+logger = logging.getLogger(__name__)
 
-    db = SQLDatabase.from_uri(DB_URI)
-    toolkit = SQLDatabaseToolkit(db=db, llm=llm)
+# Values longer than this are cut in query results, as SQLDatabase.run does.
+MAX_VALUE_CHARS = 100
 
-    prompt_template = hub.pull("langchain-ai/sql-agent-system-prompt")
-    system_msg = prompt_template.format(dialect="SQLite", top_k=5)
 
-    agent = create_react_agent(
-        llm,
-        toolkit.get_tools(),
-        prompt=system_msg,
-    )
-    return agent
+def database_for_config(config: RunnableConfig) -> str:
+    """Path of the database selected by the request's `database` agent_config key."""
+    return database_path(config.get("configurable", {}).get("database"))
+
+
+def _truncate(value: object) -> object:
+    if isinstance(value, str) and len(value) > MAX_VALUE_CHARS:
+        return value[:MAX_VALUE_CHARS] + "..."
+    return value
+
+
+def format_result(result: QueryResult) -> tuple[str, str | None]:
+    """Return the text the model sees for `result`, and the handle of the full result.
+
+    Results longer than `settings.SQL_PREVIEW_ROWS` are kept server-side and,
+    when the client streams, sent to it as custom events; the model only gets a
+    preview and the row count. Other clients can page the result by its handle,
+    which the answer carries as `response_metadata["sql_result_handle"]`. The
+    handle is None for results shown in full.
+    """
+    if not result.rows:
+        return "", None
+    preview = result.rows[: settings.SQL_PREVIEW_ROWS]
+    output = str([tuple(_truncate(v) for v in row) for row in preview])
+    handle = None
+    if len(result.rows) > len(preview):
+        handle = result_store.put(result.columns, result.rows)
+        streamed = stream_result(handle)
+        output += f"\n(Showing {len(preview)} of {len(result.rows)} rows."
+        output += " The full result was sent to the user.)" if streamed else ")"
+    if result.truncated:
+        output += (
+            f"\n(The query returned more than {len(result.rows)} rows and was cut off; "
+            "aggregate or add a LIMIT for a complete answer.)"
+        )
+    return output, handle
+
+
+@tool("sql_db_query", response_format="content_and_artifact")
+async def sql_db_query(query: str, config: RunnableConfig) -> tuple[str, dict[str, Any] | None]:
+    """Execute a SQLite query against the database and get back the result.
+
+    If the query is not correct or too expensive, a JSON error with a hint is
+    returned. If an error is returned, rewrite the query and try again.
+    """
+    try:
+        result = await get_database(database_for_config(config)).execute(query)
+    except QueryError as e:
+        return e.to_json(), None
+    except sqlite3.Error as e:
+        return QueryError("sql_error", str(e), "Fix the query and try again.").to_json(), None
+    output, handle = format_result(result)
+    # The artifact marks a successful run, which makes the query eligible for the plan cache.
+    artifact = {
+        "sql": query,
+        "row_count": len(result.rows),
+        "truncated": result.truncated,
+        "result_handle": handle,
+    }
+    return output, artifact
+
+
+@tool("sql_db_schema")
+async def sql_db_schema(table_names: str, config: RunnableConfig) -> str:
+    """Get the CREATE TABLE statements for a comma-separated list of tables."""
+    tables = [t.strip() for t in table_names.split(",") if t.strip()]
+    ddl = await get_database(database_for_config(config)).table_ddl(tables)
+    return ddl or f"Error: no tables named {', '.join(tables)}"
+
+
+SYSTEM_PROMPT = """\
+You are an agent designed to interact with a SQLite database.
+Given an input question, write a syntactically correct SQLite query, run it with
+sql_db_query, then look at the results and return the answer.
+Unless the user asks for a specific number of examples, limit your query to at
+most {top_k} results. Order results by a relevant column to return the most
+interesting examples. Only select the columns relevant to the question.
+
+The database schema is below: one line per table with its row count, columns,
+primary keys (PK), foreign keys (->) and sample values. Use it directly; do not
+list tables first. Call sql_db_schema only if you need a table's exact DDL.
+
+{schema}
+
+If a query fails, fix it and try again. Do not make any DML statements
+(INSERT, UPDATE, DELETE, DROP etc.) to the database."""
+
+
+class SQLState(MessagesState, total=False):
+    plan: dict[str, Any] | None
+    remaining_steps: RemainingSteps
+
+
+tools = [sql_db_query, sql_db_schema]
+
+context = ContextBudget("sql")
+
+
+def instructions(schema: str) -> str:
+    return SYSTEM_PROMPT.format(top_k=5, schema=schema)
+
+
+def wrap_model(model: BaseChatModel, system: str) -> RunnableSerializable[SQLState, AIMessage]:
+    bound_model = model.bind_tools(tools)
+    preprocessor = context.preprocessor(system, model)
+    return preprocessor | context.with_usage(model, bound_model)
+
+
+def get_sql_model(config: RunnableConfig) -> BaseChatModel:
+    # SQL generation should be deterministic unless the request asks otherwise.
+    return get_model_for_config(config, temperature=0.0)
+
+
+ANSWER_PROMPT = """\
+Answer the user's question using the result of the SQL query below, which was
+run against a SQLite database for this question. Be concise and do not mention
+the query unless asked.
+
+Query: {sql}
+
+Result: {result}"""
+
+
+def _cacheable_question(messages: list[AnyMessage]) -> tuple[int, str | None]:
+    """Index and text of the question, if the plan cache may serve it.
+
+    Follow-ups ("and for 2021?") depend on the earlier turns, so only threads
+    with a single question are looked up or stored.
+    """
+    humans = [i for i, m in enumerate(messages) if isinstance(m, HumanMessage)]
+    if not settings.SQL_PLAN_CACHE_ENABLED or len(humans) != 1:
+        return len(messages), None
+    return humans[0], messages[humans[0]].text()
+
+
+def _last_query(messages: list[AnyMessage]) -> ToolMessage | None:
+    """The result of the current turn's last sql_db_query call."""
+    for message in reversed(messages):
+        if isinstance(message, HumanMessage):
+            return None
+        if isinstance(message, ToolMessage) and message.name == "sql_db_query":
+            return message
+    return None
+
+
+async def lookup_plan(state: SQLState, config: RunnableConfig) -> SQLState:
+    """Run the cached SQL for a previously answered question, if there is one."""
+    _, question = _cacheable_question(state["messages"])
+    if not question:
+        return {"plan": None}
+    path = database_for_config(config)
+    cache = get_plan_cache()
+    plan = await cache.get(path, question)
+    if plan is None:
+        return {"plan": None}
+    try:
+        result = await get_database(path).execute(plan.sql)
+    except (QueryError, sqlite3.Error) as e:
+        logger.info(f"Cached SQL plan no longer runs, falling back to the agent: {e}")
+        cache.evict(path, plan.question)
+        return {"plan": None}
+    output, handle = format_result(result)
+    return {
+        "plan": {
+            "sql": plan.sql,
+            "result": output,
+            "result_handle": handle,
+            "similarity": plan.similarity,
+        }
+    }
+
+
+def route_plan(state: SQLState) -> Literal["answer_from_plan", "model"]:
+    return "answer_from_plan" if state.get("plan") else "model"
+
+
+async def answer_from_plan(state: SQLState, config: RunnableConfig) -> SQLState:
+    plan = state["plan"]
+    system = ANSWER_PROMPT.format(sql=plan["sql"], result=plan["result"] or "no rows")
+    model = get_sql_model(config)
+    prompt = context.fit(system, state["messages"], model_name_of(model))
+    response = await model.ainvoke(prompt, config)
+    response.response_metadata["sql_plan_cache"] = {
+        "sql": plan["sql"],
+        "similarity": plan["similarity"],
+    }
+    if plan["result_handle"]:
+        response.response_metadata["sql_result_handle"] = plan["result_handle"]
+    return {"messages": [response], "plan": None}
+
+
+async def acall_model(state: SQLState, config: RunnableConfig) -> SQLState:
+    # Each database's digest is rebuilt only when its file's mtime changes.
+    schema = await aget_schema_digest(database_for_config(config))
+    model_runnable = wrap_model(get_sql_model(config), instructions(schema))
+    response = await model_runnable.ainvoke(state, config)
+    if not response.tool_calls:
+        query = _last_query(state["messages"])
+        if query and query.artifact and query.artifact["result_handle"]:
+            response.response_metadata["sql_result_handle"] = query.artifact["result_handle"]
+    if state.get("remaining_steps", 10) < 2 and getattr(response, "tool_calls", None):
+        return {
+            "messages": [
+                AIMessage(
+                    id=getattr(response, "id", ""),
+                    content="Sorry, need more steps to process this request.",
+                )
+            ]
+        }
+    return {"messages": [response]}
+
+
+def pending_tool_calls(state: SQLState) -> Literal["tools", "record_plan"]:
+    last_message = state["messages"][-1]
+    if isinstance(last_message, AIMessage) and last_message.tool_calls:
+        return "tools"
+    return "record_plan"
+
+
+async def record_plan(state: SQLState, config: RunnableConfig) -> SQLState:
+    """Remember the last query that answered this question completely."""
+    _, question = _cacheable_question(state["messages"])
+    query = _last_query(state["messages"])
+    if not question or not query or not query.artifact:
+        return {}
+    # An empty result more likely means a wrong filter than a verified plan.
+    if query.artifact["row_count"] and not query.artifact["truncated"]:
+        await get_plan_cache().set(database_for_config(config), question, query.artifact["sql"])
+    return {}
+
+
+agent = StateGraph(SQLState)
+agent.add_node("lookup_plan", lookup_plan)
+agent.add_node("answer_from_plan", answer_from_plan)
+agent.add_node("model", acall_model)
+# Query results are tables with their own preview limit; sentence filtering would garble them.
+agent.add_node("tools", create_tool_node(tools, compress=False))
+agent.add_node("record_plan", record_plan)
+agent.set_entry_point("lookup_plan")
+agent.add_conditional_edges("lookup_plan", route_plan)
+agent.add_edge("answer_from_plan", END)
+agent.add_conditional_edges("model", pending_tool_calls)
+agent.add_edge("tools", "model")
+agent.add_edge("record_plan", END)
+
+sql_agent = agent.compile()
@@ -0,0 +1,323 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any
+
+import aiosqlite
+
+from core import settings
+
+logger = logging.getLogger(__name__)
+
+# String literals and quoted identifiers, which normalization must leave untouched,
+# and comments, which it drops.
+_QUOTED = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|--[^\n]*|/\*.*?(?:\*/|$))", re.DOTALL)
+# Table references in FROM/JOIN clauses, used to map plan aliases back to tables.
+_TABLE_REF = re.compile(
+    r'(?:\bFROM|\bJOIN|,)\s*"?(\w+)"?(?:\s+(?:AS\s+)?"?(\w+)"?)?', re.IGNORECASE
+)
+_READ_ONLY_START = re.compile(r"^\s*(SELECT|WITH|VALUES)\b", re.IGNORECASE)
+# Rows assumed for a plan entry that is not a known table, e.g. a materialized CTE.
+_UNKNOWN_ROWS = 1000
+# VM instructions between progress handler calls.
+_PROGRESS_STEPS = 10_000
+
+
+def normalize_sql(sql: str) -> str:
+    """Cache key for a query: comments dropped, whitespace collapsed, no trailing ';'.
+
+    Only the key is normalized; the query always runs as written.
+    """
+    parts, code = [], ""
+    for i, part in enumerate(_QUOTED.split(sql)):
+        if i % 2 == 0 or part.startswith(("--", "/*")):
+            code += part if i % 2 == 0 else " "
+        else:
+            parts += [re.sub(r"\s+", " ", code), part]
+            code = ""
+    parts.append(re.sub(r"\s+", " ", code))
+    return "".join(parts).strip().rstrip(";").strip()
+
+
+class QueryError(Exception):
+    """A query the database refused to run, reported to the model as structured JSON."""
+
+    def __init__(self, code: str, message: str, hint: str = "") -> None:
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.hint = hint
+
+    def to_json(self) -> str:
+        return json.dumps({"error": self.code, "message": self.message, "hint": self.hint})
+
+
+@dataclass(frozen=True)
+class QueryResult:
+    columns: list[str]
+    rows: list[tuple[Any, ...]]
+    truncated: bool = False
+
+
+class SQLitePool:
+    """A fixed-size pool of read-only aiosqlite connections to one database file."""
+
+    def __init__(self, path: str, size: int) -> None:
+        self.path = path
+        self.size = size
+        self._idle: asyncio.Queue[aiosqlite.Connection] | None = None
+        self._opened = 0
+        self._lock = asyncio.Lock()
+
+    async def _open(self) -> aiosqlite.Connection:
+        conn = await aiosqlite.connect(f"file:{self.path}?mode=ro", uri=True)
+        await conn.execute(f"PRAGMA mmap_size = {settings.SQL_MMAP_SIZE}")
+        await conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[aiosqlite.Connection]:
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+        async with self._lock:
+            if self._idle.empty() and self._opened < self.size:
+                self._idle.put_nowait(await self._open())
+                self._opened += 1
+        conn = await self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put_nowait(conn)
+
+    async def close(self) -> None:
+        while self._idle is not None and not self._idle.empty():
+            await self._idle.get_nowait().close()
+        self._opened = 0
+
+
+class QueryResultCache:
+    """LRU of query results, dropped whenever the database file's mtime changes."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, Any] = OrderedDict()
+        self._mtime: float | None = None
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def _check_mtime(self, mtime: float) -> None:
+        if self._mtime != mtime:
+            if self._entries:
+                self._stats["invalidations"] += 1
+            self._entries.clear()
+            self._mtime = mtime
+
+    def get(self, key: str, mtime: float) -> Any | None:
+        with self._lock:
+            self._check_mtime(mtime)
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return self._entries[key]
+            self._stats["misses"] += 1
+            return None
+
+    def set(self, key: str, mtime: float, value: Any) -> None:
+        with self._lock:
+            self._check_mtime(mtime)
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {**self._stats, "size": len(self._entries)}
+
+
+class ReadOnlyDatabase:
+    """Async, read-only access to a SQLite file with cached query results.
+
+    Queries are checked before they run: only single read-only statements are
+    accepted, and `EXPLAIN QUERY PLAN` is used to reject joins of full table
+    scans whose combined size exceeds `settings.SQL_MAX_JOIN_ROWS`. Running
+    queries are interrupted after `settings.SQL_QUERY_TIMEOUT` seconds through
+    SQLite's progress handler, and at most `settings.SQL_MAX_ROWS` rows are
+    returned. Refused queries raise QueryError.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.pool = SQLitePool(path, settings.SQL_POOL_SIZE)
+        self.cache = QueryResultCache(settings.SQL_RESULT_CACHE_SIZE)
+        self._row_counts: tuple[float, dict[str, int]] | None = None
+        self._guard_stats = {"rejected": 0, "timeouts": 0, "truncated": 0}
+
+    async def _table_rows(self, conn: aiosqlite.Connection, mtime: float) -> dict[str, int]:
+        if self._row_counts and self._row_counts[0] == mtime:
+            return self._row_counts[1]
+        counts = {}
+        async with conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+        ) as cursor:
+            tables = [name for (name,) in await cursor.fetchall()]
+        for table in tables:
+            quoted = '"' + table.replace('"', '""') + '"'
+            try:
+                # MAX(rowid) is an index lookup, unlike COUNT(*).
+                async with conn.execute(f"SELECT MAX(rowid) FROM {quoted}") as cursor:
+                    (count,) = await cursor.fetchone()
+            except sqlite3.OperationalError:
+                async with conn.execute(f"SELECT COUNT(*) FROM {quoted}") as cursor:
+                    (count,) = await cursor.fetchone()
+            counts[table.lower()] = count or 0
+        self._row_counts = (mtime, counts)
+        return counts
+
+    async def _check_plan(self, conn: aiosqlite.Connection, sql: str, mtime: float) -> None:
+        # Match the comment-free form, so comments can neither hide nor fake table names.
+        normalized = normalize_sql(sql)
+        if not _READ_ONLY_START.match(normalized):
+            raise QueryError(
+                "not_read_only",
+                "Only SELECT queries are allowed.",
+                "Rewrite the request as a single SELECT statement.",
+            )
+        table_rows = await self._table_rows(conn, mtime)
+        aliases = {}
+        for table, alias in _TABLE_REF.findall(normalized):
+            if table.lower() in table_rows:
+                aliases[table.lower()] = table.lower()
+                if alias:
+                    aliases.setdefault(alias.lower(), table.lower())
+
+        async with conn.execute(f"EXPLAIN QUERY PLAN {sql}") as cursor:
+            plan = await cursor.fetchall()
+        # Full scans that share a parent are nested loops: their sizes multiply.
+        scans: dict[int, list[int]] = {}
+        for _, parent, _, detail in plan:
+            words = detail.split()
+            if len(words) < 2 or words[0] != "SCAN" or words[1] in ("CONSTANT", "SUBQUERY"):
+                continue
+            name = aliases.get(words[1].lower(), words[1].lower())
+            scans.setdefault(parent, []).append(table_rows.get(name, _UNKNOWN_ROWS))
+        for sizes in scans.values():
+            if len(sizes) > 1 and math.prod(sizes) > settings.SQL_MAX_JOIN_ROWS:
+                self._guard_stats["rejected"] += 1
+                raise QueryError(
+                    "cartesian_join",
+                    f"The query plan joins full table scans of {' x '.join(map(str, sizes))} "
+                    "rows without an index.",
+                    "Add a join condition on a key column (see the foreign keys in the "
+                    "schema), filter the tables first, or aggregate in a subquery.",
+                )
+
+    async def _run(self, conn: aiosqlite.Connection, sql: str) -> QueryResult:
+        deadline = time.monotonic() + settings.SQL_QUERY_TIMEOUT
+        await conn.set_progress_handler(lambda: time.monotonic() > deadline, _PROGRESS_STEPS)
+        try:
+            async with conn.execute(sql) as cursor:
+                columns = [d[0] for d in cursor.description or ()]
+                rows = await cursor.fetchmany(settings.SQL_MAX_ROWS + 1)
+        except sqlite3.OperationalError as e:
+            if "interrupted" not in str(e):
+                raise
+            self._guard_stats["timeouts"] += 1
+            raise QueryError(
+                "timeout",
+                f"The query was stopped after {settings.SQL_QUERY_TIMEOUT:g}s.",
+                "Use indexed join columns, filter earlier, or add a LIMIT.",
+            ) from e
+        finally:
+            await conn.set_progress_handler(None, 0)
+        truncated = len(rows) > settings.SQL_MAX_ROWS
+        if truncated:
+            self._guard_stats["truncated"] += 1
+        rows = [tuple(row) for row in rows[: settings.SQL_MAX_ROWS]]
+        return QueryResult(columns, rows, truncated)
+
+    async def execute(self, sql: str) -> QueryResult:
+        """Check and run `sql`, serving the result from the cache when the file is unchanged."""
+        key = normalize_sql(sql)
+        mtime = os.path.getmtime(self.path)
+        if (result := self.cache.get(key, mtime)) is not None:
+            return result
+        async with self.pool.connection() as conn:
+            await self._check_plan(conn, sql, mtime)
+            result = await self._run(conn, sql)
+        self.cache.set(key, mtime, result)
+        return result
+
+    def stats(self) -> dict[str, int]:
+        return {**self.cache.stats(), **self._guard_stats}
+
+    async def table_ddl(self, tables: list[str]) -> str:
+        placeholders = ", ".join("?" for _ in tables)
+        async with (
+            self.pool.connection() as conn,
+            conn.execute(
+                f"SELECT name, sql FROM sqlite_master WHERE type = 'table' "
+                f"AND name IN ({placeholders})",
+                tables,
+            ) as cursor,
+        ):
+            rows = await cursor.fetchall()
+        return "\n\n".join(ddl for _, ddl in rows)
+
+
+CHINOOK_PATH = os.environ.get("CHINOOK_DB_PATH", "/app/data/Chinook.db")
+DEFAULT_DATABASE = "chinook"
+
+
+def database_registry() -> dict[str, str]:
+    """Named SQLite databases the SQL agent may query: Chinook plus `settings.SQL_DATABASES`."""
+    return {DEFAULT_DATABASE: CHINOOK_PATH, **settings.SQL_DATABASES}
+
+
+def database_path(name: str | None = None) -> str:
+    """Return the file path of the named database, or of the default database."""
+    registry = database_registry()
+    name = name or settings.SQL_DEFAULT_DATABASE
+    if name not in registry:
+        raise ValueError(f"Unknown database {name!r}; choose one of {sorted(registry)}")
+    return registry[name]
+
+
+_databases: dict[str, ReadOnlyDatabase] = {}
+_databases_lock = threading.Lock()
+
+
+def get_database(path: str) -> ReadOnlyDatabase:
+    """Return the shared ReadOnlyDatabase for the SQLite file at `path`.
+
+    Databases are created on first use and their connections are opened lazily,
+    up to `settings.SQL_POOL_SIZE` per database.
+    """
+    with _databases_lock:
+        if path not in _databases:
+            _databases[path] = ReadOnlyDatabase(path)
+        return _databases[path]
+
+
+def sql_stats() -> dict[str, dict[str, int]]:
+    """Result cache and query guard counters per database, for the /metrics endpoint."""
+    with _databases_lock:
+        databases = list(_databases.values())
+    return {os.path.basename(db.path): db.stats() for db in databases}
+
+
+async def close_databases() -> None:
+    with _databases_lock:
+        databases = list(_databases.values())
+    for db in databases:
+        await db.pool.close()
@@ -0,0 +1,167 @@
+import logging
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from functools import cache
+from typing import Any
+
+from langchain_core.embeddings import Embeddings
+
+from core import settings
+
+logger = logging.getLogger(__name__)
+
+# Values a question's SQL usually depends on: quoted strings and numbers.
+_LITERAL = re.compile(r"\"[^\"]*\"|(?<!\w)'[^']*'(?!\w)|\d+(?:\.\d+)?")
+# Capitalized words inside a sentence are usually names: "sales in Brazil".
+_NAME = re.compile(r"\b[A-Z][\w-]*")
+# Embeddings of recent missed lookups, reused when the answer's plan is stored.
+_PENDING_EMBEDDINGS = 64
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase, collapse whitespace and drop surrounding punctuation."""
+    return re.sub(r"\s+", " ", question).strip().lower().strip("?!. ")
+
+
+def question_literals(question: str) -> list[str]:
+    """The quoted strings, numbers and names in `question`.
+
+    Names are capitalized words that do not start a sentence; lowercase names
+    ("sales in brazil") are not recognized.
+    """
+    names = []
+    rest = _LITERAL.sub(" ", question)
+    for match in _NAME.finditer(rest):
+        before = rest[: match.start()].rstrip()
+        if before and before[-1] not in ".!?" and match.group() != "I":
+            names.append(match.group())
+    return _LITERAL.findall(question) + names
+
+
+def _cosine(a: list[float], b: list[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+@dataclass
+class CachedPlan:
+    question: str
+    sql: str
+    embedding: list[float] | None = None
+    similarity: float = 1.0
+
+
+class SQLPlanCache:
+    """LRU of verified question -> SQL pairs, per database.
+
+    Only queries that ran successfully and returned a complete result are
+    stored. Lookups match the normalized question exactly, then, with an
+    `embeddings` model, the most similar stored question whose cosine
+    similarity is at least `similarity_threshold` and whose numbers, quoted
+    values and names are the same: "sales in 2021" must not reuse the plan for
+    2022, nor "sales in Brazil" the plan for Canada.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        embeddings: Embeddings | None = None,
+        similarity_threshold: float = 0.92,
+    ) -> None:
+        self.max_entries = max_entries
+        self.embeddings = embeddings
+        self.similarity_threshold = similarity_threshold
+        self._entries: OrderedDict[tuple[str, str], CachedPlan] = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters: Counter[str] = Counter()
+        self._pending: OrderedDict[str, list[float]] = OrderedDict()
+
+    async def _embed(self, question: str) -> list[float] | None:
+        if self.embeddings is None:
+            return None
+        try:
+            return await self.embeddings.aembed_query(question)
+        except Exception as e:
+            logger.warning(f"SQL plan cache embedding failed: {e}")
+            return None
+
+    async def get(self, database: str, question: str) -> CachedPlan | None:
+        key = (database, normalize_question(question))
+        with self._lock:
+            if plan := self._entries.get(key):
+                self._entries.move_to_end(key)
+                self._counters["exact_hits"] += 1
+                return plan
+
+        if self.embeddings is not None and (embedding := await self._embed(key[1])):
+            literals = question_literals(question)
+            best, best_score = None, self.similarity_threshold
+            with self._lock:
+                self._pending[key[1]] = embedding
+                while len(self._pending) > _PENDING_EMBEDDINGS:
+                    self._pending.popitem(last=False)
+                for other_key, plan in self._entries.items():
+                    if other_key[0] != database or plan.embedding is None:
+                        continue
+                    if question_literals(plan.question) != literals:
+                        continue
+                    score = _cosine(embedding, plan.embedding)
+                    if score >= best_score:
+                        best, best_score = other_key, score
+                if best is not None:
+                    self._entries.move_to_end(best)
+                    self._counters["semantic_hits"] += 1
+                    plan = self._entries[best]
+                    return CachedPlan(plan.question, plan.sql, similarity=round(best_score, 4))
+
+        self._counters["misses"] += 1
+        return None
+
+    async def set(self, database: str, question: str, sql: str) -> None:
+        normalized = normalize_question(question)
+        with self._lock:
+            embedding = self._pending.pop(normalized, None)
+        if embedding is None:
+            embedding = await self._embed(normalized)
+        plan = CachedPlan(question, sql, embedding)
+        with self._lock:
+            self._entries[(database, normalized)] = plan
+            self._entries.move_to_end((database, normalized))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def evict(self, database: str, question: str) -> None:
+        """Forget a plan that no longer runs, e.g. after a schema change."""
+        with self._lock:
+            for key, plan in list(self._entries.items()):
+                if key[0] == database and plan.question == question:
+                    del self._entries[key]
+                    self._counters["evictions"] += 1
+
+    def stats(self) -> dict[str, Any]:
+        hits = self._counters["exact_hits"] + self._counters["semantic_hits"]
+        lookups = hits + self._counters["misses"]
+        return {
+            **{k: self._counters[k] for k in ("exact_hits", "semantic_hits", "misses")},
+            "evictions": self._counters["evictions"],
+            "size": len(self._entries),
+            "hit_ratio": round(hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+@cache
+def get_plan_cache() -> SQLPlanCache:
+    embeddings = None
+    if settings.SQL_PLAN_CACHE_SEMANTIC and settings.OPENAI_API_KEY:
+        from langchain_openai import OpenAIEmbeddings
+
+        embeddings = OpenAIEmbeddings()
+    return SQLPlanCache(
+        max_entries=settings.SQL_PLAN_CACHE_MAX_ENTRIES,
+        embeddings=embeddings,
+        similarity_threshold=settings.SQL_PLAN_CACHE_SIMILARITY,
+    )
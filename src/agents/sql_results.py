@@ -0,0 +1,84 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+from langchain_core.messages import ChatMessage as LangchainChatMessage
+from langgraph.config import CONF, CONFIG_KEY_STREAM_WRITER, get_config
+
+from core import settings
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, bytes):
+        return f"<{len(value)} bytes>"
+    return value
+
+
+@dataclass
+class StoredResult:
+    columns: list[str]
+    rows: list[tuple[Any, ...]]
+    expires_at: float
+
+
+class ResultStore:
+    """Server-side LRU of large query results, addressed by an opaque handle."""
+
+    def __init__(self, max_entries: int, ttl: float) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, StoredResult] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, columns: list[str], rows: list[tuple[Any, ...]]) -> str:
+        handle = uuid.uuid4().hex
+        with self._lock:
+            self._entries[handle] = StoredResult(columns, rows, time.time() + self.ttl)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return handle
+
+    def page(self, handle: str, offset: int, limit: int) -> dict[str, Any] | None:
+        with self._lock:
+            stored = self._entries.get(handle)
+            if stored is None or stored.expires_at <= time.time():
+                self._entries.pop(handle, None)
+                return None
+            self._entries.move_to_end(handle)
+        rows = stored.rows[offset : offset + limit]
+        return {
+            "handle": handle,
+            "columns": stored.columns,
+            "rows": [[_jsonable(v) for v in row] for row in rows],
+            "offset": offset,
+            "total_rows": len(stored.rows),
+            "done": offset + len(rows) >= len(stored.rows),
+        }
+
+
+result_store = ResultStore(settings.SQL_RESULT_STORE_SIZE, settings.SQL_RESULT_STORE_TTL)
+
+
+def stream_result(handle: str) -> bool:
+    """Send a stored result to the client as custom events, one page per event.
+
+    Returns False when nobody receives custom events: outside a graph run, or
+    in a run without the "custom" stream mode (e.g. /invoke), where LangGraph's
+    stream writer silently drops them.
+    """
+    try:
+        writer = get_config()[CONF].get(CONFIG_KEY_STREAM_WRITER)
+    except (RuntimeError, KeyError):
+        return False
+    if writer is None:
+        return False
+    offset = 0
+    while page := result_store.page(handle, offset, settings.SQL_STREAM_PAGE_SIZE):
+        writer(LangchainChatMessage(role="custom", content=[{"type": "sql_result", **page}]))
+        if page["done"]:
+            break
+        offset += len(page["rows"])
+    return True
@@ -0,0 +1,117 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Sample values shown per text column, and the longest sample kept.
+_SAMPLE_VALUES = 3
+_SAMPLE_CHARS = 30
+# Text columns with at most this many distinct, repeated values list all of them.
+_ENUM_MAX_VALUES = 12
+# Text columns are profiled on at most this many rows, so large tables stay cheap.
+_PROFILE_ROWS = 10_000
+
+_digests: dict[str, tuple[float, str]] = {}
+_lock = threading.Lock()
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _sample(value: object) -> str:
+    text = str(value)
+    if len(text) > _SAMPLE_CHARS:
+        text = text[: _SAMPLE_CHARS - 3] + "..."
+    return repr(text)
+
+
+def _describe_column(
+    conn: sqlite3.Connection, table: str, name: str, col_type: str, primary_key: bool
+) -> str:
+    parts = [f"{name} {col_type or 'ANY'}"]
+    if primary_key:
+        parts.append("PK")
+        return " ".join(parts)
+
+    column = _quote(name)
+    if "CHAR" in col_type.upper() or "TEXT" in col_type.upper():
+        distinct, non_null = conn.execute(
+            f"SELECT COUNT(DISTINCT {column}), COUNT({column}) "
+            f"FROM (SELECT {column} FROM {_quote(table)} LIMIT {_PROFILE_ROWS})"
+        ).fetchone()
+        is_enum = distinct <= _ENUM_MAX_VALUES and distinct * 2 <= non_null
+        values = conn.execute(
+            f"SELECT DISTINCT {column} FROM {_quote(table)} "
+            f"WHERE {column} IS NOT NULL LIMIT {distinct if is_enum else _SAMPLE_VALUES}"
+        ).fetchall()
+        if values:
+            prefix = "one of" if is_enum else "e.g."
+            parts.append(f"{prefix} {', '.join(_sample(v) for (v,) in values)}")
+    elif col_type.upper() in ("DATETIME", "DATE") or "NUMERIC" in col_type.upper():
+        low, high = conn.execute(
+            f"SELECT MIN({column}), MAX({column}) FROM {_quote(table)}"
+        ).fetchone()
+        if low is not None:
+            parts.append(f"range {low}..{high}")
+    return " ".join(parts)
+
+
+def build_schema_digest(path: str) -> str:
+    """Describe every table in the SQLite database at `path` in a compact form.
+
+    One line per table lists row count, columns with types, primary keys,
+    foreign key targets and sample values, so the model can write queries
+    without first calling schema discovery tools.
+    """
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        tables = [
+            name
+            for (name,) in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' "
+                "AND name NOT LIKE 'sqlite_%' ORDER BY name"
+            )
+        ]
+        lines = []
+        for table in tables:
+            rows = conn.execute(f"SELECT COUNT(*) FROM {_quote(table)}").fetchone()[0]
+            foreign_keys = {
+                fk[3]: f"{fk[2]}.{fk[4]}"
+                for fk in conn.execute(f"PRAGMA foreign_key_list({_quote(table)})")
+            }
+            columns = []
+            for _, name, col_type, _, _, pk in conn.execute(f"PRAGMA table_info({_quote(table)})"):
+                column = _describe_column(conn, table, name, col_type, bool(pk))
+                if name in foreign_keys:
+                    column += f" -> {foreign_keys[name]}"
+                columns.append(column)
+            lines.append(f"{table} ({rows} rows): " + "; ".join(columns))
+        return "\n".join(lines)
+    finally:
+        conn.close()
+
+
+def get_schema_digest(path: str) -> str:
+    """Return the cached digest for `path`, rebuilt only when the file's mtime changes."""
+    mtime = os.path.getmtime(path)
+    with _lock:
+        cached = _digests.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        digest = build_schema_digest(path)
+        _digests[path] = (mtime, digest)
+    logger.info(f"Built schema digest for {path} ({len(digest)} chars)")
+    return digest
+
+
+async def aget_schema_digest(path: str) -> str:
+    """Async get_schema_digest: a digest that must be (re)built is built in a worker thread."""
+    # No lock here: it is held while a digest is built and would block the event loop.
+    cached = _digests.get(path)
+    if cached and cached[0] == os.path.getmtime(path):
+        return cached[1]
+    return await asyncio.to_thread(get_schema_digest, path)
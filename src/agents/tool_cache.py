@@ -0,0 +1,162 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import Counter
+from functools import cache
+from typing import Any
+
+from langchain_core.tools import BaseTool, StructuredTool
+
+from core import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ToolResultCache:
+    """SQLite-backed cache of tool results with per-entry TTL and LRU eviction.
+
+    Entries are shared by every worker using the same file. When the table
+    grows past `max_entries`, the least recently used tenth is evicted.
+    """
+
+    def __init__(self, path: str, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS tool_cache (
+                key TEXT PRIMARY KEY,
+                tool TEXT NOT NULL,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS tool_cache_last_access ON tool_cache (last_access)"
+        )
+        self._counters: Counter[tuple[str, str]] = Counter()
+
+    @staticmethod
+    def make_key(tool: str, args: dict[str, Any]) -> str:
+        normalized = {
+            k: " ".join(v.lower().split()) if isinstance(v, str) else v for k, v in args.items()
+        }
+        payload = json.dumps([tool, normalized], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, tool: str, args: dict[str, Any]) -> str | None:
+        key = self.make_key(tool, args)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM tool_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._counters[(tool, "misses")] += 1
+                return None
+            value, expires_at = row
+            if expires_at <= now:
+                self._conn.execute("DELETE FROM tool_cache WHERE key = ?", (key,))
+                self._counters[(tool, "expired")] += 1
+                self._counters[(tool, "misses")] += 1
+                return None
+            self._conn.execute("UPDATE tool_cache SET last_access = ? WHERE key = ?", (now, key))
+            self._counters[(tool, "hits")] += 1
+            return value
+
+    def set(self, tool: str, args: dict[str, Any], value: str, ttl: float) -> None:
+        key = self.make_key(tool, args)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tool_cache VALUES (?, ?, ?, ?, ?)",
+                (key, tool, value, now + ttl, now),
+            )
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM tool_cache").fetchone()
+            if count > self.max_entries:
+                evict = count - self.max_entries + self.max_entries // 10
+                self._conn.execute("DELETE FROM tool_cache WHERE expires_at <= ?", (now,))
+                cur = self._conn.execute(
+                    "DELETE FROM tool_cache WHERE key IN "
+                    "(SELECT key FROM tool_cache ORDER BY last_access LIMIT ?)",
+                    (evict,),
+                )
+                self._counters[(tool, "evictions")] += cur.rowcount
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """Hit/miss counters per tool since process start."""
+        with self._lock:
+            counters = dict(self._counters)
+        tools = {tool for tool, _ in counters}
+        result = {}
+        for tool in sorted(tools):
+            hits = counters.get((tool, "hits"), 0)
+            misses = counters.get((tool, "misses"), 0)
+            result[tool] = {
+                "hits": hits,
+                "misses": misses,
+                "expired": counters.get((tool, "expired"), 0),
+                "evictions": counters.get((tool, "evictions"), 0),
+                "hit_ratio": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+            }
+        return result
+
+
+@cache
+def get_tool_cache() -> ToolResultCache:
+    return ToolResultCache(settings.TOOL_CACHE_PATH, settings.TOOL_CACHE_MAX_ENTRIES)
+
+
+def cached_tool(tool: BaseTool, ttl: float) -> BaseTool:
+    """Wrap `tool` so string results are served from the shared cache for `ttl` seconds.
+
+    The TTL can be overridden per tool name with `settings.TOOL_CACHE_TTLS`. Errors
+    are never cached. Returns `tool` unchanged when caching is disabled.
+    """
+    if not settings.TOOL_CACHE_ENABLED:
+        return tool
+    ttl = settings.TOOL_CACHE_TTLS.get(tool.name, ttl)
+
+    def store(args: dict[str, Any], result: Any) -> None:
+        if isinstance(result, str) and result:
+            try:
+                get_tool_cache().set(tool.name, args, result, ttl)
+            except sqlite3.Error as e:
+                logger.warning(f"Failed to cache {tool.name} result: {e}")
+
+    def lookup(args: dict[str, Any]) -> str | None:
+        try:
+            return get_tool_cache().get(tool.name, args)
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to read {tool.name} cache: {e}")
+            return None
+
+    def run(**kwargs: Any) -> Any:
+        if (hit := lookup(kwargs)) is not None:
+            return hit
+        result = tool.invoke(kwargs)
+        store(kwargs, result)
+        return result
+
+    async def arun(**kwargs: Any) -> Any:
+        if (hit := lookup(kwargs)) is not None:
+            return hit
+        result = await tool.ainvoke(kwargs)
+        store(kwargs, result)
+        return result
+
+    return StructuredTool.from_function(
+        func=run,
+        coroutine=arun,
+        name=tool.name,
+        description=tool.description,
+        args_schema=tool.args_schema,
+    )
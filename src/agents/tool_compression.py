@@ -0,0 +1,138 @@
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+
+from core.tokens import get_tokenizer
+
+# Short lines that look like labels or list items ("Title: ...", "[2] ...") are
+# kept whole: they carry the titles, links and dates the model cites.
+_HEADER = re.compile(r"^(\[\d+\]|[A-Z][A-Za-z ]{0,24}:)")
+_HEADER_CHARS = 160
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[A-Z0-9])")
+# Among equally relevant sentences, prefer the ones a page or result starts with.
+_LEAD_BONUS = 0.5
+_STOPWORDS = frozenset(
+    [
+        "a",
+        "an",
+        "and",
+        "are",
+        "as",
+        "at",
+        "be",
+        "by",
+        "for",
+        "from",
+        "has",
+        "have",
+        "how",
+        "in",
+        "is",
+        "it",
+        "its",
+        "of",
+        "on",
+        "or",
+        "that",
+        "the",
+        "this",
+        "to",
+        "was",
+        "were",
+        "what",
+        "when",
+        "where",
+        "which",
+        "who",
+        "why",
+        "with",
+    ]
+)
+GAP = "..."
+
+
+def _terms(text: str) -> set[str]:
+    return {t for t in re.findall(r"\w+", text.lower()) if t not in _STOPWORDS}
+
+
+def relevance(texts: list[str], query: str) -> list[float]:
+    """Score each of `texts` by the idf-weighted terms it shares with `query`."""
+    terms = [_terms(text) for text in texts]
+    df = Counter(t for text_terms in terms for t in text_terms)
+    idf = {t: math.log(1 + len(texts) / df[t]) for t in _terms(query) if df[t]}
+    return [sum(idf.get(t, 0.0) for t in text_terms) for text_terms in terms]
+
+
+@dataclass
+class _Unit:
+    line: int
+    text: str
+    header: bool
+    position: int = 0
+
+
+def _split(text: str) -> list[_Unit]:
+    units = []
+    for line_no, line in enumerate(text.splitlines()):
+        line = line.strip()
+        if not line:
+            continue
+        if len(line) <= _HEADER_CHARS and _HEADER.match(line):
+            units.append(_Unit(line_no, line, header=True))
+            continue
+        for position, sentence in enumerate(_SENTENCE_END.split(line)):
+            units.append(_Unit(line_no, sentence, False, position))
+    return units
+
+
+def _join(units: list[_Unit], keep: set[int]) -> str:
+    lines: list[str] = []
+    previous_line, gap = None, False
+    for i, unit in enumerate(units):
+        if i not in keep:
+            gap = True
+            continue
+        if unit.line != previous_line:
+            if gap and lines:
+                lines.append(GAP)
+            lines.append(unit.text)
+        else:
+            lines[-1] += f" {GAP} {unit.text}" if gap else f" {unit.text}"
+        previous_line, gap = unit.line, False
+    if gap and lines:
+        lines.append(GAP)
+    return "\n".join(lines)
+
+
+def compress_text(text: str, query: str, max_tokens: int, model_name: str | None = None) -> str:
+    """Shrink `text` to at most `max_tokens`, keeping what is relevant to `query`.
+
+    Text within the limit is returned unchanged. Otherwise header lines are
+    kept, the sentences sharing the most (idf-weighted) terms with `query` are
+    kept while they fit, and the result is cut hard if it is still too long.
+    Dropped stretches are marked with "...".
+    """
+    count = get_tokenizer(model_name)
+    if count(text) <= max_tokens:
+        return text
+
+    units = _split(text)
+    candidates = [i for i, u in enumerate(units) if not u.header]
+    scores = relevance([units[i].text for i in candidates], query)
+    score = {i: s + _LEAD_BONUS / (1 + units[i].position) for i, s in zip(candidates, scores)}
+
+    keep = {i for i, u in enumerate(units) if u.header}
+    budget = max_tokens - sum(count(units[i].text) + 1 for i in keep)
+    for i in sorted(candidates, key=lambda i: -score[i]):
+        cost = count(units[i].text) + 1
+        if cost <= budget:
+            keep.add(i)
+            budget -= cost
+
+    compressed = _join(units, keep)
+    # Headers alone can exceed the limit; cut to size, re-measuring after each cut.
+    while (tokens := count(compressed)) > max_tokens:
+        cut = max(int(len(compressed) * max_tokens / tokens) - len(GAP), 0)
+        compressed = compressed[:cut] + GAP
+    return compressed
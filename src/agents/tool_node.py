@@ -0,0 +1,241 @@
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolCall, ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import BaseTool
+
+from agents.tool_compression import compress_text
+from core import settings
+from core.resilience import TRANSIENT_ERRORS, CircuitOpenError, backoff_delay, get_breaker
+from core.tokens import get_tokenizer
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _ToolStats:
+    calls: int = 0
+    errors: int = 0
+    timeouts: int = 0
+    retries: int = 0
+    rejected: int = 0
+    compressed: int = 0
+    tokens_saved: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+
+
+_tool_stats: dict[str, _ToolStats] = {}
+
+
+def record_tool_latency(name: str, latency_ms: float, status: str) -> None:
+    stats = _tool_stats.setdefault(name, _ToolStats())
+    stats.calls += 1
+    stats.total_ms += latency_ms
+    stats.max_ms = max(stats.max_ms, latency_ms)
+    if status == "error":
+        stats.errors += 1
+    elif status == "timeout":
+        stats.timeouts += 1
+    elif status == "circuit_open":
+        stats.rejected += 1
+
+
+def tool_stats() -> dict[str, dict[str, Any]]:
+    """Per-tool call counts and latency, for the /metrics endpoint."""
+    return {
+        name: {
+            "calls": s.calls,
+            "errors": s.errors,
+            "timeouts": s.timeouts,
+            "retries": s.retries,
+            "rejected": s.rejected,
+            "compressed": s.compressed,
+            "tokens_saved": s.tokens_saved,
+            "avg_ms": round(s.total_ms / s.calls, 1) if s.calls else 0.0,
+            "max_ms": round(s.max_ms, 1),
+        }
+        for name, s in _tool_stats.items()
+    }
+
+
+def _tool_timeout(name: str, default: float | None) -> float:
+    if name in settings.TOOL_TIMEOUTS:
+        return settings.TOOL_TIMEOUTS[name]
+    return default if default is not None else settings.TOOL_TIMEOUT
+
+
+def _output_token_limit(name: str) -> int:
+    if not settings.TOOL_OUTPUT_COMPRESSION:
+        return 0
+    return settings.TOOL_OUTPUT_MAX_TOKENS_BY_TOOL.get(name, settings.TOOL_OUTPUT_MAX_TOKENS)
+
+
+def _last_question(messages: Sequence[Any]) -> str:
+    for message in reversed(messages):
+        if isinstance(message, HumanMessage):
+            return message.text()
+    return ""
+
+
+def compress_tool_message(message: ToolMessage, call: ToolCall, question: str) -> None:
+    """Cap a successful tool result at its output token limit, in place.
+
+    The result is filtered for relevance to the user's question and the call's
+    arguments, so later model and LlamaGuard calls re-send less text.
+    """
+    limit = _output_token_limit(message.name)
+    if not limit or message.status == "error" or not isinstance(message.content, str):
+        return
+    count = get_tokenizer()
+    before = count(message.content)
+    if before <= limit:
+        return
+    query = " ".join([question, *map(str, call["args"].values())])
+    message.content = compress_text(message.content, query, limit)
+    after = count(message.content)
+    stats = _tool_stats.setdefault(message.name, _ToolStats())
+    stats.compressed += 1
+    stats.tokens_saved += before - after
+    message.response_metadata = {**message.response_metadata, "compressed_from_tokens": before}
+    logger.info(f"Compressed {message.name} output from {before} to {after} tokens")
+
+
+async def _invoke_with_retries(tool: BaseTool, call: ToolCall, config: RunnableConfig) -> Any:
+    """Invoke `tool`, retrying transient errors with backoff unless it is non-idempotent."""
+    attempts = 1 if tool.name in settings.NON_IDEMPOTENT_TOOLS else settings.RETRY_MAX_ATTEMPTS
+    for attempt in range(max(attempts, 1)):
+        try:
+            return await tool.ainvoke({**call, "type": "tool_call"}, config)
+        except TRANSIENT_ERRORS as e:
+            if attempt >= attempts - 1:
+                raise
+            delay = backoff_delay(attempt)
+            _tool_stats.setdefault(tool.name, _ToolStats()).retries += 1
+            logger.info(f"Retrying tool {tool.name} after {e!r} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+
+def create_tool_node(
+    tools: Sequence[BaseTool],
+    *,
+    max_concurrency: int | None = None,
+    timeout: float | None = None,
+    compress: bool = True,
+) -> Callable[[dict[str, Any], RunnableConfig], Awaitable[dict[str, list[ToolMessage]]]]:
+    """Create a graph node that runs the last AIMessage's tool calls concurrently.
+
+    At most `max_concurrency` calls run at once and each call is bounded by its
+    per-tool timeout (`settings.TOOL_TIMEOUTS`, else `timeout`, else
+    `settings.TOOL_TIMEOUT`). A call that times out or fails yields an error
+    ToolMessage, so the results of the other calls are still returned. Latency
+    is recorded in each ToolMessage's response_metadata and in `tool_stats()`.
+
+    Transient errors (network and OS errors) are retried with jittered backoff
+    within the timeout, except for tools in `settings.NON_IDEMPOTENT_TOOLS`.
+    Each tool has a circuit breaker: after repeated failures or timeouts the
+    tool is reported as unavailable without being called.
+
+    With `compress`, results over `settings.TOOL_OUTPUT_MAX_TOKENS` (or the
+    tool's entry in `settings.TOOL_OUTPUT_MAX_TOKENS_BY_TOOL`) are shortened to
+    the sentences most relevant to the question; see `compress_tool_message`.
+
+    Sync tools run in a worker thread, which cannot be interrupted; on timeout
+    the thread finishes in the background and its result is discarded.
+    """
+    tools_by_name = {t.name: t for t in tools}
+
+    async def run_one(
+        call: ToolCall, semaphore: asyncio.Semaphore, config: RunnableConfig
+    ) -> ToolMessage:
+        name = call["name"]
+        tool = tools_by_name.get(name)
+        if tool is None:
+            return ToolMessage(
+                content=f"Error: {name} is not a valid tool, try one of {list(tools_by_name)}.",
+                name=name,
+                tool_call_id=call["id"],
+                status="error",
+            )
+
+        limit = _tool_timeout(name, timeout)
+        breaker = get_breaker(f"tool:{name}")
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                breaker.check()
+                message = await asyncio.wait_for(
+                    _invoke_with_retries(tool, call, config), timeout=limit
+                )
+                status = "success"
+                breaker.record_success()
+            except CircuitOpenError as e:
+                message = ToolMessage(
+                    content=f"Error: tool {name} is temporarily unavailable "
+                    f"(retry in {e.retry_after:.0f}s). Answer without it or use another tool.",
+                    name=name,
+                    tool_call_id=call["id"],
+                    status="error",
+                )
+                status = "circuit_open"
+            except TimeoutError:
+                breaker.record_failure()
+                message = ToolMessage(
+                    content=f"Error: tool {name} timed out after {limit:g}s. "
+                    "Answer with the results you have or try a narrower query.",
+                    name=name,
+                    tool_call_id=call["id"],
+                    status="error",
+                )
+                status = "timeout"
+            except Exception as e:
+                # Errors caused by bad arguments say nothing about the tool's health.
+                if isinstance(e, TRANSIENT_ERRORS):
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                message = ToolMessage(
+                    content=f"Error: {e!r}\n Please fix your mistakes.",
+                    name=name,
+                    tool_call_id=call["id"],
+                    status="error",
+                )
+                status = "error"
+            except BaseException:
+                # Cancelled, e.g. the client disconnected: no outcome to record.
+                breaker.release()
+                raise
+            latency_ms = (time.perf_counter() - start) * 1000
+
+        record_tool_latency(name, latency_ms, status)
+        logger.debug(f"Tool {name} finished with status {status} in {latency_ms:.1f} ms")
+        message.response_metadata = {
+            **message.response_metadata,
+            "latency_ms": round(latency_ms, 1),
+            "timed_out": status == "timeout",
+        }
+        return message
+
+    async def tool_node(
+        state: dict[str, Any], config: RunnableConfig
+    ) -> dict[str, list[ToolMessage]]:
+        last_message = state["messages"][-1]
+        if not isinstance(last_message, AIMessage):
+            raise TypeError(f"Expected AIMessage, got {type(last_message)}")
+
+        semaphore = asyncio.Semaphore(max_concurrency or settings.TOOL_MAX_CONCURRENCY)
+        results = await asyncio.gather(
+            *(run_one(call, semaphore, config) for call in last_message.tool_calls)
+        )
+        if compress:
+            question = _last_question(state["messages"])
+            for call, message in zip(last_message.tool_calls, results):
+                compress_tool_message(message, call, question)
+        return {"messages": list(results)}
+
+    return tool_node
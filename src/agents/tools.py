@@ -1,42 +1,107 @@
 import math
 import re
+import threading
+from functools import lru_cache
 
 import numexpr
+import numpy as np
 from langchain_chroma import Chroma
 from langchain_core.tools import BaseTool, tool
 from langchain_openai import OpenAIEmbeddings
 
-
-def calculator_func(expression: str) -> str:
-    """Calculates a math expression using numexpr.
+# Largest array the calculator will allocate, counting inputs and results.
+CALCULATOR_MAX_ELEMENTS = 1_000_000
+CALCULATOR_MAX_EXPRESSIONS = 50
+_CONSTANTS = {"pi": math.pi, "e": math.e}
+_VARIABLE_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+# numexpr's virtual machine is not safe to enter from several threads at once.
+_numexpr_lock = threading.Lock()
+
+
+@lru_cache(maxsize=256)
+def _compile(expression: str) -> numexpr.NumExpr:
+    """Parse and compile `expression` once; every variable is treated as float64."""
+    names, _ = numexpr.necompiler.getExprNames(expression, {})
+    return numexpr.NumExpr(expression, signature=[(name, np.float64) for name in names])
+
+
+def _evaluate(expression: str, arrays: dict[str, np.ndarray]) -> np.ndarray:
+    compiled = _compile(expression.strip())
+    missing = [name for name in compiled.input_names if name not in arrays]
+    if missing:
+        raise ValueError(f"unknown variable(s): {', '.join(missing)}")
+    args = [arrays[name] for name in compiled.input_names]
+    shape = np.broadcast_shapes(*(a.shape for a in args)) if args else ()
+    if math.prod(shape) > CALCULATOR_MAX_ELEMENTS:
+        raise ValueError(f"result would have more than {CALCULATOR_MAX_ELEMENTS} elements")
+    with _numexpr_lock:
+        return compiled(*args)
+
+
+def _format(result: np.ndarray) -> str:
+    result = np.asarray(result)
+    if result.ndim == 0:
+        return str(result.item())
+    output = np.array2string(result, threshold=200, separator=", ")
+    return re.sub(r"^\[|\]$", "", output)
+
+
+def calculator_func(
+    expression: str = "",
+    expressions: list[str] | None = None,
+    variables: dict[str, float | list[float]] | None = None,
+) -> str:
+    """Calculates math expressions using numexpr.
 
     Useful for when you need to answer questions about math using numexpr.
     This tool is only for math questions and nothing else. Only input
-    math expressions.
+    math expressions. To do several calculations at once, pass them all in
+    `expressions`; to compute over a table of numbers, pass each column as a
+    named list in `variables` and refer to it by name, e.g. expressions
+    ["price * qty", "sum(price * qty)"] with variables {"price": [...], "qty": [...]}.
+    `pi` and `e` are always available.
 
     Args:
         expression (str): A valid numexpr formatted math expression.
+        expressions (list[str]): Several expressions to evaluate in one call.
+        variables (dict): Named numbers or lists of numbers used by the expressions.
 
     Returns:
-        str: The result of the math expression.
+        str: The result of each expression, one per line for a batch.
     """
-
-    try:
-        local_dict = {"pi": math.pi, "e": math.e}
-        output = str(
-            numexpr.evaluate(
-                expression.strip(),
-                global_dict={},
-                local_dict=local_dict,
-            )
+    batch = list(expressions or [])
+    if expression.strip():
+        batch.insert(0, expression)
+    if not batch:
+        raise ValueError("calculator() needs an expression. Please provide one.")
+    if len(batch) > CALCULATOR_MAX_EXPRESSIONS:
+        raise ValueError(
+            f"calculator() accepts at most {CALCULATOR_MAX_EXPRESSIONS} expressions per call."
         )
-        return re.sub(r"^\[|\]$", "", output)
-    except Exception as e:
+
+    arrays = {name: np.asarray(value, dtype=np.float64) for name, value in _CONSTANTS.items()}
+    for name, value in (variables or {}).items():
+        if not _VARIABLE_NAME.match(name):
+            raise ValueError(f"calculator() variable name {name!r} is not a valid identifier.")
+        arrays[name] = np.asarray(value, dtype=np.float64)
+    if sum(a.size for a in arrays.values()) > CALCULATOR_MAX_ELEMENTS:
         raise ValueError(
-            f'calculator("{expression}") raised error: {e}.'
-            " Please try again with a valid numerical expression"
+            f"calculator() variables may hold at most {CALCULATOR_MAX_ELEMENTS} numbers in total."
         )
 
+    results = []
+    for item in batch:
+        try:
+            results.append(_format(_evaluate(item, arrays)))
+        except Exception as e:
+            raise ValueError(
+                f'calculator("{item}") raised error: {e}.'
+                " Please try again with a valid numerical expression"
+            )
+    if len(batch) == 1:
+        return results[0]
+    return "\n".join(f"{item} = {result}" for item, result in zip(batch, results))
+
 
 calculator: BaseTool = tool(calculator_func)
 calculator.name = "Calculator"
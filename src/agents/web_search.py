@@ -0,0 +1,121 @@
+"""MultiWebSearch: several DuckDuckGo queries per tool call, merged and deduplicated.
+
+Searches go through langchain's DuckDuckGoSearchAPIWrapper, which opens a new
+duckduckgo_search session on its own primp client for every call. Unlike the
+LLM providers, they therefore do not use a shared httpx client from core.http:
+connections are not reused across searches and do not appear in the http_pools
+metrics. The original plan to share one client was dropped when the
+hand-written scraper of DuckDuckGo's HTML page was replaced by the wrapper,
+which raises on rate limits and bot checks instead of returning no results.
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+from urllib.parse import urlsplit, urlunsplit
+
+from langchain_community.utilities import DuckDuckGoSearchAPIWrapper
+from langchain_core.tools import BaseTool, tool
+
+from agents.tool_cache import get_tool_cache
+from core import settings
+
+logger = logging.getLogger(__name__)
+
+MAX_QUERIES = 5
+RESULTS_PER_QUERY = 5
+MAX_SNIPPET_CHARS = 200
+# Concurrent requests to DuckDuckGo from one tool call; more get throttled.
+_MAX_CONCURRENT_REQUESTS = 3
+_CACHE_NAME = "MultiWebSearch"
+_CACHE_TTL = 15 * 60
+
+# The wrapper raises on rate limits and bot checks instead of returning no results.
+_ddgs = DuckDuckGoSearchAPIWrapper(time=None)
+
+
+def normalize_url(url: str) -> str:
+    """Key for deduplication: lowercase host, no fragment, tracking params or trailing '/'."""
+    parts = urlsplit(url)
+    query = "&".join(
+        p for p in parts.query.split("&") if p and not p.startswith(("utm_", "fbclid=", "gclid="))
+    )
+    host = parts.netloc.lower().removeprefix("www.")
+    return urlunsplit(("", host, parts.path.rstrip("/"), query, ""))
+
+
+async def _search(query: str, semaphore: asyncio.Semaphore) -> list[dict[str, str]]:
+    cache = get_tool_cache() if settings.TOOL_CACHE_ENABLED else None
+    if cache is not None:
+        try:
+            if (hit := cache.get(_CACHE_NAME, {"query": query})) is not None:
+                return json.loads(hit)
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to read {_CACHE_NAME} cache: {e}")
+
+    async with semaphore:
+        found = await asyncio.to_thread(_ddgs.results, query, RESULTS_PER_QUERY)
+    results = [
+        {"title": r["title"], "url": r["link"], "snippet": r["snippet"]}
+        for r in found
+        if r.get("link", "").startswith("http")
+    ]
+
+    if cache is not None and results:
+        try:
+            ttl = settings.TOOL_CACHE_TTLS.get(_CACHE_NAME, _CACHE_TTL)
+            cache.set(_CACHE_NAME, {"query": query}, json.dumps(results), ttl)
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to cache {_CACHE_NAME} result: {e}")
+    return results
+
+
+def merge_results(queries: list[str], per_query: list[list[dict[str, str]] | Exception]) -> str:
+    """Merge per-query results into one compact list, keeping each URL once."""
+    merged: dict[str, dict[str, str]] = {}
+    failed = []
+    for query, results in zip(queries, per_query):
+        if isinstance(results, Exception):
+            failed.append(f"{query!r} ({results.__class__.__name__})")
+            continue
+        for result in results:
+            merged.setdefault(normalize_url(result["url"]), result)
+    lines = []
+    for i, entry in enumerate(merged.values(), start=1):
+        snippet = " ".join(entry.get("snippet", "").split())[:MAX_SNIPPET_CHARS]
+        title = " ".join(entry["title"].split())
+        lines.append(f"[{i}] {title} - {entry['url']}\n{snippet}")
+    if failed:
+        lines.append(f"Search failed for: {', '.join(failed)}")
+    return "\n\n".join(lines) or "No results found."
+
+
+async def multi_web_search_func(queries: list[str]) -> str:
+    """Searches the web with DuckDuckGo for several queries at once.
+
+    Use this to research a topic from several angles in one step instead of
+    searching one query at a time. Results for all queries are merged, and each
+    page appears once.
+
+    Args:
+        queries (list[str]): Up to 5 distinct search queries.
+
+    Returns:
+        str: Numbered results with title, URL and snippet.
+    """
+    queries = list(dict.fromkeys(q.strip() for q in queries if q.strip()))[:MAX_QUERIES]
+    if not queries:
+        raise ValueError("MultiWebSearch needs at least one query.")
+    semaphore = asyncio.Semaphore(_MAX_CONCURRENT_REQUESTS)
+    per_query = await asyncio.gather(
+        *(_search(q, semaphore) for q in queries), return_exceptions=True
+    )
+    if all(isinstance(r, Exception) for r in per_query):
+        # Let the tool node report (and retry) a failure of the search service.
+        raise per_query[0]
+    return merge_results(queries, per_query)
+
+
+multi_web_search: BaseTool = tool(multi_web_search_func)
+multi_web_search.name = "MultiWebSearch"
@@ -0,0 +1,138 @@
+import mmap
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter
+
+from langchain_core.tools import BaseTool, StructuredTool
+
+from agents.tool_cache import cached_tool
+from core import settings
+from core.settings import WikipediaBackend
+
+# Same limits as langchain's WikipediaAPIWrapper, so both backends answer alike.
+TOP_K_RESULTS = 3
+MAX_QUERY_LENGTH = 300
+MAX_OUTPUT_CHARS = 4000
+NO_RESULTS = "No good Wikipedia Search Result was found"
+INDEX_FILE = "index.db"
+STORE_FILE = "articles.bin"
+# bm25 column weights for title and text.
+_SEARCH_SQL = """
+    SELECT a.rowid, a.title, a.offset, a.length
+    FROM articles_fts JOIN articles a ON a.rowid = articles_fts.rowid
+    WHERE articles_fts MATCH ?
+    ORDER BY bm25(articles_fts, 10.0, 1.0)
+    LIMIT ?
+"""
+
+_counters: Counter[str] = Counter()
+
+
+def _fts_query(query: str, operator: str) -> str:
+    # Quote every term so user input can never be read as FTS5 syntax.
+    terms = re.findall(r"\w+", query.lower())
+    return f" {operator} ".join(f'"{t}"' for t in terms)
+
+
+class WikipediaIndex:
+    """Local Wikipedia search built by scripts/build_wikipedia_index.py.
+
+    `index.db` holds an FTS5 index over page titles and text plus each page's
+    offset and length in `articles.bin`, which stores the text itself and is
+    memory-mapped, so a lookup reads pages straight from the page cache.
+    """
+
+    def __init__(self, directory: str) -> None:
+        index_path = os.path.join(directory, INDEX_FILE)
+        if not os.path.exists(index_path):
+            raise FileNotFoundError(
+                f"No Wikipedia index in {directory}; build one with "
+                "scripts/build_wikipedia_index.py or set WIKIPEDIA_BACKEND=api"
+            )
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            f"file:{index_path}?mode=ro", uri=True, check_same_thread=False
+        )
+        with open(os.path.join(directory, STORE_FILE), "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            # mmap refuses empty files; an empty index has nothing to read anyway.
+            self._store = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def _fetch(self, sql: str, params: tuple) -> list[tuple[int, str, int, int]]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def search(self, query: str, k: int = TOP_K_RESULTS) -> list[tuple[str, str]]:
+        """Return (title, text) of up to `k` pages for `query`.
+
+        A page whose title is the query comes first, then pages matching every
+        term, then pages matching any term, each ranked by bm25.
+        """
+        query = query[:MAX_QUERY_LENGTH]
+        rows = self._fetch(
+            "SELECT rowid, title, offset, length FROM articles WHERE title_key = ? LIMIT ?",
+            (" ".join(query.lower().split()), k),
+        )
+        for operator in ("AND", "OR"):
+            if len(rows) >= k or not (fts_query := _fts_query(query, operator)):
+                break
+            seen = {row[0] for row in rows}
+            rows += [row for row in self._fetch(_SEARCH_SQL, (fts_query, k)) if row[0] not in seen]
+        return [
+            (title, self._store[offset : offset + length].decode("utf-8"))
+            for _, title, offset, length in rows[:k]
+        ]
+
+
+def format_pages(pages: list[tuple[str, str]]) -> str:
+    """Format pages the way WikipediaAPIWrapper.run does."""
+    summaries = [f"Page: {title}\nSummary: {text}" for title, text in pages]
+    return "\n\n".join(summaries)[:MAX_OUTPUT_CHARS] if summaries else NO_RESULTS
+
+
+def wikipedia_stats() -> dict[str, int]:
+    """Lookups and misses of the local Wikipedia backend, for /metrics."""
+    return {k: _counters[k] for k in ("lookups", "misses")}
+
+
+def create_wikipedia_tool() -> BaseTool:
+    """Build the `Wikipedia` tool for `settings.WIKIPEDIA_BACKEND`.
+
+    `api` is the cached WikipediaQueryRun tool. `local` answers from the index
+    in `settings.WIKIPEDIA_INDEX_DIR` with the same input and output format and
+    never touches the network.
+    """
+    if settings.WIKIPEDIA_BACKEND == WikipediaBackend.API:
+        from langchain_community.tools import WikipediaQueryRun
+        from langchain_community.utilities.wikipedia import WikipediaAPIWrapper
+
+        return cached_tool(
+            WikipediaQueryRun(api_wrapper=WikipediaAPIWrapper(), name="Wikipedia"),
+            ttl=24 * 60 * 60,
+        )
+
+    index = WikipediaIndex(settings.WIKIPEDIA_INDEX_DIR)
+
+    def run(query: str) -> str:
+        pages = index.search(query)
+        _counters["lookups"] += 1
+        if not pages:
+            _counters["misses"] += 1
+        return format_pages(pages)
+
+    async def arun(query: str) -> str:
+        # Lookups take well under a millisecond; a worker thread would cost more.
+        return run(query)
+
+    return StructuredTool.from_function(
+        func=run,
+        coroutine=arun,
+        name="Wikipedia",
+        description=(
+            "A wrapper around Wikipedia. Useful for when you need to answer general "
+            "questions about people, places, companies, facts, historical events, or "
+            "other subjects. Input should be a search query."
+        ),
+    )
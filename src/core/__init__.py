@@ -1,4 +1,4 @@
-from core.llm import get_model
+from core.llm import get_model, get_model_for_config
 from core.settings import settings
 
-__all__ = ["settings", "get_model"]
+__all__ = ["settings", "get_model", "get_model_for_config"]
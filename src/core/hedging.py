@@ -0,0 +1,160 @@
+import asyncio
+import logging
+from collections import Counter
+from collections.abc import AsyncIterator, Awaitable, Callable, Sequence
+from typing import Any
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun
+from langchain_core.language_models import LanguageModelInput
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import Runnable, RunnableConfig
+from pydantic import ConfigDict
+
+logger = logging.getLogger(__name__)
+
+_hedge_counters: Counter[str] = Counter()
+
+# Inner calls must not report to the caller's callbacks, otherwise the losing
+# model's tokens would be streamed to the client alongside the winner's.
+_INNER_CONFIG = RunnableConfig(callbacks=[])
+
+
+def hedge_stats() -> dict[str, Any]:
+    requests = _hedge_counters["requests"]
+    fired = _hedge_counters["hedges_fired"]
+    return {
+        "requests": requests,
+        "hedges_fired": fired,
+        "hedge_wins": _hedge_counters["hedge_wins"],
+        "fire_rate": round(fired / requests, 3) if requests else 0.0,
+        "win_rate": round(_hedge_counters["hedge_wins"] / fired, 3) if fired else 0.0,
+    }
+
+
+async def _cancel(task: asyncio.Task | None, stream: AsyncIterator | None = None) -> None:
+    if task is not None and not task.done():
+        task.cancel()
+        try:
+            await task
+        except BaseException:
+            pass
+    if stream is not None and hasattr(stream, "aclose"):
+        try:
+            await stream.aclose()
+        except Exception:
+            pass
+
+
+def _as_generation_chunk(chunk: BaseMessage) -> ChatGenerationChunk:
+    if not isinstance(chunk, AIMessageChunk):
+        chunk = AIMessageChunk(content=chunk.content)
+    return ChatGenerationChunk(message=chunk)
+
+
+class HedgedChatModel(BaseChatModel):
+    """Send a request to `primary`, and also to `secondary` if `primary` is slow.
+
+    If the primary has not produced its first token (or, without streaming, its
+    response) within `hedge_after` seconds, the same request is sent to the
+    secondary. Whichever answers first is used and the other call is cancelled.
+    If one call fails, the other one's result is used.
+    """
+
+    model_config = ConfigDict(protected_namespaces=())
+
+    primary: Runnable[LanguageModelInput, BaseMessage]
+    secondary: Runnable[LanguageModelInput, BaseMessage]
+    hedge_after: float = 1.5
+    model_name: str | None = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "hedged-chat-model"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> "HedgedChatModel":
+        return self.model_copy(
+            update={
+                "primary": self.primary.bind_tools(tools, **kwargs),
+                "secondary": self.secondary.bind_tools(tools, **kwargs),
+            }
+        )
+
+    async def _race(
+        self,
+        start_primary: Callable[[], Awaitable[Any]],
+        start_secondary: Callable[[], Awaitable[Any]],
+    ) -> tuple[Any, asyncio.Task | None, str | None, str]:
+        """Run the hedged race and return (result, loser_task, loser_label, winner_label)."""
+        _hedge_counters["requests"] += 1
+        primary_task = asyncio.ensure_future(start_primary())
+        done, _ = await asyncio.wait({primary_task}, timeout=self.hedge_after)
+        if done and primary_task.exception() is None:
+            return primary_task.result(), None, None, "primary"
+
+        _hedge_counters["hedges_fired"] += 1
+        secondary_task = asyncio.ensure_future(start_secondary())
+        tasks = {primary_task: "primary", secondary_task: "secondary"}
+        pending = {t for t in tasks if not t.done()} or set(tasks)
+        error: BaseException | None = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    error = task.exception()
+                    continue
+                loser = next((t for t in tasks if t is not task), None)
+                if tasks[task] == "secondary":
+                    _hedge_counters["hedge_wins"] += 1
+                return task.result(), loser, tasks.get(loser), tasks[task]
+        assert error is not None
+        raise error
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        def call(model: Runnable):
+            return lambda: model.ainvoke(messages, _INNER_CONFIG, stop=stop, **kwargs)
+
+        message, loser, _, winner = await self._race(call(self.primary), call(self.secondary))
+        await _cancel(loser)
+        logger.debug(f"Hedged request answered by {winner}")
+        if not isinstance(message, AIMessage):
+            message = AIMessage(content=message.content)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        streams: dict[str, AsyncIterator] = {}
+
+        def first_chunk(label: str, model: Runnable):
+            async def start():
+                streams[label] = model.astream(messages, _INNER_CONFIG, stop=stop, **kwargs)
+                return await anext(streams[label])
+
+            return start
+
+        first, loser, loser_label, winner = await self._race(
+            first_chunk("primary", self.primary), first_chunk("secondary", self.secondary)
+        )
+        await _cancel(loser, streams.get(loser_label) if loser_label else None)
+        logger.debug(f"Hedged stream served by {winner}")
+
+        yield _as_generation_chunk(first)
+        async for chunk in streams[winner]:
+            yield _as_generation_chunk(chunk)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        # Hedging needs concurrency; synchronous callers just use the primary.
+        message = self.primary.invoke(messages, _INNER_CONFIG, stop=stop, **kwargs)
+        return ChatResult(generations=[ChatGeneration(message=message)])
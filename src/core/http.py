@@ -0,0 +1,157 @@
+import asyncio
+import logging
+from typing import Any
+
+import httpx
+
+from core.rate_limit import RateLimitedAsyncTransport, RateLimitedTransport
+from core.resilience import (
+    RETRY_STATUSES,
+    ResilientAsyncTransport,
+    ResilientTransport,
+    get_breaker,
+)
+from core.settings import settings
+from schema.models import Provider
+
+logger = logging.getLogger(__name__)
+
+# Endpoints used to open (and keep alive) a TLS connection per provider at startup.
+_WARM_UP_URLS = {
+    Provider.OPENAI: "https://api.openai.com/v1/models",
+    Provider.GROQ: "https://api.groq.com/openai/v1/models",
+}
+
+_sync_clients: dict[Provider, httpx.Client] = {}
+_async_clients: dict[Provider, httpx.AsyncClient] = {}
+
+
+def _http2() -> bool:
+    if not settings.HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.warning("HTTP2 is enabled but the 'h2' package is not installed; using HTTP/1.1")
+        return False
+    return True
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+    )
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(settings.HTTP_TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT)
+
+
+def client_kwargs() -> dict[str, Any]:
+    """Keyword arguments for an httpx client tuned by the HTTP_* settings."""
+    return {"limits": _limits(), "http2": _http2(), "timeout": _timeout()}
+
+
+def _retry_statuses() -> frozenset[int]:
+    # With quotas, 429s are already waited out (and retried) by the rate limiter.
+    return RETRY_STATUSES - {429} if settings.RATE_LIMITS else RETRY_STATUSES
+
+
+def get_http_client(provider: Provider) -> httpx.Client:
+    """Return the shared sync client for `provider`.
+
+    Requests go through the rate limiter of their model, if it has quotas, and
+    are retried on transient errors behind the provider's circuit breaker.
+    """
+    if provider not in _sync_clients:
+        transport: httpx.BaseTransport = httpx.HTTPTransport(limits=_limits(), http2=_http2())
+        if settings.RATE_LIMITS:
+            transport = RateLimitedTransport(transport)
+        transport = ResilientTransport(
+            transport, get_breaker(f"provider:{provider.value}"), _retry_statuses()
+        )
+        _sync_clients[provider] = httpx.Client(transport=transport, timeout=_timeout())
+    return _sync_clients[provider]
+
+
+def get_async_http_client(provider: Provider) -> httpx.AsyncClient:
+    """Return the shared async client for `provider`, set up like get_http_client."""
+    if provider not in _async_clients:
+        transport: httpx.AsyncBaseTransport = httpx.AsyncHTTPTransport(
+            limits=_limits(), http2=_http2()
+        )
+        if settings.RATE_LIMITS:
+            transport = RateLimitedAsyncTransport(transport)
+        transport = ResilientAsyncTransport(
+            transport, get_breaker(f"provider:{provider.value}"), _retry_statuses()
+        )
+        _async_clients[provider] = httpx.AsyncClient(transport=transport, timeout=_timeout())
+    return _async_clients[provider]
+
+
+def _base_transport(client: httpx.Client | httpx.AsyncClient) -> Any:
+    """The HTTP transport under any wrapping (rate limiting, retry) transports."""
+    transport = getattr(client, "_transport", None)
+    while transport is not None and not hasattr(transport, "_pool"):
+        transport = getattr(transport, "_transport", None)
+    return transport
+
+
+async def warm_up_pools() -> None:
+    """Open a connection to each configured provider so the first request skips TLS setup.
+
+    The warm-up requests go straight to the connection pool, past the retry
+    and rate-limiting transports: a failure is only logged, it does not count
+    against the provider's circuit breaker or quota.
+    """
+    targets = []
+    if settings.OPENAI_API_KEY:
+        targets.append(Provider.OPENAI)
+    if settings.GROQ_API_KEY:
+        targets.append(Provider.GROQ)
+
+    async def warm(provider: Provider) -> None:
+        client = get_async_http_client(provider)
+        request = client.build_request("HEAD", _WARM_UP_URLS[provider], timeout=5.0)
+        try:
+            response = await _base_transport(client).handle_async_request(request)
+            await response.aclose()
+        except httpx.HTTPError as e:
+            logger.warning(f"Could not warm {provider} connection pool: {e}")
+
+    await asyncio.gather(*(warm(p) for p in targets))
+
+
+async def close_pools() -> None:
+    for client in _async_clients.values():
+        await client.aclose()
+    for sync_client in _sync_clients.values():
+        sync_client.close()
+    _async_clients.clear()
+    _sync_clients.clear()
+
+
+def _pool_stats(client: httpx.Client | httpx.AsyncClient) -> dict[str, int]:
+    # httpx does not expose pool state publicly.
+    pool = getattr(_base_transport(client), "_pool", None)
+    connections = list(getattr(pool, "connections", []))
+    idle = sum(1 for c in connections if c.is_idle())
+    return {
+        "connections": len(connections),
+        "active": len(connections) - idle,
+        "idle": idle,
+        "queued_requests": len(getattr(pool, "_requests", [])),
+        "max_connections": settings.HTTP_MAX_CONNECTIONS,
+    }
+
+
+def pool_stats() -> dict[str, dict[str, dict[str, int]]]:
+    """Connection pool utilization for every provider client created so far."""
+    stats: dict[str, dict[str, dict[str, int]]] = {}
+    for provider, client in _sync_clients.items():
+        stats.setdefault(provider.value, {})["sync"] = _pool_stats(client)
+    for provider, async_client in _async_clients.items():
+        stats.setdefault(provider.value, {})["async"] = _pool_stats(async_client)
+    return stats
@@ -1,16 +1,22 @@
-from functools import cache
-from typing import TypeAlias
+import threading
+from collections import OrderedDict
+from collections.abc import Sequence
+from typing import Any, TypeAlias
 
+from langchain_core.runnables import RunnableConfig
 from langchain_groq import ChatGroq
 from langchain_ollama import ChatOllama
 from langchain_openai import ChatOpenAI
 
+from core.hedging import HedgedChatModel
+from core.http import client_kwargs, get_async_http_client, get_http_client
 from core.settings import settings
 from schema.models import (
     AllModelEnum,
     GroqModelName,
     OllamaModelName,
     OpenAIModelName,
+    Provider,
 )
 
 _MODEL_TABLE = (
@@ -19,32 +25,161 @@ _MODEL_TABLE = (
     | {m: m.value for m in OllamaModelName}
 )
 
+
+def api_model_name(model_name: AllModelEnum) -> str | None:
+    """The model id sent to the provider (its `ls_model_name`), or None if it cannot be built."""
+    if model_name in OllamaModelName:
+        return settings.OLLAMA_MODEL
+    return _MODEL_TABLE.get(model_name)
+
+
 ModelT: TypeAlias = (
     ChatOpenAI
     | ChatGroq
     | ChatOllama
 )
 
+DEFAULT_TEMPERATURE = 0.5
+GENERATION_PARAMS = ("temperature", "max_tokens", "stop")
+
+GenerationKey: TypeAlias = tuple[float | None, int | None, tuple[str, ...] | None]
+
 
-@cache
-def get_model(model_name: AllModelEnum, /) -> ModelT:
+def normalize_generation_params(
+    temperature: float | None = None,
+    max_tokens: int | None = None,
+    stop: Sequence[str] | None = None,
+) -> GenerationKey:
+    """Validate generation parameters and return them in a hashable, canonical form."""
+    if temperature is not None:
+        temperature = round(float(temperature), 2)
+        if not 0.0 <= temperature <= 2.0:
+            raise ValueError("temperature must be between 0 and 2")
+    if max_tokens is not None:
+        if isinstance(max_tokens, bool) or int(max_tokens) != max_tokens or max_tokens < 1:
+            raise ValueError("max_tokens must be a positive integer")
+        max_tokens = int(max_tokens)
+    if stop is not None:
+        if isinstance(stop, str):
+            stop = [stop]
+        if len(stop) > 4 or not all(isinstance(s, str) and s for s in stop):
+            raise ValueError("stop must be a list of at most 4 non-empty strings")
+        stop = tuple(sorted(set(stop)))
+    return temperature, max_tokens, stop
+
+
+def _build_model(model_name: AllModelEnum, params: GenerationKey) -> ModelT:
     api_model_name = _MODEL_TABLE.get(model_name)
     if not api_model_name:
         raise ValueError(f"Unsupported model: {model_name}")
 
+    temperature, max_tokens, stop = params
+    if temperature is None:
+        temperature = 0.0 if model_name == GroqModelName.LLAMA_GUARD_4_12B else DEFAULT_TEMPERATURE
+    stop_list = list(stop) if stop else None
+
     if model_name in OpenAIModelName:
-        return ChatOpenAI(model=api_model_name, temperature=0.5, streaming=True)
+        return ChatOpenAI(
+            model=api_model_name,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stop=stop_list,
+            streaming=True,
+            http_client=get_http_client(Provider.OPENAI),
+            http_async_client=get_async_http_client(Provider.OPENAI),
+            # Retries happen in the shared transport, behind the circuit breaker.
+            max_retries=0,
+        )
     if model_name in GroqModelName:
-        if getattr(model_name, 'LLAMA_GUARD_4_12B', None) and model_name == GroqModelName.LLAMA_GUARD_4_12B:
-            return ChatGroq(model=api_model_name, temperature=0.0)
-        return ChatGroq(model=api_model_name, temperature=0.5)
+        return ChatGroq(
+            model=api_model_name,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stop=stop_list,
+            http_client=get_http_client(Provider.GROQ),
+            http_async_client=get_async_http_client(Provider.GROQ),
+            # Retries happen in the shared transport, behind the circuit breaker.
+            max_retries=0,
+        )
     if model_name in OllamaModelName:
+        kwargs: dict[str, Any] = {}
         if settings.OLLAMA_BASE_URL:
-            return ChatOllama(
-                model=settings.OLLAMA_MODEL,
-                temperature=0.5,
-                base_url=settings.OLLAMA_BASE_URL,
-            )
-        return ChatOllama(model=settings.OLLAMA_MODEL, temperature=0.5)
+            kwargs["base_url"] = settings.OLLAMA_BASE_URL
+        return ChatOllama(
+            model=settings.OLLAMA_MODEL,
+            temperature=temperature,
+            num_predict=max_tokens,
+            stop=stop_list,
+            # The ollama SDK builds its own httpx clients; tune them the same way.
+            client_kwargs=client_kwargs(),
+            **kwargs,
+        )
 
     raise ValueError(f"Unsupported model: {model_name}")
+
+
+def _create_model(model_name: AllModelEnum, params: GenerationKey) -> ModelT | HedgedChatModel:
+    model = _build_model(model_name, params)
+    secondary = settings.HEDGE_MODELS.get(model_name)
+    if settings.HEDGE_ENABLED and secondary in settings.AVAILABLE_MODELS:
+        return HedgedChatModel(
+            primary=model,
+            secondary=_build_model(secondary, params),
+            hedge_after=settings.HEDGE_AFTER_SECONDS,
+            model_name=_MODEL_TABLE[model_name],
+        )
+    return model
+
+
+_model_cache: OrderedDict[tuple[Any, ...], ModelT | HedgedChatModel] = OrderedDict()
+_model_cache_lock = threading.Lock()
+_model_cache_counters = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+def get_model(
+    model_name: AllModelEnum,
+    /,
+    *,
+    temperature: float | None = None,
+    max_tokens: int | None = None,
+    stop: Sequence[str] | None = None,
+) -> ModelT | HedgedChatModel:
+    """Return the cached client for `model_name` and the given generation parameters.
+
+    Clients are cached in a bounded LRU keyed by the model and the normalized
+    parameters, so requests with the same settings share one client. When hedging is
+    enabled and `settings.HEDGE_MODELS` names an available secondary for this model,
+    the client is wrapped in a HedgedChatModel.
+    """
+    params = normalize_generation_params(temperature, max_tokens, stop)
+    key = (model_name, *params)
+    with _model_cache_lock:
+        if (model := _model_cache.get(key)) is not None:
+            _model_cache.move_to_end(key)
+            _model_cache_counters["hits"] += 1
+            return model
+
+    model = _create_model(model_name, params)
+    with _model_cache_lock:
+        model = _model_cache.setdefault(key, model)
+        _model_cache_counters["misses"] += 1
+        while len(_model_cache) > settings.MODEL_CLIENT_CACHE_SIZE:
+            _model_cache.popitem(last=False)
+            _model_cache_counters["evictions"] += 1
+    return model
+
+
+def get_model_for_config(config: RunnableConfig, **defaults: Any) -> ModelT | HedgedChatModel:
+    """Return the model requested in `config`, with any generation parameters it sets.
+
+    `defaults` are generation parameters used when the request does not set them,
+    e.g. an agent that wants deterministic output by default passes temperature=0.
+    """
+    configurable = config.get("configurable", {})
+    params = {k: configurable[k] for k in GENERATION_PARAMS if configurable.get(k) is not None}
+    return get_model(configurable.get("model") or settings.DEFAULT_MODEL, **(defaults | params))
+
+
+def model_cache_stats() -> dict[str, int]:
+    with _model_cache_lock:
+        return {**_model_cache_counters, "size": len(_model_cache)}
@@ -0,0 +1,249 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any
+
+import httpx
+
+from core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Completion tokens assumed for a request that does not set max_tokens.
+DEFAULT_COMPLETION_TOKENS = 512
+_MAX_429_RETRIES = 3
+
+
+class TokenBucket:
+    """A token bucket refilled at `rate_per_minute`, holding at most one minute of tokens.
+
+    `reserve` takes tokens immediately, letting the balance go negative, and returns
+    how long the caller must wait for its reservation to be covered. Callers are thus
+    served in the order they reserved.
+    """
+
+    def __init__(self, rate_per_minute: float) -> None:
+        self.capacity = float(rate_per_minute)
+        self.rate = rate_per_minute / 60.0
+        self._balance = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._balance = min(self.capacity, self._balance + (now - self._updated) * self.rate)
+            self._updated = now
+            self._balance -= amount
+            return max(0.0, -self._balance / self.rate)
+
+    def refund(self, amount: float) -> None:
+        """Return a reservation that was not used, e.g. because its caller was cancelled."""
+        with self._lock:
+            self._balance = min(self.capacity, self._balance + amount)
+
+
+class ModelScheduler:
+    """Admission control for one model's requests/minute and tokens/minute quotas."""
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: float | None = None,
+        tokens_per_minute: float | None = None,
+    ) -> None:
+        self.name = name
+        self._requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self._tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._stats = {"requests": 0, "waited": 0, "throttled": 0, "max_queued": 0}
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _reserve(self, tokens: int) -> float:
+        wait = self._paused_until - time.monotonic()
+        if self._requests:
+            wait = max(wait, self._requests.reserve(1))
+        if self._tokens:
+            wait = max(wait, self._tokens.reserve(tokens))
+        with self._lock:
+            self._stats["requests"] += 1
+            if wait > 0:
+                self._stats["waited"] += 1
+                self._wait_total += wait
+                self._wait_max = max(self._wait_max, wait)
+        return max(wait, 0.0)
+
+    def _enter(self) -> None:
+        with self._lock:
+            self._queued += 1
+            self._stats["max_queued"] = max(self._stats["max_queued"], self._queued)
+
+    def _exit(self) -> None:
+        with self._lock:
+            self._queued -= 1
+
+    def refund(self, tokens: int) -> None:
+        """Give back a reservation for a request the provider did not serve."""
+        if self._requests:
+            self._requests.refund(1)
+        if self._tokens:
+            self._tokens.refund(tokens)
+
+    async def acquire(self, tokens: int) -> None:
+        if wait := self._reserve(tokens):
+            self._enter()
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                # The request is never sent, so later callers need not wait for it.
+                self.refund(tokens)
+                raise
+            finally:
+                self._exit()
+
+    def acquire_sync(self, tokens: int) -> None:
+        if wait := self._reserve(tokens):
+            self._enter()
+            try:
+                time.sleep(wait)
+            finally:
+                self._exit()
+
+    def pause(self, seconds: float) -> None:
+        """Hold all new dispatches for `seconds`, e.g. after a 429 with Retry-After."""
+        with self._lock:
+            self._stats["throttled"] += 1
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        logger.warning(f"{self.name} rate limited; pausing dispatch for {seconds:.1f}s")
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            waited = self._stats["waited"]
+            return {
+                **self._stats,
+                "queue_depth": self._queued,
+                "avg_wait_ms": round(self._wait_total / waited * 1000, 1) if waited else 0.0,
+                "max_wait_ms": round(self._wait_max * 1000, 1),
+            }
+
+
+def _request_body(request: httpx.Request) -> dict[str, Any]:
+    try:
+        body = json.loads(request.content or b"{}")
+    except (ValueError, httpx.RequestNotRead):
+        return {}
+    return body if isinstance(body, dict) else {}
+
+
+def estimate_request_tokens(body: dict[str, Any]) -> int:
+    """Estimate prompt plus completion tokens of a chat completion request body."""
+    prompt = json.dumps(body.get("messages", "")) + json.dumps(body.get("tools", []))
+    completion = body.get("max_completion_tokens") or body.get("max_tokens")
+    return len(prompt) // 4 + (completion or DEFAULT_COMPLETION_TOKENS)
+
+
+def _schedule(request: httpx.Request) -> tuple[ModelScheduler | None, int]:
+    body = _request_body(request)
+    scheduler = get_scheduler(str(body.get("model", "")))
+    return scheduler, (estimate_request_tokens(body) if scheduler else 0)
+
+
+def retry_after_seconds(response: httpx.Response, default: float = 1.0) -> float:
+    value = response.headers.get("retry-after")
+    if not value:
+        return default
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return default
+
+
+class RateLimitedAsyncTransport(httpx.AsyncBaseTransport):
+    """Dispatch requests through their model's ModelScheduler, waiting out 429s per Retry-After.
+
+    Requests for models without a quota in `settings.RATE_LIMITS` are sent
+    right away; their 429s are still waited out and retried.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport) -> None:
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        scheduler, tokens = _schedule(request)
+        for attempt in range(_MAX_429_RETRIES + 1):
+            if scheduler:
+                await scheduler.acquire(tokens)
+            response = await self._transport.handle_async_request(request)
+            if response.status_code != 429 or attempt == _MAX_429_RETRIES:
+                return response
+            await response.aclose()
+            if scheduler:
+                # The next attempt reserves again; the rejected one used no quota.
+                scheduler.refund(tokens)
+                scheduler.pause(retry_after_seconds(response))
+            else:
+                await asyncio.sleep(retry_after_seconds(response))
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+class RateLimitedTransport(httpx.BaseTransport):
+    """Sync counterpart of RateLimitedAsyncTransport."""
+
+    def __init__(self, transport: httpx.BaseTransport) -> None:
+        self._transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        scheduler, tokens = _schedule(request)
+        for attempt in range(_MAX_429_RETRIES + 1):
+            if scheduler:
+                scheduler.acquire_sync(tokens)
+            response = self._transport.handle_request(request)
+            if response.status_code != 429 or attempt == _MAX_429_RETRIES:
+                return response
+            response.close()
+            if scheduler:
+                # The next attempt reserves again; the rejected one used no quota.
+                scheduler.refund(tokens)
+                scheduler.pause(retry_after_seconds(response))
+            else:
+                time.sleep(retry_after_seconds(response))
+        return response
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+_schedulers: dict[str, ModelScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(model: str) -> ModelScheduler | None:
+    """Return the scheduler for `model`, or None if `settings.RATE_LIMITS` sets no quota."""
+    limits = settings.RATE_LIMITS.get(model)
+    if not limits:
+        return None
+    with _schedulers_lock:
+        if model not in _schedulers:
+            _schedulers[model] = ModelScheduler(
+                model,
+                requests_per_minute=limits.get("requests_per_minute"),
+                tokens_per_minute=limits.get("tokens_per_minute"),
+            )
+        return _schedulers[model]
+
+
+def scheduler_stats() -> dict[str, dict[str, Any]]:
+    return {model: s.stats() for model, s in _schedulers.items()}
@@ -0,0 +1,267 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from typing import Any
+
+import httpx
+
+from core.rate_limit import retry_after_seconds
+from core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Errors worth retrying: the dependency may answer differently on the next attempt.
+TRANSIENT_ERRORS: tuple[type[BaseException], ...] = (OSError, httpx.TransportError)
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit breaker is open."""
+
+    def __init__(self, name: str, retry_after: float) -> None:
+        super().__init__(f"{name} is unavailable; retry in {retry_after:.0f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+def find_circuit_open(error: BaseException | None) -> CircuitOpenError | None:
+    """Return the CircuitOpenError that caused `error`, if any.
+
+    Provider SDKs wrap transport exceptions in their own types, so the chain is
+    walked rather than checking `error` alone.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        if isinstance(error, CircuitOpenError):
+            return error
+        seen.add(id(error))
+        error = error.__cause__ or error.__context__
+    return None
+
+
+class CircuitBreaker:
+    """Fail fast after `failure_threshold` consecutive failures.
+
+    Once open, calls are rejected for `recovery_timeout` seconds. After that a
+    single trial call is let through (half-open): success closes the circuit,
+    failure opens it again. A caller that ends without an outcome, e.g. when it
+    is cancelled, must call `release()`; a trial that reports nothing within
+    `recovery_timeout` is given up, so the breaker cannot stay half-open for good.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, recovery_timeout: float) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._trial_started = 0.0
+        self._lock = threading.Lock()
+        self._stats = {"failures": 0, "rejected": 0, "opened": 0}
+
+    def retry_after(self) -> float:
+        return max(self._opened_at + self.recovery_timeout - time.monotonic(), 0.0)
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and self.retry_after() == 0:
+                self.state = "half_open"
+                self._trial_in_flight = False
+            now = time.monotonic()
+            if self.state == "half_open" and (
+                not self._trial_in_flight or now - self._trial_started > self.recovery_timeout
+            ):
+                self._trial_in_flight = True
+                self._trial_started = now
+                return True
+            self._stats["rejected"] += 1
+            return False
+
+    def check(self) -> None:
+        """Raise CircuitOpenError if a call may not go through now."""
+        if not self.allow():
+            raise CircuitOpenError(self.name, self.retry_after() or self.recovery_timeout)
+
+    def release(self) -> None:
+        """Give back a call let through by `allow()` that ended without an outcome."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != "closed":
+                logger.info(f"Circuit for {self.name} closed")
+            self.state = "closed"
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._stats["failures"] += 1
+            self._trial_in_flight = False
+            if self.state == "half_open" or self._failures >= self.failure_threshold:
+                if self.state != "open":
+                    self._stats["opened"] += 1
+                    logger.warning(
+                        f"Circuit for {self.name} opened after {self._failures} failures"
+                    )
+                self.state = "open"
+                self._opened_at = time.monotonic()
+
+    def status(self) -> dict[str, Any]:
+        with self._lock:
+            status: dict[str, Any] = {
+                "state": self.state,
+                "consecutive_failures": self._failures,
+                **self._stats,
+            }
+            if self.state == "open":
+                status["retry_after_seconds"] = round(self.retry_after(), 1)
+            return status
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Return the shared breaker for a dependency, e.g. "provider:groq" or "tool:WebSearch"."""
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(
+                name,
+                failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+                recovery_timeout=settings.CIRCUIT_RECOVERY_SECONDS,
+            )
+        return _breakers[name]
+
+
+def breaker_states() -> dict[str, dict[str, Any]]:
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {b.name: b.status() for b in breakers}
+
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff for the given 0-based retry attempt."""
+    cap = min(settings.RETRY_MAX_DELAY, settings.RETRY_BASE_DELAY * 2**attempt)
+    return random.uniform(0, cap)
+
+
+def _retry_delay(response: httpx.Response, attempt: int) -> float:
+    delay = backoff_delay(attempt)
+    if response.status_code in (429, 503) and "retry-after" in response.headers:
+        delay = max(delay, min(retry_after_seconds(response), settings.RETRY_MAX_DELAY))
+    return delay
+
+
+def _is_failure(response: httpx.Response) -> bool:
+    # A 429 means the provider is up but busy, so it does not count against the circuit.
+    return response.status_code >= 500
+
+
+class ResilientAsyncTransport(httpx.AsyncBaseTransport):
+    """Retry transient failures with backoff, behind a circuit breaker.
+
+    Connection errors and retryable statuses are retried up to
+    `settings.RETRY_MAX_ATTEMPTS` attempts in total. While the breaker is open,
+    requests raise CircuitOpenError without touching the network.
+    """
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport,
+        breaker: CircuitBreaker,
+        retry_statuses: frozenset[int] = RETRY_STATUSES,
+    ) -> None:
+        self._transport = transport
+        self.breaker = breaker
+        self.retry_statuses = retry_statuses
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        attempts = max(settings.RETRY_MAX_ATTEMPTS, 1)
+        for attempt in range(attempts):
+            self.breaker.check()
+            last = attempt == attempts - 1
+            try:
+                response = await self._transport.handle_async_request(request)
+            except httpx.TransportError:
+                self.breaker.record_failure()
+                if last:
+                    raise
+                await asyncio.sleep(backoff_delay(attempt))
+                continue
+            except BaseException:
+                # Cancelled (e.g. a hedged request that lost) or an unexpected error.
+                self.breaker.release()
+                raise
+            if _is_failure(response):
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            if last or response.status_code not in self.retry_statuses:
+                return response
+            delay = _retry_delay(response, attempt)
+            await response.aclose()
+            logger.info(
+                f"Retrying {self.breaker.name} after {response.status_code} in {delay:.2f}s"
+            )
+            await asyncio.sleep(delay)
+        raise AssertionError("unreachable")
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+class ResilientTransport(httpx.BaseTransport):
+    """Sync counterpart of ResilientAsyncTransport."""
+
+    def __init__(
+        self,
+        transport: httpx.BaseTransport,
+        breaker: CircuitBreaker,
+        retry_statuses: frozenset[int] = RETRY_STATUSES,
+    ) -> None:
+        self._transport = transport
+        self.breaker = breaker
+        self.retry_statuses = retry_statuses
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        attempts = max(settings.RETRY_MAX_ATTEMPTS, 1)
+        for attempt in range(attempts):
+            self.breaker.check()
+            last = attempt == attempts - 1
+            try:
+                response = self._transport.handle_request(request)
+            except httpx.TransportError:
+                self.breaker.record_failure()
+                if last:
+                    raise
+                time.sleep(backoff_delay(attempt))
+                continue
+            except BaseException:
+                self.breaker.release()
+                raise
+            if _is_failure(response):
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            if last or response.status_code not in self.retry_statuses:
+                return response
+            delay = _retry_delay(response, attempt)
+            response.close()
+            logger.info(
+                f"Retrying {self.breaker.name} after {response.status_code} in {delay:.2f}s"
+            )
+            time.sleep(delay)
+        raise AssertionError("unreachable")
+
+    def close(self) -> None:
+        self._transport.close()
@@ -0,0 +1,185 @@
+import logging
+import re
+import time
+from dataclasses import dataclass
+from typing import Any
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from core.llm import api_model_name
+from core.settings import settings
+from schema.models import (
+    AllModelEnum,
+    AutoModelName,
+    AzureOpenAIModelName,
+    GroqModelName,
+    OllamaModelName,
+    OpenAIModelName,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ModelProfile:
+    tier: int
+    """Rough capability tier: 1 = small/fast, 2 = general purpose, 3 = strongest."""
+    prior_latency: float
+    """Expected seconds per call before any latency has been observed."""
+
+
+MODEL_PROFILES: dict[AllModelEnum, ModelProfile] = {
+    GroqModelName.LLAMA_31_8B: ModelProfile(tier=1, prior_latency=0.6),
+    GroqModelName.LLAMA_33_70B: ModelProfile(tier=2, prior_latency=1.5),
+    OpenAIModelName.GPT_4O_MINI: ModelProfile(tier=2, prior_latency=2.0),
+    OpenAIModelName.GPT_4O: ModelProfile(tier=3, prior_latency=3.5),
+    AzureOpenAIModelName.AZURE_GPT_4O_MINI: ModelProfile(tier=2, prior_latency=2.0),
+    AzureOpenAIModelName.AZURE_GPT_4O: ModelProfile(tier=3, prior_latency=3.5),
+    OllamaModelName.OLLAMA_GENERIC: ModelProfile(tier=1, prior_latency=3.0),
+}
+
+# Agents whose graphs depend on reliable tool calling.
+TOOL_AGENTS = {"research-assistant", "rag-assistant", "sql", "wiki", "arxiv", "multi-source"}
+
+_COMPLEX_REQUEST = re.compile(
+    r"\b(explain|analy[sz]e|compare|why|derive|prove|step[- ]by[- ]step|code|debug|plan)\b",
+    re.IGNORECASE,
+)
+_LONG_FORM_REQUEST = re.compile(r"\b(essay|report|in detail|comprehensive)\b", re.IGNORECASE)
+
+
+def classify_request(message: str, agent_id: str) -> int:
+    """Return the minimum model tier a request needs, using cheap local heuristics."""
+    tier = 1
+    if agent_id in TOOL_AGENTS or len(message) > 600 or _COMPLEX_REQUEST.search(message):
+        tier = 2
+    if len(message) > 3000 or _LONG_FORM_REQUEST.search(message):
+        tier = 3
+    return tier
+
+
+@dataclass
+class _LatencyStats:
+    calls: int = 0
+    errors: int = 0
+    ewma: float | None = None
+    updated: float = 0.0
+
+
+class ModelRouter:
+    """Pick the fastest adequate model for a request from observed latencies.
+
+    Latency is tracked per model as an exponentially weighted moving average of
+    call durations; failed calls count as `error_penalty` seconds. Calls are
+    recorded under the provider's model id (`ls_model_name`), see `api_model_name`.
+
+    Without new samples an estimate decays back to the model's prior latency
+    with a half-life of `decay_half_life` seconds. A model that had one slow or
+    failed call therefore gets traffic again later, instead of never being
+    sampled (and chosen) again.
+    """
+
+    def __init__(
+        self, alpha: float = 0.2, error_penalty: float = 30.0, decay_half_life: float = 300.0
+    ) -> None:
+        self.alpha = alpha
+        self.error_penalty = error_penalty
+        self.decay_half_life = decay_half_life
+        self._stats: dict[str, _LatencyStats] = {}
+
+    def candidates(self) -> list[AllModelEnum]:
+        # Models get_model cannot build (e.g. Azure) are never routed to.
+        return [
+            m
+            for m in settings.AVAILABLE_MODELS
+            if m in MODEL_PROFILES and m != GroqModelName.LLAMA_GUARD_4_12B and api_model_name(m)
+        ]
+
+    def expected_latency(self, model: AllModelEnum) -> float:
+        prior = MODEL_PROFILES[model].prior_latency
+        stats = self._stats.get(api_model_name(model) or model.value)
+        if stats is None or stats.ewma is None:
+            return prior
+        return prior + (stats.ewma - prior) * self._decay(stats, time.monotonic())
+
+    def _decay(self, stats: _LatencyStats, now: float) -> float:
+        return 0.5 ** ((now - stats.updated) / self.decay_half_life)
+
+    def route(self, message: str, agent_id: str) -> AllModelEnum:
+        candidates = self.candidates()
+        if not candidates:
+            return settings.DEFAULT_MODEL
+        tier = classify_request(message, agent_id)
+        adequate = [m for m in candidates if MODEL_PROFILES[m].tier >= tier]
+        if not adequate:
+            top_tier = max(MODEL_PROFILES[m].tier for m in candidates)
+            adequate = [m for m in candidates if MODEL_PROFILES[m].tier == top_tier]
+        choice = min(adequate, key=lambda m: (self.expected_latency(m), MODEL_PROFILES[m].tier))
+        logger.debug(f"Routed {agent_id} request (tier {tier}) to {choice}")
+        return choice
+
+    def record(self, model_name: str, seconds: float, ok: bool = True) -> None:
+        stats = self._stats.setdefault(model_name, _LatencyStats())
+        stats.calls += 1
+        if not ok:
+            stats.errors += 1
+            seconds = max(seconds, self.error_penalty)
+        now = time.monotonic()
+        if stats.ewma is None:
+            stats.ewma = seconds
+        else:
+            # An old estimate counts for less than a recent one.
+            old_weight = (1 - self.alpha) * self._decay(stats, now)
+            stats.ewma = old_weight * stats.ewma + (1 - old_weight) * seconds
+        stats.updated = now
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        return {
+            name: {
+                "calls": s.calls,
+                "errors": s.errors,
+                "ewma_seconds": round(s.ewma, 3) if s.ewma is not None else None,
+            }
+            for name, s in self._stats.items()
+        }
+
+
+model_router = ModelRouter()
+
+
+def resolve_model(model: AllModelEnum | None, message: str, agent_id: str) -> AllModelEnum | None:
+    """Replace the `auto` model option with a concrete routed model.
+
+    Raises ValueError for `auto` when `settings.MODEL_ROUTING_ENABLED` is off.
+    """
+    if model == AutoModelName.AUTO:
+        if not settings.MODEL_ROUTING_ENABLED:
+            raise ValueError("Model routing is disabled; choose a specific model")
+        return model_router.route(message, agent_id)
+    return model
+
+
+class ModelLatencyCallback(BaseCallbackHandler):
+    """Feed the duration of every chat model call into `model_router`."""
+
+    run_inline = True
+
+    def __init__(self) -> None:
+        self._starts: dict[UUID, tuple[str, float]] = {}
+
+    def on_chat_model_start(
+        self, serialized: dict[str, Any], messages: Any, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        model_name = (kwargs.get("metadata") or {}).get("ls_model_name")
+        if model_name:
+            self._starts[run_id] = (model_name, time.perf_counter())
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        if start := self._starts.pop(run_id, None):
+            model_router.record(start[0], time.perf_counter() - start[1])
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        if start := self._starts.pop(run_id, None):
+            model_router.record(start[0], time.perf_counter() - start[1], ok=False)
@@ -14,6 +14,7 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 
 from schema.models import (
     AllModelEnum,
+    AutoModelName,
     AzureOpenAIModelName,
     GroqModelName,
     OllamaModelName,
@@ -25,6 +26,11 @@ class DatabaseType(StrEnum):
     SQLITE = "sqlite"
 
 
+class WikipediaBackend(StrEnum):
+    API = "api"
+    LOCAL = "local"
+
+
 def check_str_is_http(x: str) -> str:
     http_url_adapter = HttpUrl.validate
     return str(http_url_adapter(x))
@@ -53,6 +59,15 @@ class Settings(BaseSettings):
     DEFAULT_MODEL: AllModelEnum | None = None
     AVAILABLE_MODELS: set[AllModelEnum] = set()
 
+    MODEL_ROUTING_ENABLED: bool = True
+    MODEL_CLIENT_CACHE_SIZE: int = 32
+
+    HEDGE_ENABLED: bool = False
+    HEDGE_AFTER_SECONDS: float = 1.5
+    HEDGE_MODELS: dict[AllModelEnum, AllModelEnum] = Field(
+        default_factory=dict, description="Map of primary model to the model used to hedge it"
+    )
+
     LANGCHAIN_TRACING_V2: bool = True
     LANGCHAIN_PROJECT: str = "AgentHub"
     LANGCHAIN_ENDPOINT: Annotated[str, BeforeValidator(check_str_is_http)] = (
@@ -66,6 +81,99 @@ class Settings(BaseSettings):
     LANGFUSE_PUBLIC_KEY: SecretStr | None = None
     LANGFUSE_SECRET_KEY: SecretStr | None = None
 
+    AGENT_WARMUP: bool = False
+
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 60.0
+    HTTP_TIMEOUT: float = 120.0
+    HTTP_CONNECT_TIMEOUT: float = 10.0
+    HTTP2: bool = False
+    HTTP_WARM_UP: bool = True
+
+    RATE_LIMITS: dict[str, dict[str, int]] = Field(
+        default_factory=dict,
+        description="Per-model requests_per_minute / tokens_per_minute quotas, keyed by the "
+        'model id sent to the API, e.g. {"llama-3.3-70b-versatile": {"tokens_per_minute": 6000}}',
+    )
+
+    RETRY_MAX_ATTEMPTS: int = 3
+    RETRY_BASE_DELAY: float = 0.5
+    RETRY_MAX_DELAY: float = 8.0
+    CIRCUIT_FAILURE_THRESHOLD: int = 5
+    CIRCUIT_RECOVERY_SECONDS: float = 30.0
+    NON_IDEMPOTENT_TOOLS: set[str] = Field(
+        default_factory=set, description="Tools that must never be retried"
+    )
+
+    SQL_DATABASES: dict[str, str] = Field(
+        default_factory=dict,
+        description="Extra SQLite databases for the SQL agent, name -> file path",
+    )
+    SQL_DEFAULT_DATABASE: str = "chinook"
+    SQL_POOL_SIZE: int = 4
+    SQL_MMAP_SIZE: int = 256 * 1024 * 1024
+    SQL_RESULT_CACHE_SIZE: int = 256
+    SQL_MAX_ROWS: int = 5000
+    SQL_PREVIEW_ROWS: int = 20
+    SQL_STREAM_PAGE_SIZE: int = 500
+    SQL_RESULT_STORE_SIZE: int = 64
+    SQL_RESULT_STORE_TTL: float = 60 * 60
+    SQL_QUERY_TIMEOUT: float = 5.0
+    SQL_MAX_JOIN_ROWS: int = 500_000
+    SQL_PLAN_CACHE_ENABLED: bool = True
+    SQL_PLAN_CACHE_SEMANTIC: bool = Field(
+        default=False,
+        description="Also reuse plans of similar questions (same numbers, quoted values and names)",
+    )
+    SQL_PLAN_CACHE_SIMILARITY: float = 0.92
+    SQL_PLAN_CACHE_MAX_ENTRIES: int = 500
+
+    ARXIV_MIRROR_PATH: str | None = Field(
+        default=None, description="Local arXiv FTS5 index built by scripts/build_arxiv_index.py"
+    )
+    ARXIV_LIVE_FALLBACK: bool = True
+
+    WIKIPEDIA_BACKEND: WikipediaBackend = WikipediaBackend.API
+    WIKIPEDIA_INDEX_DIR: str = Field(
+        default="data/wikipedia",
+        description="Local index built by scripts/build_wikipedia_index.py",
+    )
+
+    CHATBOT_HISTORY_TOKENS: int = 3000
+    CHATBOT_SUMMARIZE_HISTORY: bool = False
+
+    CONTEXT_TOKEN_BUDGET: int = 8000
+    CONTEXT_TOKEN_BUDGETS: dict[str, int] = Field(
+        default_factory=dict, description="Per-agent prompt token budgets, keyed by agent id"
+    )
+    CONTEXT_SUMMARIZE: bool = False
+
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_AGENTS: set[str] = {"chatbot"}
+    RESPONSE_CACHE_TTL: float = 60 * 60
+    RESPONSE_CACHE_MAX_ENTRIES: int = 1000
+    RESPONSE_CACHE_SEMANTIC: bool = False
+    RESPONSE_CACHE_SIMILARITY: float = 0.95
+
+    TOOL_MAX_CONCURRENCY: int = 4
+    TOOL_TIMEOUT: float = 30.0
+    TOOL_TIMEOUTS: dict[str, float] = Field(
+        default_factory=dict, description="Per-tool timeout overrides in seconds"
+    )
+    TOOL_OUTPUT_COMPRESSION: bool = True
+    TOOL_OUTPUT_MAX_TOKENS: int = 800
+    TOOL_OUTPUT_MAX_TOKENS_BY_TOOL: dict[str, int] = Field(
+        default_factory=dict, description="Per-tool output token caps, 0 to keep output as is"
+    )
+
+    TOOL_CACHE_ENABLED: bool = True
+    TOOL_CACHE_PATH: str = "tool_cache.db"
+    TOOL_CACHE_MAX_ENTRIES: int = 10_000
+    TOOL_CACHE_TTLS: dict[str, float] = Field(
+        default_factory=dict, description="Per-tool cache TTL overrides in seconds"
+    )
+
     DATABASE_TYPE: DatabaseType = DatabaseType.SQLITE
     SQLITE_DB_PATH: str = "checkpoints.db"
 
@@ -125,6 +233,9 @@ class Settings(BaseSettings):
                 case _:
                     raise ValueError(f"Unknown provider: {provider}")
 
+        if self.MODEL_ROUTING_ENABLED:
+            self.AVAILABLE_MODELS.add(AutoModelName.AUTO)
+
     @computed_field
     @property
     def BASE_URL(self) -> str:
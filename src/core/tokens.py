@@ -0,0 +1,60 @@
+import json
+import logging
+from collections.abc import Callable, Sequence
+from functools import cache
+
+from langchain_core.messages import AIMessage, BaseMessage
+
+logger = logging.getLogger(__name__)
+
+# Rough fallback when no tokenizer is available (e.g. tiktoken cannot fetch its
+# encoding files offline): about four characters per token for English text.
+_CHARS_PER_TOKEN = 4
+# Per-message framing tokens (role, separators) added by chat templates.
+_MESSAGE_OVERHEAD = 4
+
+Tokenizer = Callable[[str], int]
+
+
+def _approximate(text: str) -> int:
+    return (len(text) + _CHARS_PER_TOKEN - 1) // _CHARS_PER_TOKEN
+
+
+@cache
+def get_tokenizer(model_name: str | None = None) -> Tokenizer:
+    """Return a cached token counting function for `model_name`.
+
+    Uses the model's tiktoken encoding when known, `cl100k_base` for other models
+    (a close enough estimate for Llama-family models), and a character heuristic
+    if tiktoken is unavailable.
+    """
+    try:
+        import tiktoken
+
+        try:
+            encoding = tiktoken.encoding_for_model(str(model_name))
+        except KeyError:
+            encoding = tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(f"Falling back to approximate token counts for {model_name}: {e}")
+        return _approximate
+
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+
+def _message_text(message: BaseMessage) -> str:
+    content = message.content
+    if not isinstance(content, str):
+        content = json.dumps(content, default=str)
+    if isinstance(message, AIMessage) and message.tool_calls:
+        content += json.dumps(message.tool_calls, default=str)
+    return content
+
+
+def count_message_tokens(message: BaseMessage, model_name: str | None = None) -> int:
+    return get_tokenizer(model_name)(_message_text(message)) + _MESSAGE_OVERHEAD
+
+
+def count_tokens(messages: Sequence[BaseMessage], model_name: str | None = None) -> int:
+    """Estimate the prompt tokens of `messages` for `model_name`."""
+    return sum(count_message_tokens(m, model_name) for m in messages)
@@ -7,6 +7,7 @@ from schema.schema import (
     Feedback,
     FeedbackResponse,
     ServiceMetadata,
+    SQLResultPage,
     StreamInput,
     UserInput,
 )
@@ -22,4 +23,5 @@ __all__ = [
     "FeedbackResponse",
     "ChatHistoryInput",
     "ChatHistory",
+    "SQLResultPage",
 ]
@@ -33,8 +33,14 @@ class OllamaModelName(StrEnum):
     OLLAMA_GENERIC = "ollama"
 
 
+class AutoModelName(StrEnum):
+    """Let the service route each request to a suitable available model."""
+    AUTO = "auto"
+
+
 AllModelEnum: TypeAlias = (
-    OpenAIModelName
+    AutoModelName
+    | OpenAIModelName
     | AzureOpenAIModelName
     | GroqModelName
     | OllamaModelName
@@ -46,7 +46,7 @@ class UserInput(BaseModel):
     )
     model: SerializeAsAny[AllModelEnum] | None = Field(
         title="Model",
-        description="LLM Model to use for the agent.",
+        description="LLM Model to use for the agent. Use `auto` to let the service choose.",
         default=GroqModelName.LLAMA_31_8B,
         examples=[OpenAIModelName.GPT_4O_MINI],
     )
@@ -61,9 +61,15 @@ class UserInput(BaseModel):
         examples=["847c6285-8fc9-4560-a83f-4e6285809254"],
     )
     agent_config: dict[str, Any] = Field(
-        description="Additional configuration to pass through to the agent",
+        description="Additional configuration to pass through to the agent. "
+        "`temperature`, `max_tokens` and `stop` set the model's generation parameters. "
+        "For the `sql` agent, `database` names the database to query.",
         default={},
-        examples=[{"spicy_level": 0.8}],
+        examples=[
+            {"spicy_level": 0.8},
+            {"max_tokens": 256, "temperature": 0.2},
+            {"database": "chinook"},
+        ],
     )
 
 
@@ -173,3 +179,14 @@ class ChatHistoryInput(BaseModel):
 
 class ChatHistory(BaseModel):
     messages: list[ChatMessage]
+
+
+class SQLResultPage(BaseModel):
+    """A page of a SQL result kept server-side by the SQL agent."""
+
+    handle: str = Field(description="Handle of the stored result.")
+    columns: list[str] = Field(description="Column names.", examples=[["Name", "Total"]])
+    rows: list[list[Any]] = Field(description="Rows of this page.")
+    offset: int = Field(description="Index of the first row of this page.")
+    total_rows: int = Field(description="Number of rows in the whole result.")
+    done: bool = Field(description="Whether this page includes the last row.")
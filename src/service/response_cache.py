@@ -0,0 +1,138 @@
+import logging
+import math
+import re
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from functools import cache
+from typing import Any
+
+from langchain_core.embeddings import Embeddings
+
+from core import settings
+from schema import ChatMessage
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation."""
+    return re.sub(r"\s+", " ", prompt).strip().lower().rstrip("?!. ")
+
+
+def _cosine(a: list[float], b: list[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+@dataclass
+class _Entry:
+    response: ChatMessage
+    expires_at: float
+    embedding: list[float] | None = None
+
+
+class ResponseCache:
+    """In-memory LRU cache of final responses keyed on (agent, model, normalized prompt).
+
+    With an `embeddings` model, a miss on the exact key falls back to the most similar
+    cached prompt for the same agent and model, if its cosine similarity is at least
+    `similarity_threshold`.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl: float,
+        embeddings: Embeddings | None = None,
+        similarity_threshold: float = 0.95,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.embeddings = embeddings
+        self.similarity_threshold = similarity_threshold
+        self._entries: OrderedDict[tuple[str, str, str], _Entry] = OrderedDict()
+        self._counters: Counter[str] = Counter()
+
+    async def _embed(self, prompt: str) -> list[float] | None:
+        if self.embeddings is None:
+            return None
+        try:
+            return await self.embeddings.aembed_query(prompt)
+        except Exception as e:
+            logger.warning(f"Response cache embedding failed: {e}")
+            return None
+
+    def _get_exact(self, key: tuple[str, str, str], now: float) -> _Entry | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= now:
+            del self._entries[key]
+            self._counters["expired"] += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    async def get(self, agent: str, model: str, prompt: str) -> ChatMessage | None:
+        now = time.time()
+        key = (agent, str(model), normalize_prompt(prompt))
+        if entry := self._get_exact(key, now):
+            self._counters["exact_hits"] += 1
+            return entry.response.model_copy(deep=True)
+
+        if self.embeddings is not None and (embedding := await self._embed(key[2])):
+            best_key, best_score = None, self.similarity_threshold
+            for other_key, other in self._entries.items():
+                if other_key[:2] != key[:2] or other.embedding is None or other.expires_at <= now:
+                    continue
+                score = _cosine(embedding, other.embedding)
+                if score >= best_score:
+                    best_key, best_score = other_key, score
+            if best_key is not None:
+                self._entries.move_to_end(best_key)
+                self._counters["semantic_hits"] += 1
+                response = self._entries[best_key].response.model_copy(deep=True)
+                response.response_metadata["cache_similarity"] = round(best_score, 4)
+                return response
+
+        self._counters["misses"] += 1
+        return None
+
+    async def set(self, agent: str, model: str, prompt: str, response: ChatMessage) -> None:
+        key = (agent, str(model), normalize_prompt(prompt))
+        cached = response.model_copy(deep=True)
+        cached.run_id = None
+        cached.response_metadata = {**cached.response_metadata, "cached": True}
+        self._entries[key] = _Entry(cached, time.time() + self.ttl, await self._embed(key[2]))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def stats(self) -> dict[str, Any]:
+        hits = self._counters["exact_hits"] + self._counters["semantic_hits"]
+        lookups = hits + self._counters["misses"]
+        return {
+            **{k: self._counters[k] for k in ("exact_hits", "semantic_hits", "misses")},
+            "expired": self._counters["expired"],
+            "evictions": self._counters["evictions"],
+            "size": len(self._entries),
+            "hit_ratio": round(hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+@cache
+def get_response_cache() -> ResponseCache:
+    embeddings = None
+    if settings.RESPONSE_CACHE_SEMANTIC and settings.OPENAI_API_KEY:
+        from langchain_openai import OpenAIEmbeddings
+
+        embeddings = OpenAIEmbeddings()
+    return ResponseCache(
+        max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+        ttl=settings.RESPONSE_CACHE_TTL,
+        embeddings=embeddings,
+        similarity_threshold=settings.RESPONSE_CACHE_SIMILARITY,
+    )
@@ -1,3 +1,4 @@
+import asyncio
 import inspect
 import json
 import logging
@@ -7,7 +8,7 @@ from contextlib import asynccontextmanager
 from typing import Annotated, Any
 from uuid import UUID, uuid4
 
-from fastapi import APIRouter, Depends, FastAPI, HTTPException, status
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Query, status
 from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from langchain_core._api import LangChainBetaWarning
@@ -18,8 +19,28 @@ from langfuse.callback import CallbackHandler
 from langgraph.types import Command, Interrupt
 from langsmith import Client as LangsmithClient
 
-from agents import DEFAULT_AGENT, AgentGraph, get_agent, get_all_agent_info
+from agents import (
+    DEFAULT_AGENT,
+    AgentGraph,
+    configure_agents,
+    get_agent,
+    get_all_agent_info,
+    warm_up_agents,
+)
+from agents.arxiv_mirror import arxiv_stats
+from agents.sql_database import close_databases, database_path, sql_stats
+from agents.sql_plan_cache import get_plan_cache
+from agents.sql_results import result_store
+from agents.tool_cache import get_tool_cache
+from agents.tool_node import tool_stats
+from agents.wikipedia_index import wikipedia_stats
 from core import settings
+from core.hedging import hedge_stats
+from core.http import close_pools, pool_stats, warm_up_pools
+from core.llm import GENERATION_PARAMS, model_cache_stats, normalize_generation_params
+from core.rate_limit import scheduler_stats
+from core.resilience import breaker_states, find_circuit_open
+from core.routing import ModelLatencyCallback, model_router, resolve_model
 from memory import initialize_database, initialize_store
 from schema import (
     ChatHistory,
@@ -28,9 +49,11 @@ from schema import (
     Feedback,
     FeedbackResponse,
     ServiceMetadata,
+    SQLResultPage,
     StreamInput,
     UserInput,
 )
+from service.response_cache import get_response_cache
 from service.utils import (
     convert_message_content_to_string,
     langchain_to_chat_message,
@@ -68,12 +91,20 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
             if hasattr(store, "setup"):
                 await store.setup()
 
-            agents = get_all_agent_info()
-            for a in agents:
-                agent = get_agent(a.key)
-                agent.checkpointer = saver
-                agent.store = store
+            # Agents are loaded lazily on first use.
+            configure_agents(saver, store)
+            # Warm-ups run in the background so startup does not wait on the network.
+            warm_ups: list[asyncio.Task] = []
+            if settings.AGENT_WARMUP:
+                warm_ups.append(asyncio.create_task(warm_up_agents()))
+            if settings.HTTP_WARM_UP:
+                warm_ups.append(asyncio.create_task(warm_up_pools()))
             yield
+            for task in warm_ups:
+                task.cancel()
+            await asyncio.gather(*warm_ups, return_exceptions=True)
+            await close_pools()
+            await close_databases()
     except Exception as e:
         logger.error(f"Error during database/store initialization: {e}")
         raise
@@ -95,19 +126,24 @@ async def info() -> ServiceMetadata:
     )
 
 
-async def _handle_input(user_input: UserInput, agent: AgentGraph) -> tuple[dict[str, Any], UUID]:
+async def _handle_input(
+    user_input: UserInput, agent: AgentGraph, agent_id: str
+) -> tuple[dict[str, Any], UUID, bool]:
     """
     Parse user input and handle any required interrupt resumption.
-    Returns kwargs for agent invocation and the run_id.
+    Returns kwargs for agent invocation, the run_id and whether the thread has history.
     """
     run_id = uuid4()
     thread_id = user_input.thread_id or str(uuid4())
     user_id = user_input.user_id or str(uuid4())
 
-    configurable = {"thread_id": thread_id,
-                    "model": user_input.model, "user_id": user_id}
+    try:
+        model = resolve_model(user_input.model, user_input.message, agent_id)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    configurable = {"thread_id": thread_id, "model": model, "user_id": user_id}
 
-    callbacks = []
+    callbacks = [ModelLatencyCallback()]
     if settings.LANGFUSE_TRACING:
         langfuse_handler = CallbackHandler()
 
@@ -119,6 +155,17 @@ async def _handle_input(user_input: UserInput, agent: AgentGraph) -> tuple[dict[
                 status_code=422,
                 detail=f"agent_config contains reserved keys: {overlap}",
             )
+        try:
+            normalize_generation_params(
+                **{k: v for k, v in user_input.agent_config.items() if k in GENERATION_PARAMS}
+            )
+        except (TypeError, ValueError) as e:
+            raise HTTPException(status_code=422, detail=f"Invalid generation parameter: {e}")
+        if agent_id == "sql" and "database" in user_input.agent_config:
+            try:
+                database_path(user_input.agent_config["database"])
+            except ValueError as e:
+                raise HTTPException(status_code=422, detail=str(e))
         configurable.update(user_input.agent_config)
 
     config = RunnableConfig(
@@ -132,6 +179,9 @@ async def _handle_input(user_input: UserInput, agent: AgentGraph) -> tuple[dict[
         task for task in state.tasks if hasattr(task, "interrupts") and task.interrupts
     ]
 
+    values = state.values if isinstance(state.values, dict) else {}
+    has_history = bool(interrupted_tasks or values.get("messages"))
+
     input: Command | dict[str, Any]
     if interrupted_tasks:
         input = Command(resume=user_input.message)
@@ -143,7 +193,7 @@ async def _handle_input(user_input: UserInput, agent: AgentGraph) -> tuple[dict[
         "config": config,
     }
 
-    return kwargs, run_id
+    return kwargs, run_id, has_history
 
 
 @router.post("/{agent_id}/invoke")
@@ -157,8 +207,26 @@ async def invoke(user_input: UserInput, agent_id: str = DEFAULT_AGENT) -> ChatMe
     is also attached to messages for recording feedback.
     Use user_id to persist and continue a conversation across multiple threads.
     """
-    agent: AgentGraph = get_agent(agent_id)
-    kwargs, run_id = await _handle_input(user_input, agent)
+    # The first use of an agent imports and compiles it; keep that off the event loop.
+    agent: AgentGraph = await asyncio.to_thread(get_agent, agent_id)
+    kwargs, run_id, has_history = await _handle_input(user_input, agent, agent_id)
+
+    use_cache = (
+        settings.RESPONSE_CACHE_ENABLED
+        and agent_id in settings.RESPONSE_CACHE_AGENTS
+        and not has_history
+        and not user_input.agent_config
+    )
+    response_cache = get_response_cache()
+    # Key on the model that will answer: `auto` resolves to a different model per request.
+    model = kwargs["config"]["configurable"]["model"]
+    if use_cache:
+        cached = await response_cache.get(agent_id, model, user_input.message)
+        if cached is not None:
+            if user_input.thread_id:
+                await _save_cached_turn(agent, kwargs["config"], user_input.message, cached)
+            cached.run_id = str(run_id)
+            return cached
 
     try:
         response_events: list[tuple[str, Any]] = await agent.ainvoke(**kwargs, stream_mode=["updates", "values"])
@@ -172,13 +240,32 @@ async def invoke(user_input: UserInput, agent_id: str = DEFAULT_AGENT) -> ChatMe
         else:
             raise ValueError(f"Unexpected response type: {response_type}")
 
+        if use_cache and output.type == "ai" and not output.tool_calls:
+            await response_cache.set(agent_id, model, user_input.message, output)
         output.run_id = str(run_id)
         return output
     except Exception as e:
         logger.error(f"An exception occurred: {e}")
+        if circuit_open := find_circuit_open(e):
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"{circuit_open.name} is temporarily unavailable",
+                headers={"Retry-After": str(max(int(circuit_open.retry_after), 1))},
+            )
         raise HTTPException(status_code=500, detail="Unexpected error")
 
 
+async def _save_cached_turn(
+    agent: AgentGraph, config: RunnableConfig, message: str, response: ChatMessage
+) -> None:
+    """Record a cache-served exchange in the thread so follow-up turns have its context."""
+    try:
+        messages = [HumanMessage(content=message), AIMessage(content=response.content)]
+        await agent.aupdate_state(config, {"messages": messages})
+    except Exception as e:
+        logger.warning(f"Could not save cached response to thread: {e}")
+
+
 async def message_generator(
     user_input: StreamInput, agent_id: str = DEFAULT_AGENT
 ) -> AsyncGenerator[str, None]:
@@ -187,8 +274,8 @@ async def message_generator(
 
     This is the workhorse method for the /stream endpoint.
     """
-    agent: AgentGraph = get_agent(agent_id)
-    kwargs, run_id = await _handle_input(user_input, agent)
+    agent: AgentGraph = await asyncio.to_thread(get_agent, agent_id)
+    kwargs, run_id, _ = await _handle_input(user_input, agent, agent_id)
 
     try:
         logger.info(
@@ -278,7 +365,10 @@ async def message_generator(
             f"Message generation completed successfully for run_id: {run_id}")
     except Exception as e:
         logger.error(f"Error in message generator: {e}", exc_info=True)
-        if "message parsing" not in str(e).lower():
+        if circuit_open := find_circuit_open(e):
+            content = f"{circuit_open.name} is temporarily unavailable"
+            yield f"data: {json.dumps({'type': 'error', 'content': content})}\n\n"
+        elif "message parsing" not in str(e).lower():
             yield f"data: {json.dumps({'type': 'error', 'content': 'Internal server error'})}\n\n"
     finally:
         yield "data: [DONE]\n\n"
@@ -359,6 +449,44 @@ async def feedback(feedback: Feedback) -> FeedbackResponse:
     return FeedbackResponse()
 
 
+@router.get("/metrics")
+async def metrics() -> dict[str, Any]:
+    """Runtime performance counters."""
+    return {
+        "tools": tool_stats(),
+        "tool_cache": get_tool_cache().stats(),
+        "response_cache": get_response_cache().stats(),
+        "hedging": hedge_stats(),
+        "models": model_router.stats(),
+        "model_clients": model_cache_stats(),
+        "http_pools": pool_stats(),
+        "rate_limits": scheduler_stats(),
+        "sql": sql_stats(),
+        "sql_plan_cache": get_plan_cache().stats(),
+        "arxiv": arxiv_stats(),
+        "wikipedia": wikipedia_stats(),
+    }
+
+
+@router.get("/sql/results/{handle}")
+async def sql_result_page(
+    handle: str,
+    offset: Annotated[int, Query(ge=0)] = 0,
+    limit: Annotated[int, Query(ge=1, le=5000)] = 500,
+) -> SQLResultPage:
+    """
+    Get a page of a large SQL agent result.
+
+    Results too large to show the model are kept for a while under the handle
+    sent in the `sql_result` custom events of the stream and in the answer's
+    `response_metadata["sql_result_handle"]`.
+    """
+    page = result_store.page(handle, offset, limit)
+    if page is None:
+        raise HTTPException(status_code=404, detail="Result not found or expired")
+    return SQLResultPage(**page)
+
+
 @router.post("/history")
 def history(input: ChatHistoryInput) -> ChatHistory:
     """
@@ -382,7 +510,7 @@ def history(input: ChatHistoryInput) -> ChatHistory:
 async def health_check():
     """Health check endpoint."""
 
-    health_status = {"status": "ok"}
+    health_status: dict[str, Any] = {"status": "ok"}
 
     if settings.LANGFUSE_TRACING:
         try:
@@ -393,6 +521,12 @@ async def health_check():
             logger.error(f"Langfuse connection error: {e}")
             health_status["langfuse"] = "disconnected"
 
+    circuits = breaker_states()
+    if circuits:
+        health_status["circuits"] = circuits
+    if any(c["state"] == "open" for c in circuits.values()):
+        health_status["status"] = "degraded"
+
     return health_status
 
 
@@ -370,6 +370,10 @@ async def draw_messages(
                                 await handle_agent_msgs(messages_agen, call_results, is_new)
                                 break
                             tool_result: ChatMessage = await anext(messages_agen)
+                            # Tools may stream custom data before their result.
+                            while getattr(tool_result, "type", None) == "custom":
+                                draw_custom_data(tool_result)
+                                tool_result = await anext(messages_agen)
 
                             if isinstance(tool_result, str):
                                 tool_result = ChatMessage(
@@ -402,12 +406,32 @@ async def draw_messages(
                 status.write(msg.content)
                 status.update(state="complete")
 
+            case "custom":
+                draw_custom_data(msg)
+
             case _:
                 st.error(f"Unexpected ChatMessage type: {msg.type}")
                 st.write(msg)
                 st.stop()
 
 
+def draw_custom_data(msg: ChatMessage) -> None:
+    """Draw custom data streamed by an agent, such as pages of a large SQL result."""
+    data = msg.custom_data
+    if data.get("type") == "source_latency":
+        st.caption(
+            f"{data['source']}: {data['passages']} results in {data['latency_ms']:.0f} ms"
+            + ("" if data["status"] == "success" else f" ({data['status']})")
+        )
+        return
+    if data.get("type") != "sql_result":
+        return
+    first = data["offset"] + 1
+    last = data["offset"] + len(data["rows"])
+    st.caption(f"Rows {first}-{last} of {data['total_rows']}")
+    st.dataframe([dict(zip(data["columns"], row)) for row in data["rows"]])
+
+
 async def handle_feedback() -> None:
     """Draws a feedback widget and records feedback from the user."""
 
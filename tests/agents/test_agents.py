@@ -0,0 +1,30 @@
+import threading
+
+from agents import agents as registry
+from agents.agents import Agent, get_agent
+
+
+def test_loading_one_agent_does_not_block_another(monkeypatch):
+    started, release = threading.Event(), threading.Event()
+    slow_graph, fast_graph = object(), object()
+
+    def load_slow():
+        started.set()
+        release.wait(5)
+        return slow_graph
+
+    monkeypatch.setattr(
+        registry,
+        "agents",
+        {"slow": Agent("slow", load=load_slow), "fast": Agent("fast", load=lambda: fast_graph)},
+    )
+    monkeypatch.setattr(registry, "_attach", lambda graph: None)
+    loader = threading.Thread(target=get_agent, args=("slow",))
+    loader.start()
+    try:
+        assert started.wait(5)
+        assert get_agent("fast") is fast_graph
+    finally:
+        release.set()
+        loader.join()
+    assert get_agent("slow") is slow_graph
@@ -0,0 +1,81 @@
+import importlib.util
+import json
+from pathlib import Path
+
+import pytest
+
+from agents import arxiv_mirror
+from agents.arxiv_mirror import NO_RESULTS, ArxivMirror, create_arxiv_tool
+from core import settings
+
+SCRIPT = Path(__file__).parents[2] / "scripts" / "build_arxiv_index.py"
+PAPERS = [
+    {
+        "id": "1706.03762",
+        "title": "Attention Is All\n  You Need",
+        "authors": "Ashish Vaswani, Noam Shazeer",
+        "abstract": "The dominant sequence transduction models are based on recurrent networks.",
+        "categories": "cs.CL cs.LG",
+        "versions": [{"created": "Mon, 12 Jun 2017 17:57:34 GMT"}],
+    },
+    {
+        "id": "hep-th/9901001",
+        "title": "Strings and branes",
+        "authors": "A. Physicist",
+        "abstract": "We study branes in string theory.",
+        "categories": "hep-th",
+        "update_date": "1999-01-04",
+    },
+]
+
+
+@pytest.fixture(scope="module")
+def index_path(tmp_path_factory):
+    spec = importlib.util.spec_from_file_location("build_arxiv_index", SCRIPT)
+    build_arxiv_index = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(build_arxiv_index)
+
+    tmp = tmp_path_factory.mktemp("arxiv")
+    dump = tmp / "dump.json"
+    dump.write_text("\n".join(json.dumps(p) for p in PAPERS))
+    output = str(tmp / "arxiv.db")
+    assert build_arxiv_index.build(str(dump), output, []) == 2
+    return output
+
+
+@pytest.fixture
+def mirror(index_path):
+    return ArxivMirror(index_path)
+
+
+@pytest.mark.parametrize("query", ["1706.03762", "arXiv:1706.03762v5", "ARXIV:1706.03762"])
+def test_lookup_by_id(mirror, query):
+    (paper,) = mirror.search(query)
+    assert paper[:2] == ("1706.03762", "Attention Is All You Need")
+    assert paper[4] == "2017-06-12"
+
+
+def test_lookup_old_style_id(mirror):
+    assert mirror.search("hep-th/9901001")[0][1] == "Strings and branes"
+
+
+def test_title_match(mirror):
+    assert mirror.search("attention need")[0][0] == "1706.03762"
+    assert mirror.search("attention branes") == []
+    assert len(mirror.search("attention branes", match_all=False)) == 2
+
+
+def test_tool_without_live_fallback(index_path, monkeypatch):
+    monkeypatch.setattr(settings, "ARXIV_MIRROR_PATH", index_path)
+    monkeypatch.setattr(settings, "ARXIV_LIVE_FALLBACK", False)
+    monkeypatch.setattr(arxiv_mirror, "_counters", arxiv_mirror.Counter())
+    arxiv_mirror.get_mirror.cache_clear()
+    try:
+        tool = create_arxiv_tool()
+        assert "Title: Attention Is All You Need" in tool.invoke({"query": "attention"})
+        # Not every term matches, so any-term matches are returned instead of asking arxiv.org.
+        assert "Title: Strings and branes" in tool.invoke({"query": "branes quantum gravity"})
+        assert tool.invoke({"query": "nothing matches"}) == NO_RESULTS
+    finally:
+        arxiv_mirror.get_mirror.cache_clear()
+    assert arxiv_mirror.arxiv_stats() == {"local_hits": 2, "live_fallbacks": 0, "misses": 1}
@@ -0,0 +1,62 @@
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from agents.context import split_window
+from core.tokens import count_tokens
+
+
+def tool_turn(question: str, output: str, call_id: str = "call_1") -> list:
+    call = {"name": "Search", "args": {"query": question}, "id": call_id}
+    return [
+        HumanMessage(content=question),
+        AIMessage(content="", tool_calls=[call]),
+        ToolMessage(content=output, name="Search", tool_call_id=call_id),
+    ]
+
+
+def filler(topic: str, sentences: int) -> str:
+    return " ".join(f"Sentence {i} is about {topic} and nothing else." for i in range(sentences))
+
+
+def test_everything_fits():
+    messages = [HumanMessage(content="hi"), AIMessage(content="hello")]
+    assert split_window(messages, 1000) == ([], messages)
+
+
+def test_window_starts_at_a_human_message():
+    messages = [
+        HumanMessage(content=filler("cats", 20)),
+        AIMessage(content=filler("cats", 20)),
+        *tool_turn("dogs?", "Dogs bark."),
+    ]
+    budget = count_tokens(messages[1:])
+    older, window = split_window(messages, budget)
+    assert older == messages[:2]
+    assert window == messages[2:]
+
+
+def test_oversized_turn_keeps_question_and_tool_call():
+    previous = [HumanMessage(content="earlier"), AIMessage(content="answer")]
+    output = filler("weather", 200) + " The capital of France is Paris."
+    turn = tool_turn("What is the capital of France?", output)
+    messages = [*previous, *turn]
+    older, window = split_window(messages, 300)
+
+    assert older == previous
+    assert window[0] == turn[0]
+    assert window[1] == turn[1]
+    result = window[2]
+    assert isinstance(result, ToolMessage)
+    assert result.tool_call_id == "call_1"
+    assert "Paris" in result.content
+    assert count_tokens(window) <= 300
+    # The state's message is not modified.
+    assert turn[2].content == output
+
+
+def test_small_tool_results_are_kept_whole():
+    turn = tool_turn("What is the capital of France?", filler("weather", 200))
+    small = ToolMessage(content="Paris.", name="Search", tool_call_id="call_2")
+    turn[1].tool_calls.append({"name": "Search", "args": {"query": "x"}, "id": "call_2"})
+    _, window = split_window([*turn, small], 300)
+    assert window[3].content == "Paris."
+    assert len(window[2].content) < len(turn[2].content)
@@ -0,0 +1,33 @@
+from agents.multi_source_agent import MAX_PASSAGES, _reset_or_extend, rank_evidence
+
+
+def test_reset_or_extend():
+    assert _reset_or_extend(None, [1]) == [1]
+    assert _reset_or_extend([1], [2, 3]) == [1, 2, 3]
+    # A new turn resets the evidence gathered for the previous question.
+    assert _reset_or_extend([1, 2], None) == []
+
+
+def test_rank_evidence_prefers_relevant_passages():
+    evidence = [
+        {"source": "web", "rank": 0, "text": "Stock prices rose sharply on Monday."},
+        {"source": "wikipedia", "rank": 0, "text": "Paris is the capital of France."},
+        {"source": "arxiv", "rank": 0, "text": "We study graph neural networks."},
+    ]
+    ranked = rank_evidence(evidence, "What is the capital of France?")
+    assert ranked[0]["source"] == "wikipedia"
+
+
+def test_rank_evidence_breaks_ties_by_source_rank():
+    evidence = [
+        {"source": "web", "rank": rank, "text": "Paris is the capital of France."}
+        for rank in (3, 0, 1)
+    ]
+    ranked = rank_evidence(evidence, "capital of France")
+    assert [e["rank"] for e in ranked] == [0, 1, 3]
+
+
+def test_rank_evidence_keeps_the_best_passages():
+    evidence = [{"source": "web", "rank": i, "text": f"Passage {i}."} for i in range(20)]
+    ranked = rank_evidence(evidence, "unrelated question")
+    assert [e["rank"] for e in ranked] == list(range(MAX_PASSAGES))
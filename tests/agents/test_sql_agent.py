@@ -0,0 +1,27 @@
+import socket
+import sys
+
+import pytest
+
+from agents import agents as registry
+from agents.agents import Agent, get_agent
+
+
+@pytest.fixture
+def offline(monkeypatch):
+    def refuse(*args, **kwargs):
+        raise OSError("network access in an offline test")
+
+    monkeypatch.setattr(socket.socket, "connect", refuse)
+    monkeypatch.setattr(socket.socket, "connect_ex", refuse)
+    monkeypatch.setattr(socket, "create_connection", refuse)
+
+
+def test_sql_agent_builds_offline(offline, monkeypatch):
+    # Import and compile from scratch, as on a fresh process start.
+    monkeypatch.delitem(sys.modules, "agents.sql_agent", raising=False)
+    sql = registry.agents["sql"]
+    monkeypatch.setitem(registry.agents, "sql", Agent(sql.description, load=sql.load))
+
+    graph = get_agent("sql")
+    assert {"lookup_plan", "model", "tools", "record_plan"} <= set(graph.nodes)
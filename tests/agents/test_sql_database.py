@@ -0,0 +1,105 @@
+import json
+import sqlite3
+
+import pytest
+
+from agents.sql_database import QueryError, ReadOnlyDatabase, normalize_sql
+from core import settings
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "test.db"
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        """
+        CREATE TABLE t (a INTEGER, label TEXT);
+        INSERT INTO t VALUES (1, 'one'), (2, 'two -- not a comment'), (3, 'three'), (4, 'four');
+        CREATE TABLE big (x INTEGER);
+        """
+    )
+    conn.executemany("INSERT INTO big VALUES (?)", [(i,) for i in range(1000)])
+    conn.commit()
+    conn.close()
+    return str(path)
+
+
+@pytest.fixture
+async def db(db_path):
+    database = ReadOnlyDatabase(db_path)
+    yield database
+    await database.pool.close()
+
+
+def test_normalize_sql_collapses_whitespace_and_trailing_semicolon():
+    assert normalize_sql("  SELECT a\n\tFROM   t ;  ") == "SELECT a FROM t"
+
+
+def test_normalize_sql_drops_comments():
+    assert normalize_sql("SELECT a FROM t -- small ones\nWHERE a < 3") == (
+        "SELECT a FROM t WHERE a < 3"
+    )
+    assert normalize_sql("SELECT /* all\ncolumns */ a FROM t") == "SELECT a FROM t"
+
+
+def test_normalize_sql_keeps_literals():
+    sql = "SELECT a FROM t WHERE label = 'x  -- y\n z' AND \"odd  name\" = 1"
+    assert normalize_sql(sql) == sql
+
+
+def test_normalize_sql_distinguishes_commented_out_clauses():
+    # A line comment ends at the newline; collapsing it first would comment out the WHERE.
+    assert normalize_sql("SELECT a FROM t -- c\nWHERE a < 3") != normalize_sql(
+        "SELECT a FROM t -- c WHERE a < 3"
+    )
+
+
+async def test_line_comment_does_not_swallow_the_next_line(db):
+    result = await db.execute("SELECT a FROM t -- small ones\nWHERE a < 3")
+    assert result.rows == [(1,), (2,)]
+
+    result = await db.execute("SELECT a FROM t -- small ones WHERE a < 3")
+    assert len(result.rows) == 4
+
+
+async def test_comment_markers_inside_literals_are_data(db):
+    result = await db.execute("SELECT a FROM t\nWHERE label = 'two -- not a comment'")
+    assert result.rows == [(2,)]
+
+
+async def test_leading_comment_is_allowed(db):
+    result = await db.execute("-- count them\nSELECT COUNT(*) FROM t")
+    assert result.rows == [(4,)]
+
+
+async def test_results_are_cached_by_normalized_sql(db):
+    await db.execute("SELECT a FROM t WHERE a = 1")
+    await db.execute("SELECT a\n  FROM t WHERE a = 1;")
+    assert db.stats()["hits"] == 1
+
+
+async def test_write_statements_are_rejected(db):
+    with pytest.raises(QueryError) as e:
+        await db.execute("DELETE FROM t")
+    assert json.loads(e.value.to_json())["error"] == "not_read_only"
+
+
+async def test_cartesian_join_is_rejected(db, monkeypatch):
+    monkeypatch.setattr(settings, "SQL_MAX_JOIN_ROWS", 10_000)
+    with pytest.raises(QueryError) as e:
+        await db.execute("SELECT * FROM big b1, big b2")
+    assert e.value.code == "cartesian_join"
+    assert db.stats()["rejected"] == 1
+
+
+async def test_indexed_join_is_allowed(db, monkeypatch):
+    monkeypatch.setattr(settings, "SQL_MAX_JOIN_ROWS", 10_000)
+    result = await db.execute("SELECT COUNT(*) FROM big b1 JOIN big b2 ON b1.rowid = b2.rowid")
+    assert result.rows == [(1000,)]
+
+
+async def test_rows_are_capped(db, monkeypatch):
+    monkeypatch.setattr(settings, "SQL_MAX_ROWS", 10)
+    result = await db.execute("SELECT x FROM big")
+    assert len(result.rows) == 10
+    assert result.truncated
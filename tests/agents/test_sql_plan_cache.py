@@ -0,0 +1,97 @@
+import pytest
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from agents import sql_agent
+from agents.sql_agent import _cacheable_question, record_plan
+from agents.sql_plan_cache import SQLPlanCache, normalize_question, question_literals
+
+
+class ConstantEmbeddings(Embeddings):
+    """Every text gets the same vector, so every stored question is similar."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        self.calls += 1
+        return [1.0, 0.0]
+
+
+def test_normalize_question():
+    assert normalize_question("  How many   Albums? ") == "how many albums"
+
+
+def test_question_literals():
+    assert question_literals("Top 5 tracks by 'AC/DC' in 2021.5") == ["5", "'AC/DC'", "2021.5"]
+    assert question_literals("What's the customer's country?") == []
+    assert question_literals("Sales in Brazil. Which genre did I like?") == ["Brazil"]
+
+
+async def test_exact_match():
+    cache = SQLPlanCache(max_entries=10)
+    await cache.set("db", "How many albums?", "SELECT COUNT(*) FROM Album")
+    plan = await cache.get("db", "how many  albums")
+    assert plan.sql == "SELECT COUNT(*) FROM Album"
+    assert await cache.get("other", "How many albums?") is None
+
+
+async def test_semantic_match_requires_the_same_literals():
+    cache = SQLPlanCache(max_entries=10, embeddings=ConstantEmbeddings())
+    await cache.set("db", "Sales in 2021", "SELECT SUM(Total) FROM Invoice WHERE year = 2021")
+    assert await cache.get("db", "Total sales for 2022") is None
+
+    plan = await cache.get("db", "Total sales for 2021")
+    assert plan.sql.endswith("2021")
+    assert cache.stats()["semantic_hits"] == 1
+
+
+async def test_semantic_match_requires_the_same_names():
+    cache = SQLPlanCache(max_entries=10, embeddings=ConstantEmbeddings())
+    await cache.set("db", "Total sales in Brazil", "SELECT ... WHERE Country = 'Brazil'")
+    assert await cache.get("db", "Total sales in Canada") is None
+    assert await cache.get("db", "What were the sales in Brazil") is not None
+
+
+async def test_set_reuses_the_lookup_embedding():
+    embeddings = ConstantEmbeddings()
+    cache = SQLPlanCache(max_entries=10, embeddings=embeddings)
+    assert await cache.get("db", "How many albums?") is None
+    await cache.set("db", "How many albums?", "SELECT COUNT(*) FROM Album")
+    assert embeddings.calls == 1
+
+
+async def test_lru_eviction():
+    cache = SQLPlanCache(max_entries=2)
+    for i in range(3):
+        await cache.set("db", f"question {i}", f"SELECT {i}")
+    assert await cache.get("db", "question 0") is None
+    assert cache.stats()["size"] == 2
+
+
+def test_only_first_questions_are_cacheable():
+    first = [HumanMessage(content="How many albums?")]
+    assert _cacheable_question(first) == (0, "How many albums?")
+
+    follow_up = [*first, AIMessage(content="347"), HumanMessage(content="And artists?")]
+    assert _cacheable_question(follow_up) == (3, None)
+
+
+@pytest.mark.parametrize(("row_count", "stored"), [(0, False), (3, True)])
+async def test_record_plan_skips_empty_results(monkeypatch, row_count, stored):
+    cache = SQLPlanCache(max_entries=10)
+    monkeypatch.setattr(sql_agent, "get_plan_cache", lambda: cache)
+    monkeypatch.setattr(sql_agent, "database_for_config", lambda config: "db")
+    artifact = {"sql": "SELECT 1", "row_count": row_count, "truncated": False}
+    call = {"name": "sql_db_query", "args": {"query": "SELECT 1"}, "id": "call_1"}
+    messages = [
+        HumanMessage(content="How many albums?"),
+        AIMessage(content="", tool_calls=[call]),
+        ToolMessage(content="", name="sql_db_query", tool_call_id="call_1", artifact=artifact),
+        AIMessage(content="None."),
+    ]
+    await record_plan({"messages": messages}, {})
+    assert (await cache.get("db", "How many albums?") is not None) == stored
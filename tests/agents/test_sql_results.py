@@ -0,0 +1,46 @@
+from typing import TypedDict
+
+from langgraph.graph import END, StateGraph
+
+from agents.sql_results import result_store, stream_result
+
+
+class State(TypedDict):
+    handle: str
+    streamed: bool
+
+
+def streaming_graph():
+    def node(state: State) -> State:
+        return {"handle": state["handle"], "streamed": stream_result(state["handle"])}
+
+    graph = StateGraph(State)
+    graph.add_node("node", node)
+    graph.set_entry_point("node")
+    graph.add_edge("node", END)
+    return graph.compile()
+
+
+def test_stream_result_outside_a_graph_run():
+    handle = result_store.put(["a"], [(1,)])
+    assert not stream_result(handle)
+
+
+async def test_stream_result_without_custom_stream_mode():
+    handle = result_store.put(["a"], [(1,)])
+    result = await streaming_graph().ainvoke({"handle": handle, "streamed": False})
+    assert not result["streamed"]
+
+
+async def test_stream_result_sends_pages_to_custom_stream():
+    handle = result_store.put(["a"], [(i,) for i in range(3)])
+    graph = streaming_graph()
+    events = [
+        event
+        async for event in graph.astream(
+            {"handle": handle, "streamed": False}, stream_mode=["custom", "values"]
+        )
+    ]
+    custom = [payload for mode, payload in events if mode == "custom"]
+    assert custom[0].content[0]["rows"] == [[0], [1], [2]]
+    assert events[-1][1]["streamed"]
@@ -0,0 +1,50 @@
+import sqlite3
+
+import pytest
+
+from agents import sql_schema
+from agents.sql_schema import aget_schema_digest, build_schema_digest
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "schema.db"
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        """
+        CREATE TABLE artist (id INTEGER PRIMARY KEY, name TEXT);
+        CREATE TABLE album (
+            id INTEGER PRIMARY KEY, title TEXT, genre TEXT, released DATE,
+            artist_id INTEGER REFERENCES artist(id)
+        );
+        """
+    )
+    conn.executemany("INSERT INTO artist VALUES (?, ?)", [(i, f"Artist {i}") for i in range(50)])
+    conn.executemany(
+        "INSERT INTO album VALUES (?, ?, ?, ?, ?)",
+        [(i, f"Album {i}", ["rock", "jazz"][i % 2], f"200{i % 10}-01-01", i) for i in range(50)],
+    )
+    conn.commit()
+    conn.close()
+    return str(path)
+
+
+def test_digest_describes_tables(db_path):
+    digest = build_schema_digest(db_path).splitlines()
+    assert digest[0].startswith("album (50 rows): id INTEGER PK; title TEXT e.g. 'Album 0'")
+    assert "genre TEXT one of 'rock', 'jazz'" in digest[0]
+    assert "released DATE range 2000-01-01..2009-01-01" in digest[0]
+    assert "artist_id INTEGER -> artist.id" in digest[0]
+    assert digest[1].startswith("artist (50 rows)")
+
+
+def test_text_columns_are_profiled_on_a_sample(db_path, monkeypatch):
+    monkeypatch.setattr(sql_schema, "_PROFILE_ROWS", 1)
+    # One sampled row cannot show that genre repeats, so it is no longer listed as an enum.
+    assert "genre TEXT e.g. 'rock'" in build_schema_digest(db_path)
+
+
+async def test_async_digest_is_cached(db_path, monkeypatch):
+    digest = await aget_schema_digest(db_path)
+    monkeypatch.setattr(sql_schema, "build_schema_digest", lambda path: pytest.fail("rebuilt"))
+    assert await aget_schema_digest(db_path) == digest
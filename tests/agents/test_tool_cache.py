@@ -0,0 +1,112 @@
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.tools import tool
+
+from agents import tool_cache
+from agents.tool_cache import ToolResultCache, cached_tool
+from core import settings
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(tool_cache, "time", SimpleNamespace(time=fake))
+    return fake
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = ToolResultCache(str(tmp_path / "tool_cache.db"), max_entries=10)
+    monkeypatch.setattr(tool_cache, "get_tool_cache", lambda: cache)
+    return cache
+
+
+def counting_tool(name: str = "Search"):
+    calls = []
+
+    @tool(name)
+    def search(query: str) -> str:
+        """Returns the query, or nothing for an empty one."""
+        calls.append(query)
+        return query.upper() if query.strip() else ""
+
+    return search, calls
+
+
+def test_keys_ignore_case_and_whitespace():
+    key = ToolResultCache.make_key("Search", {"query": "Alan  Turing "})
+    assert key == ToolResultCache.make_key("Search", {"query": "alan turing"})
+    assert key != ToolResultCache.make_key("Wikipedia", {"query": "alan turing"})
+
+
+def test_entries_expire(cache, clock):
+    cache.set("Search", {"query": "x"}, "result", ttl=60)
+    clock.now += 59
+    assert cache.get("Search", {"query": "x"}) == "result"
+    clock.now += 1
+    assert cache.get("Search", {"query": "x"}) is None
+    assert cache.stats()["Search"] == {
+        "hits": 1,
+        "misses": 1,
+        "expired": 1,
+        "evictions": 0,
+        "hit_ratio": 0.5,
+    }
+
+
+def test_least_recently_used_entries_are_evicted(cache, clock):
+    for i in range(10):
+        clock.now += 1
+        cache.set("Search", {"query": str(i)}, str(i), ttl=3600)
+    clock.now += 1
+    assert cache.get("Search", {"query": "0"}) == "0"
+    clock.now += 1
+    cache.set("Search", {"query": "10"}, "10", ttl=3600)
+    # Over the limit: the two least recently used entries (a tenth plus one) go.
+    assert cache.get("Search", {"query": "0"}) == "0"
+    assert cache.get("Search", {"query": "1"}) is None
+    assert cache.get("Search", {"query": "2"}) is None
+    assert cache.get("Search", {"query": "3"}) == "3"
+    assert cache.stats()["Search"]["evictions"] == 2
+
+
+async def test_cached_tool_serves_repeats_from_the_cache(cache):
+    search, calls = counting_tool()
+    cached = cached_tool(search, ttl=60)
+    assert cached.invoke({"query": "alan turing"}) == "ALAN TURING"
+    assert cached.invoke({"query": "Alan Turing"}) == "ALAN TURING"
+    assert await cached.ainvoke({"query": "alan turing"}) == "ALAN TURING"
+    assert calls == ["alan turing"]
+
+
+def test_empty_results_are_not_cached(cache):
+    search, calls = counting_tool()
+    cached = cached_tool(search, ttl=60)
+    cached.invoke({"query": " "})
+    cached.invoke({"query": " "})
+    assert len(calls) == 2
+
+
+def test_ttl_override(cache, clock, monkeypatch):
+    monkeypatch.setattr(settings, "TOOL_CACHE_TTLS", {"Search": 10})
+    search, calls = counting_tool()
+    cached = cached_tool(search, ttl=3600)
+    cached.invoke({"query": "x"})
+    clock.now += 11
+    cached.invoke({"query": "x"})
+    assert len(calls) == 2
+
+
+def test_disabled_cache_returns_the_tool(monkeypatch):
+    monkeypatch.setattr(settings, "TOOL_CACHE_ENABLED", False)
+    search, _ = counting_tool()
+    assert cached_tool(search, ttl=60) is search
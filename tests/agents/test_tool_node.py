@@ -0,0 +1,133 @@
+import asyncio
+
+import httpx
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.tools import tool
+
+from agents import tool_node
+from agents.tool_node import create_tool_node, tool_stats
+from core import settings
+from core.resilience import TRANSIENT_ERRORS, get_breaker
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(tool_node, "backoff_delay", lambda attempt: 0.0)
+    monkeypatch.setattr(tool_node, "_tool_stats", {})
+
+
+def calls_to(*names: str) -> dict:
+    calls = [
+        {"name": name, "args": {"query": "x"}, "id": f"call_{i}"} for i, name in enumerate(names)
+    ]
+    return {"messages": [AIMessage(content="", tool_calls=calls)]}
+
+
+def flaky_tool(name: str, errors: list[Exception]):
+    attempts = []
+
+    @tool(name)
+    async def flaky(query: str) -> str:
+        """Fails with the queued errors, then answers."""
+        attempts.append(query)
+        if errors:
+            raise errors.pop(0)
+        return "ok"
+
+    return flaky, attempts
+
+
+async def test_per_tool_timeout(monkeypatch):
+    @tool("Sleepy")
+    async def sleepy(query: str) -> str:
+        """Never finishes in time."""
+        await asyncio.sleep(3600)
+        return query
+
+    @tool("Quick")
+    def quick(query: str) -> str:
+        """Answers at once."""
+        return "done"
+
+    monkeypatch.setattr(settings, "TOOL_TIMEOUTS", {"Sleepy": 0.05})
+    node = create_tool_node([sleepy, quick], timeout=10)
+    slow, fast = (await node(calls_to("Sleepy", "Quick"), {}))["messages"]
+
+    assert slow.status == "error"
+    assert "timed out after 0.05s" in slow.content
+    assert slow.response_metadata["timed_out"]
+    assert fast.content == "done"
+    assert not fast.response_metadata["timed_out"]
+    assert tool_stats()["Sleepy"]["timeouts"] == 1
+
+
+def test_timeout_and_missing_files_are_transient():
+    # Both are OSError subclasses, so a tool raising them is retried and trips its breaker.
+    assert issubclass(TimeoutError, OSError)
+    assert issubclass(FileNotFoundError, OSError)
+    assert isinstance(FileNotFoundError(), TRANSIENT_ERRORS)
+
+
+@pytest.mark.parametrize(
+    "error",
+    [ConnectionResetError(), TimeoutError(), FileNotFoundError(), httpx.ConnectError("refused")],
+)
+async def test_transient_errors_are_retried(error):
+    name = f"Flaky{type(error).__name__}"
+    flaky, attempts = flaky_tool(name, [error])
+    (message,) = (await create_tool_node([flaky])(calls_to(name), {}))["messages"]
+    assert message.content == "ok"
+    assert len(attempts) == 2
+    assert tool_stats()[name]["retries"] == 1
+
+
+async def test_other_errors_are_not_retried():
+    flaky, attempts = flaky_tool("BadArgs", [ValueError("bad query")])
+    (message,) = (await create_tool_node([flaky])(calls_to("BadArgs"), {}))["messages"]
+    assert message.status == "error"
+    assert "bad query" in message.content
+    assert len(attempts) == 1
+    assert get_breaker("tool:BadArgs").status()["failures"] == 0
+
+
+async def test_non_idempotent_tools_are_not_retried(monkeypatch):
+    monkeypatch.setattr(settings, "NON_IDEMPOTENT_TOOLS", {"SendEmail"})
+    flaky, attempts = flaky_tool("SendEmail", [ConnectionResetError()])
+    (message,) = (await create_tool_node([flaky])(calls_to("SendEmail"), {}))["messages"]
+    assert message.status == "error"
+    assert len(attempts) == 1
+
+
+async def test_open_breaker_rejects_without_calling_the_tool():
+    flaky, attempts = flaky_tool("Broken", [])
+    breaker = get_breaker("tool:Broken")
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    try:
+        (message,) = (await create_tool_node([flaky])(calls_to("Broken"), {}))["messages"]
+    finally:
+        breaker.record_success()
+    assert message.status == "error"
+    assert "temporarily unavailable" in message.content
+    assert attempts == []
+    assert tool_stats()["Broken"]["rejected"] == 1
+
+
+@pytest.mark.parametrize("compress", [True, False])
+async def test_long_outputs_are_compressed(monkeypatch, compress):
+    @tool("Verbose")
+    def verbose(query: str) -> str:
+        """Returns far too much text."""
+        filler = " ".join(f"Sentence {i} is about the weather." for i in range(100))
+        return f"{filler} The capital of France is Paris."
+
+    monkeypatch.setattr(settings, "TOOL_OUTPUT_MAX_TOKENS_BY_TOOL", {"Verbose": 40})
+    state = calls_to("Verbose")
+    state["messages"].insert(0, HumanMessage(content="What is the capital of France?"))
+    node = create_tool_node([verbose], compress=compress)
+    (message,) = (await node(state, {}))["messages"]
+
+    assert "Paris" in message.content
+    assert ("compressed_from_tokens" in message.response_metadata) == compress
+    assert (len(message.content) < 500) == compress
@@ -0,0 +1,39 @@
+import pytest
+
+from agents.tools import CALCULATOR_MAX_EXPRESSIONS, calculator_func
+
+
+def test_single_expression():
+    assert calculator_func("2 * (3 + 4)") == "14"
+    assert calculator_func("2 ** 0.5").startswith("1.414")
+
+
+def test_constants():
+    assert calculator_func("pi").startswith("3.14159")
+
+
+def test_batch_of_expressions():
+    result = calculator_func(expressions=["1 + 1", "10 / 4"])
+    assert result == "1 + 1 = 2\n10 / 4 = 2.5"
+
+
+def test_vector_variables():
+    variables = {"price": [1.5, 2.0], "qty": [2, 3]}
+    result = calculator_func(expressions=["price * qty", "sum(price * qty)"], variables=variables)
+    assert result == "price * qty = 3., 6.\nsum(price * qty) = 9.0"
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {},
+        {"expression": "x + 1"},
+        {"expression": "__import__('os')"},
+        {"expression": "1 +"},
+        {"expression": "a", "variables": {"not valid": 1}},
+        {"expressions": ["1"] * (CALCULATOR_MAX_EXPRESSIONS + 1)},
+    ],
+)
+def test_invalid_input_raises_value_error(kwargs):
+    with pytest.raises(ValueError):
+        calculator_func(**kwargs)
@@ -0,0 +1,54 @@
+from types import SimpleNamespace
+
+import pytest
+
+from agents import web_search
+from agents.web_search import multi_web_search_func, normalize_url
+from core import settings
+
+
+@pytest.fixture(autouse=True)
+def no_cache(monkeypatch):
+    monkeypatch.setattr(settings, "TOOL_CACHE_ENABLED", False)
+
+
+def result(title: str, link: str) -> dict[str, str]:
+    return {"title": title, "link": link, "snippet": f"About {title}."}
+
+
+def test_normalize_url():
+    assert normalize_url("https://www.Example.com/a/?utm_source=x&id=1#top") == (
+        "//example.com/a?id=1"
+    )
+
+
+async def test_results_are_merged_across_queries(monkeypatch):
+    pages = {
+        "cats": [result("Cats", "https://example.com/cats"), result("Pets", "https://pets.org/")],
+        "dogs": [result("Dogs", "https://example.com/dogs"), result("Pets", "https://pets.org")],
+    }
+    search = SimpleNamespace(results=lambda query, n: pages[query])
+    monkeypatch.setattr(web_search, "_ddgs", search)
+    output = await multi_web_search_func(["cats", "dogs"])
+    assert output.count("pets.org") == 1
+    assert output.startswith("[1] Cats - https://example.com/cats\nAbout Cats.")
+
+
+async def test_blocked_search_raises_instead_of_finding_nothing(monkeypatch):
+    def blocked(query, n):
+        raise RuntimeError("202 Ratelimit")
+
+    monkeypatch.setattr(web_search, "_ddgs", SimpleNamespace(results=blocked))
+    with pytest.raises(RuntimeError):
+        await multi_web_search_func(["cats"])
+
+
+async def test_partial_failures_are_reported(monkeypatch):
+    def search(query, n):
+        if query == "dogs":
+            raise RuntimeError("202 Ratelimit")
+        return [result("Cats", "https://example.com/cats")]
+
+    monkeypatch.setattr(web_search, "_ddgs", SimpleNamespace(results=search))
+    output = await multi_web_search_func(["cats", "dogs"])
+    assert "Search failed for: 'dogs' (RuntimeError)" in output
@@ -0,0 +1,86 @@
+import importlib.util
+import json
+from pathlib import Path
+
+import pytest
+
+from agents import wikipedia_index
+from agents.wikipedia_index import NO_RESULTS, WikipediaIndex, create_wikipedia_tool
+from core import settings
+from core.settings import WikipediaBackend
+
+SCRIPT = Path(__file__).parents[2] / "scripts" / "build_wikipedia_index.py"
+PAGES = [
+    {"title": "Alan Turing", "text": "Alan Turing was an English mathematician."},
+    {"title": "Turing machine", "text": "A Turing machine is a model of computation."},
+    {"title": "Zürich", "text": "Zürich is the largest city in Switzerland."},
+]
+ABSTRACTS = """<feed>
+<doc><title>Wikipedia: Alan Turing</title><abstract>Shadowed by the article.</abstract></doc>
+<doc><title>Wikipedia: Enigma machine</title><abstract>A cipher device.</abstract></doc>
+</feed>"""
+
+
+def load_script():
+    spec = importlib.util.spec_from_file_location("build_wikipedia_index", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope="module")
+def index_dir(tmp_path_factory):
+    tmp = tmp_path_factory.mktemp("wikipedia")
+    extracted = tmp / "extracted.json"
+    extracted.write_text("\n".join(json.dumps(p) for p in PAGES), encoding="utf-8")
+    abstracts = tmp / "abstract.xml"
+    abstracts.write_text(ABSTRACTS)
+    output = str(tmp / "index")
+    assert load_script().build([str(extracted), str(abstracts)], output, 4000) == 4
+    return output
+
+
+@pytest.fixture
+def index(index_dir):
+    return WikipediaIndex(index_dir)
+
+
+def test_exact_title_comes_first(index):
+    pages = index.search("alan  turing")
+    assert pages[0] == ("Alan Turing", "Alan Turing was an English mathematician.")
+    assert [title for title, _ in pages] == ["Alan Turing", "Turing machine"]
+
+
+def test_text_is_read_from_the_store(index):
+    # Offsets are in bytes, so non-ASCII text before and in a page must round-trip.
+    assert index.search("largest city") == [
+        ("Zürich", "Zürich is the largest city in Switzerland.")
+    ]
+    assert index.search("cipher") == [("Enigma machine", "A cipher device.")]
+
+
+def test_any_term_matches_fill_the_results(index):
+    titles = [title for title, _ in index.search("enigma computation")]
+    assert sorted(titles) == ["Enigma machine", "Turing machine"]
+    assert index.search("photosynthesis") == []
+
+
+def test_clip_prefers_paragraph_breaks():
+    clip = load_script().clip
+    assert clip("first paragraph\nsecond", 18) == "first paragraph"
+    assert clip("no breaks at all here", 8) == "no break"
+
+
+def test_local_tool(index_dir, monkeypatch):
+    monkeypatch.setattr(settings, "WIKIPEDIA_BACKEND", WikipediaBackend.LOCAL)
+    monkeypatch.setattr(settings, "WIKIPEDIA_INDEX_DIR", index_dir)
+    monkeypatch.setattr(wikipedia_index, "_counters", wikipedia_index.Counter())
+    tool = create_wikipedia_tool()
+    assert tool.invoke({"query": "Zürich"}).startswith("Page: Zürich\nSummary: Zürich is")
+    assert tool.invoke({"query": "photosynthesis"}) == NO_RESULTS
+    assert wikipedia_index.wikipedia_stats() == {"lookups": 2, "misses": 1}
+
+
+def test_missing_index(tmp_path):
+    with pytest.raises(FileNotFoundError, match="build_wikipedia_index.py"):
+        WikipediaIndex(str(tmp_path))
@@ -0,0 +1,96 @@
+import asyncio
+from collections.abc import AsyncIterator
+from typing import Any
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from core import hedging
+from core.hedging import HedgedChatModel
+
+
+class DelayedModel(BaseChatModel):
+    reply: str
+    delay: float = 0.0
+    fail: bool = False
+
+    @property
+    def _llm_type(self) -> str:
+        return "delayed"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.reply))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError(f"{self.reply} failed")
+        return self._generate(messages)
+
+    async def _astream(
+        self, messages, stop=None, run_manager=None, **kwargs: Any
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError(f"{self.reply} failed")
+        for word in self.reply.split():
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word))
+
+
+@pytest.fixture(autouse=True)
+def counters(monkeypatch):
+    monkeypatch.setattr(hedging, "_hedge_counters", hedging.Counter())
+
+
+def hedged(primary: DelayedModel, secondary: DelayedModel) -> HedgedChatModel:
+    return HedgedChatModel(primary=primary, secondary=secondary, hedge_after=0.05)
+
+
+PROMPT = [HumanMessage(content="hi")]
+
+
+async def test_fast_primary_is_not_hedged():
+    model = hedged(DelayedModel(reply="primary"), DelayedModel(reply="secondary"))
+    assert (await model.ainvoke(PROMPT)).content == "primary"
+    assert hedging.hedge_stats()["hedges_fired"] == 0
+
+
+async def test_slow_primary_is_hedged():
+    model = hedged(DelayedModel(reply="primary", delay=1.0), DelayedModel(reply="secondary"))
+    assert (await model.ainvoke(PROMPT)).content == "secondary"
+    stats = hedging.hedge_stats()
+    assert stats["hedges_fired"] == 1
+    assert stats["hedge_wins"] == 1
+
+
+async def test_failed_hedge_falls_back_to_primary():
+    model = hedged(
+        DelayedModel(reply="primary", delay=0.2),
+        DelayedModel(reply="secondary", fail=True),
+    )
+    assert (await model.ainvoke(PROMPT)).content == "primary"
+
+
+async def test_failed_primary_is_hedged_at_once():
+    model = hedged(DelayedModel(reply="primary", fail=True), DelayedModel(reply="secondary"))
+    assert (await model.ainvoke(PROMPT)).content == "secondary"
+
+
+async def test_both_failing_raises():
+    model = hedged(
+        DelayedModel(reply="primary", fail=True),
+        DelayedModel(reply="secondary", fail=True),
+    )
+    with pytest.raises(RuntimeError):
+        await model.ainvoke(PROMPT)
+
+
+async def test_stream_comes_from_one_model():
+    model = hedged(
+        DelayedModel(reply="slow primary", delay=1.0),
+        DelayedModel(reply="fast secondary answer"),
+    )
+    chunks = [chunk.content async for chunk in model.astream(PROMPT)]
+    assert chunks == ["fast", "secondary", "answer"]
@@ -0,0 +1,29 @@
+import httpx
+
+from core import http
+from core.resilience import CircuitBreaker, ResilientAsyncTransport
+from core.settings import settings
+from schema.models import Provider
+
+
+class FailingPoolTransport(httpx.AsyncBaseTransport):
+    _pool = None
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        return httpx.Response(503)
+
+
+async def test_warm_up_bypasses_retries_and_breaker(monkeypatch):
+    inner = FailingPoolTransport()
+    breaker = CircuitBreaker("provider:openai", failure_threshold=1, recovery_timeout=30)
+    client = httpx.AsyncClient(transport=ResilientAsyncTransport(inner, breaker))
+    monkeypatch.setattr(http, "_async_clients", {Provider.OPENAI: client})
+    monkeypatch.setattr(settings, "GROQ_API_KEY", None)
+
+    await http.warm_up_pools()
+    assert inner.calls == 1
+    assert breaker.state == "closed"
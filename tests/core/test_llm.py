@@ -0,0 +1,57 @@
+from collections import OrderedDict
+
+import pytest
+
+from core import llm, settings
+from core.llm import get_model, model_cache_stats, normalize_generation_params
+from schema.models import OpenAIModelName
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(llm, "_model_cache", OrderedDict())
+    monkeypatch.setattr(llm, "_model_cache_counters", {"hits": 0, "misses": 0, "evictions": 0})
+    monkeypatch.setattr(settings, "HEDGE_ENABLED", False)
+
+
+def test_normalize_generation_params():
+    assert normalize_generation_params() == (None, None, None)
+    assert normalize_generation_params(0.7049, 256.0, ["b", "a", "b"]) == (0.7, 256, ("a", "b"))
+    assert normalize_generation_params(stop="END") == (None, None, ("END",))
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"temperature": 2.5},
+        {"temperature": -0.1},
+        {"max_tokens": 0},
+        {"max_tokens": 1.5},
+        {"max_tokens": True},
+        {"stop": ["a", "b", "c", "d", "e"]},
+        {"stop": [""]},
+    ],
+)
+def test_invalid_generation_params(kwargs):
+    with pytest.raises(ValueError):
+        normalize_generation_params(**kwargs)
+
+
+def test_equivalent_params_share_a_client():
+    model = get_model(OpenAIModelName.GPT_4O_MINI, temperature=0.3, stop=["b", "a"])
+    assert get_model(OpenAIModelName.GPT_4O_MINI, temperature=0.30001, stop=["a", "b"]) is model
+    assert get_model(OpenAIModelName.GPT_4O_MINI, temperature=0.4) is not model
+    assert model.temperature == 0.3
+    assert model_cache_stats() == {"hits": 1, "misses": 2, "evictions": 0, "size": 2}
+
+
+def test_least_recently_used_client_is_evicted(monkeypatch):
+    monkeypatch.setattr(settings, "MODEL_CLIENT_CACHE_SIZE", 2)
+    first = get_model(OpenAIModelName.GPT_4O_MINI, max_tokens=1)
+    second = get_model(OpenAIModelName.GPT_4O_MINI, max_tokens=2)
+    assert get_model(OpenAIModelName.GPT_4O_MINI, max_tokens=1) is first
+    get_model(OpenAIModelName.GPT_4O_MINI, max_tokens=3)
+
+    assert get_model(OpenAIModelName.GPT_4O_MINI, max_tokens=1) is first
+    assert get_model(OpenAIModelName.GPT_4O_MINI, max_tokens=2) is not second
+    assert model_cache_stats()["evictions"] == 2
@@ -0,0 +1,133 @@
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from core import rate_limit
+from core.rate_limit import ModelScheduler, RateLimitedAsyncTransport, TokenBucket, get_scheduler
+from core.settings import settings
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    # Replace the module's reference only; the event loop keeps the real clock.
+    monkeypatch.setattr(rate_limit, "time", SimpleNamespace(monotonic=fake, sleep=time.sleep))
+    return fake
+
+
+def test_bucket_starts_full(clock):
+    bucket = TokenBucket(60)
+    assert bucket.reserve(60) == 0.0
+    assert bucket.reserve(1) == pytest.approx(1.0)
+
+
+def test_bucket_refills_at_rate(clock):
+    bucket = TokenBucket(60)
+    bucket.reserve(60)
+    clock.now += 30
+    assert bucket.reserve(30) == 0.0
+    assert bucket.reserve(30) == pytest.approx(30.0)
+
+
+def test_bucket_never_holds_more_than_a_minute(clock):
+    bucket = TokenBucket(60)
+    clock.now += 600
+    assert bucket.reserve(60) == 0.0
+    assert bucket.reserve(60) == pytest.approx(60.0)
+
+
+def test_reservations_queue_in_order(clock):
+    bucket = TokenBucket(60)
+    bucket.reserve(60)
+    assert bucket.reserve(10) == pytest.approx(10.0)
+    assert bucket.reserve(10) == pytest.approx(20.0)
+
+
+def test_refund_returns_tokens(clock):
+    bucket = TokenBucket(60)
+    bucket.reserve(60)
+    bucket.reserve(30)
+    bucket.refund(30)
+    assert bucket.reserve(1) == pytest.approx(1.0)
+
+
+async def test_cancelled_acquire_refunds_its_reservation(clock):
+    scheduler = ModelScheduler("test", requests_per_minute=1)
+    await scheduler.acquire(0)
+    task = asyncio.create_task(scheduler.acquire(0))
+    await asyncio.sleep(0.01)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    # Only the first request's reservation is left to wait for.
+    clock.now += 60
+    assert scheduler._reserve(0) == 0.0
+    assert scheduler.stats()["queue_depth"] == 0
+
+
+def test_limits_are_opt_in_and_per_model(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMITS", {"model-a": {"requests_per_minute": 10}})
+    monkeypatch.setattr(rate_limit, "_schedulers", {})
+    assert get_scheduler("model-b") is None
+    assert get_scheduler("model-a") is get_scheduler("model-a")
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    def __init__(self) -> None:
+        self.models: list[str] = []
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.models.append(json.loads(request.content)["model"])
+        return httpx.Response(200)
+
+
+async def test_transport_schedules_by_request_model(monkeypatch, clock):
+    monkeypatch.setattr(settings, "RATE_LIMITS", {"model-a": {"requests_per_minute": 10}})
+    monkeypatch.setattr(rate_limit, "_schedulers", {})
+    inner = RecordingTransport()
+    client = httpx.AsyncClient(transport=RateLimitedAsyncTransport(inner))
+    for model in ["model-a", "model-b", "model-a"]:
+        await client.post("http://test/", json={"model": model, "messages": []})
+    assert inner.models == ["model-a", "model-b", "model-a"]
+    assert rate_limit.scheduler_stats()["model-a"]["requests"] == 2
+    assert "model-b" not in rate_limit.scheduler_stats()
+
+
+class RateLimitedOnceTransport(httpx.AsyncBaseTransport):
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        if self.calls == 1:
+            return httpx.Response(429, headers={"retry-after": "0"})
+        return httpx.Response(200)
+
+
+async def test_retry_after_429_does_not_reserve_twice(monkeypatch, clock):
+    limits = {"model-a": {"tokens_per_minute": 1000}}
+    monkeypatch.setattr(settings, "RATE_LIMITS", limits)
+    monkeypatch.setattr(rate_limit, "_schedulers", {})
+    inner = RateLimitedOnceTransport()
+    client = httpx.AsyncClient(transport=RateLimitedAsyncTransport(inner))
+    body = {"model": "model-a", "messages": [], "max_tokens": 600}
+    response = await client.post("http://test/", json=body)
+
+    assert response.status_code == 200
+    assert inner.calls == 2
+    scheduler = get_scheduler("model-a")
+    assert scheduler.stats()["waited"] == 0
+    # Only the served attempt's tokens are still reserved.
+    assert scheduler._reserve(1000 - rate_limit.estimate_request_tokens(body)) == 0.0
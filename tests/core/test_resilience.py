@@ -0,0 +1,179 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.tools import tool
+
+from agents.tool_node import create_tool_node
+from core import resilience
+from core.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    ResilientAsyncTransport,
+    find_circuit_open,
+    get_breaker,
+)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    # Replace the module's reference only; the event loop keeps the real clock.
+    monkeypatch.setattr(resilience, "time", SimpleNamespace(monotonic=fake, sleep=time.sleep))
+    return fake
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(resilience, "backoff_delay", lambda attempt: 0.0)
+
+
+def test_breaker_cycle(clock):
+    breaker = CircuitBreaker("test", failure_threshold=2, recovery_timeout=30)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    with pytest.raises(CircuitOpenError) as e:
+        breaker.check()
+    assert e.value.retry_after == 30
+
+    clock.now += 31
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    # Only one trial call at a time.
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow()
+    assert breaker.status()["opened"] == 1
+
+
+def test_failed_trial_reopens(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, recovery_timeout=30)
+    breaker.record_failure()
+    clock.now += 31
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+
+def test_released_trial_lets_the_next_call_through(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, recovery_timeout=30)
+    breaker.record_failure()
+    clock.now += 31
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+
+
+def test_stale_trial_expires(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, recovery_timeout=30)
+    breaker.record_failure()
+    clock.now += 31
+    assert breaker.allow()
+    assert not breaker.allow()
+    clock.now += 31
+    assert breaker.allow()
+
+
+def test_find_circuit_open_walks_the_cause_chain():
+    error = CircuitOpenError("provider:test", 5)
+    try:
+        try:
+            raise error
+        except CircuitOpenError as e:
+            raise RuntimeError("wrapped") from e
+    except RuntimeError as wrapped:
+        assert find_circuit_open(wrapped) is error
+    assert find_circuit_open(ValueError()) is None
+
+
+class HangingTransport(httpx.AsyncBaseTransport):
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(3600)
+        raise AssertionError("unreachable")
+
+
+class FlakyTransport(httpx.AsyncBaseTransport):
+    def __init__(self, statuses: list[int]) -> None:
+        self.statuses = statuses
+        self.calls = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        return httpx.Response(self.statuses.pop(0))
+
+
+async def test_cancelled_trial_request_releases_the_breaker(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, recovery_timeout=30)
+    breaker.record_failure()
+    clock.now += 31
+    client = httpx.AsyncClient(transport=ResilientAsyncTransport(HangingTransport(), breaker))
+
+    task = asyncio.create_task(client.get("http://test/"))
+    await asyncio.sleep(0.01)
+    assert breaker.state == "half_open"
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert breaker.allow()
+    breaker.record_success()
+
+
+async def test_transport_retries_server_errors(no_backoff):
+    breaker = CircuitBreaker("test", failure_threshold=5, recovery_timeout=30)
+    inner = FlakyTransport([503, 200])
+    client = httpx.AsyncClient(transport=ResilientAsyncTransport(inner, breaker))
+    response = await client.get("http://test/")
+    assert response.status_code == 200
+    assert inner.calls == 2
+    assert breaker.state == "closed"
+
+
+async def test_open_transport_does_not_touch_the_network(no_backoff):
+    breaker = CircuitBreaker("test", failure_threshold=1, recovery_timeout=30)
+    inner = FlakyTransport([500])
+    client = httpx.AsyncClient(transport=ResilientAsyncTransport(inner, breaker))
+    with pytest.raises(CircuitOpenError):
+        await client.get("http://test/")
+    assert inner.calls == 1
+
+
+async def test_cancelled_tool_call_releases_the_breaker(clock):
+    @tool("SlowTool")
+    async def slow_tool(query: str) -> str:
+        """Never finishes."""
+        await asyncio.sleep(3600)
+        return query
+
+    breaker = get_breaker("tool:SlowTool")
+    breaker.record_success()
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    clock.now += breaker.recovery_timeout + 1
+
+    node = create_tool_node([slow_tool])
+    call = {"name": "SlowTool", "args": {"query": "x"}, "id": "call_1"}
+    state = {"messages": [AIMessage(content="", tool_calls=[call])]}
+    task = asyncio.create_task(node(state, {}))
+    await asyncio.sleep(0.01)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert breaker.allow()
+    breaker.record_success()
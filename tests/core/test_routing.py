@@ -0,0 +1,88 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from core import routing
+from core.routing import ModelRouter, classify_request, resolve_model
+from core.settings import settings
+from schema.models import (
+    AutoModelName,
+    AzureOpenAIModelName,
+    GroqModelName,
+    OllamaModelName,
+    OpenAIModelName,
+)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def clock(monkeypatch):
+    fake = FakeClock()
+    fake_time = SimpleNamespace(monotonic=fake, perf_counter=time.perf_counter)
+    monkeypatch.setattr(routing, "time", fake_time)
+    return fake
+
+
+def test_tool_agents_need_a_general_model():
+    assert classify_request("hi", "chatbot") == 1
+    assert classify_request("hi", "multi-source") == 2
+    assert classify_request("Write a comprehensive report", "chatbot") == 3
+
+
+def test_unbuildable_models_are_not_candidates(monkeypatch):
+    available = {AzureOpenAIModelName.AZURE_GPT_4O, OpenAIModelName.GPT_4O}
+    monkeypatch.setattr(settings, "AVAILABLE_MODELS", available)
+    assert ModelRouter().candidates() == [OpenAIModelName.GPT_4O]
+
+
+def test_latency_is_read_under_the_recorded_model_name(monkeypatch):
+    monkeypatch.setattr(settings, "OLLAMA_MODEL", "qwen3:8b")
+    router = ModelRouter()
+    router.record("qwen3:8b", 0.1)
+    router.record(GroqModelName.LLAMA_31_8B.value, 2.0)
+    assert router.expected_latency(OllamaModelName.OLLAMA_GENERIC) == pytest.approx(0.1)
+    assert router.expected_latency(GroqModelName.LLAMA_31_8B) == pytest.approx(2.0)
+
+
+def test_route_prefers_the_fastest_adequate_model(monkeypatch):
+    available = {GroqModelName.LLAMA_33_70B, OpenAIModelName.GPT_4O_MINI, OpenAIModelName.GPT_4O}
+    monkeypatch.setattr(settings, "AVAILABLE_MODELS", available)
+    router = ModelRouter()
+    router.record(GroqModelName.LLAMA_33_70B.value, 5.0)
+    assert router.route("hi", "sql") == OpenAIModelName.GPT_4O_MINI
+    assert router.route("Write a comprehensive report", "chatbot") == OpenAIModelName.GPT_4O
+
+
+def test_slow_model_recovers(monkeypatch, clock):
+    available = {GroqModelName.LLAMA_31_8B, OllamaModelName.OLLAMA_GENERIC}
+    monkeypatch.setattr(settings, "AVAILABLE_MODELS", available)
+    monkeypatch.setattr(settings, "OLLAMA_MODEL", "qwen3:8b")
+    router = ModelRouter(decay_half_life=60)
+    groq = GroqModelName.LLAMA_31_8B
+    assert router.route("hi", "chatbot") == groq
+
+    router.record(groq.value, 1.0, ok=False)
+    assert router.route("hi", "chatbot") == OllamaModelName.OLLAMA_GENERIC
+
+    # Without new samples the penalty fades and groq gets traffic again.
+    clock.now += 600
+    assert router.expected_latency(groq) == pytest.approx(0.6, abs=0.05)
+    assert router.route("hi", "chatbot") == groq
+    # A fast call then outweighs the stale penalty.
+    router.record(groq.value, 0.5)
+    assert router.expected_latency(groq) < 1.0
+
+
+def test_auto_is_rejected_when_routing_is_disabled(monkeypatch):
+    monkeypatch.setattr(settings, "MODEL_ROUTING_ENABLED", False)
+    with pytest.raises(ValueError):
+        resolve_model(AutoModelName.AUTO, "hi", "chatbot")
+    assert resolve_model(GroqModelName.LLAMA_31_8B, "hi", "chatbot") == GroqModelName.LLAMA_31_8B